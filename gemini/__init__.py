@@ -6,20 +6,32 @@ from gemini.supergemini import (
     __version__,
     show_version,
     get_config,
+    default_config,
     get_personas_config,
+    invalidate_config_cache,
+    get_logger,
     GEMINI_HOME,
     SHARED_DIR,
     COMMANDS_DIR,
     GEMINI_MD,
+    CONFIG_PATH,
+    CONFIG_JOURNAL_PATH,
+    PERSONAS_CONFIG_PATH,
 )
 
 __all__ = [
     "__version__",
     "show_version",
     "get_config",
+    "default_config",
     "get_personas_config",
+    "invalidate_config_cache",
+    "get_logger",
     "GEMINI_HOME",
     "SHARED_DIR",
     "COMMANDS_DIR",
     "GEMINI_MD",
+    "CONFIG_PATH",
+    "CONFIG_JOURNAL_PATH",
+    "PERSONAS_CONFIG_PATH",
 ]
@@ -6,29 +6,35 @@ Gemini CLIを拡張するためのコマンドラインツール
 
 import os
 import sys
-import argparse
-import logging
-import shutil
-from pathlib import Path
 
-from . import __version__, show_version, get_config, get_personas_config
+from . import __version__, show_version, get_config, get_logger
 from . import GEMINI_HOME, SHARED_DIR, COMMANDS_DIR, GEMINI_MD
+from .supergemini import _help_formatter
 
-# ロガーの設定
-logger = logging.getLogger("SuperGemini.CLI")
+# 起動中のデーモンがあれば任せるコマンド（設定を変更しない表示用のコマンド）
+DAEMON_COMMANDS = ("commands", "personas", "persona-detail", "search")
 
 
 def create_parser():
     """
     コマンドラインパーサーの作成
     """
+    import argparse
+    from functools import partial
+
     parser = argparse.ArgumentParser(
         description="SuperGemini - Gemini CLI拡張フレームワーク",
         epilog="SuperGemini v" + __version__,
+        formatter_class=_help_formatter,
     )
 
     # サブコマンドの設定
-    subparsers = parser.add_subparsers(dest="command", help="コマンド")
+    # サブコマンドのパーサーも同じ整形を使う
+    subparsers = parser.add_subparsers(
+        dest="command",
+        help="コマンド",
+        parser_class=partial(argparse.ArgumentParser, formatter_class=_help_formatter),
+    )
 
     # バージョン表示コマンド
     version_parser = subparsers.add_parser("version", help="バージョン情報を表示")
@@ -63,6 +69,21 @@ def create_parser():
     config_parser.add_argument(
         "--reset", action="store_true", help="設定をデフォルトにリセット"
     )
+    config_parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="設定を変更（例: commands.test.enabled=false、複数指定可）",
+    )
+    config_parser.add_argument(
+        "--defer",
+        action="store_true",
+        help="--set の変更を記録だけして後でまとめて書き込む",
+    )
+    config_parser.add_argument(
+        "--flush", action="store_true", help="書き込み待ちの変更を設定ファイルに書き込む"
+    )
 
     # ペルソナ一覧表示
     personas_parser = subparsers.add_parser(
@@ -75,6 +96,59 @@ def create_parser():
     )
     persona_detail_parser.add_argument("persona_name", help="詳細を表示するペルソナ名")
 
+    # コマンド・ペルソナ検索
+    search_parser = subparsers.add_parser(
+        "search", help="コマンドとペルソナを説明・専門分野から検索"
+    )
+    search_parser.add_argument("query", nargs="+", help="検索語")
+    search_parser.add_argument(
+        "--limit", type=int, default=10, help="表示する件数（デフォルト: 10）"
+    )
+
+    # コマンドのテンプレートの描画
+    render_parser = subparsers.add_parser(
+        "render", help="コマンドの説明にペルソナ・引数・プロジェクトの情報を埋め込んで表示"
+    )
+    render_parser.add_argument("template", help="コマンド名（例: analyze, implement）")
+    render_parser.add_argument(
+        "arguments",
+        nargs=argparse.REMAINDER,
+        help="コマンドの引数（コマンド名より後はすべて引数として扱う）",
+    )
+    render_parser.add_argument(
+        "--persona", help="ペルソナ名（例: architect、コマンド名より前に指定）"
+    )
+    render_parser.add_argument(
+        "--project",
+        metavar="DIR",
+        help="プロジェクトのディレクトリ（デフォルト: カレントディレクトリ）",
+    )
+    render_parser.add_argument(
+        "--no-project", action="store_true", help="プロジェクトの情報を埋め込まない"
+    )
+
+    # シェル補完用のインデックス
+    completions_parser = subparsers.add_parser(
+        "completions", help="シェル補完用のコマンド名・ペルソナ名のインデックスを更新"
+    )
+    completions_parser.add_argument(
+        "--force", action="store_true", help="設定が変わっていなくても作り直す"
+    )
+    completions_parser.add_argument(
+        "--print", action="store_true", help="インデックスの内容を表示"
+    )
+
+    # デーモンの起動・停止
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="設定を読み込んだまま常駐し、表示用のコマンドに応答するデーモン"
+    )
+    daemon_parser.add_argument(
+        "action", choices=["start", "stop", "status"], help="操作"
+    )
+    daemon_parser.add_argument(
+        "--foreground", action="store_true", help="端末から切り離さずに起動"
+    )
+
     return parser
 
 
@@ -99,7 +173,7 @@ def setup_environment():
                     "詳細な使い方については、`SuperGemini commands` を実行して確認してください。\n"
                 )
         except Exception as e:
-            logger.error(f"GEMINI.md ファイルの作成エラー: {e}")
+            get_logger("SuperGemini.CLI").error(f"GEMINI.md ファイルの作成エラー: {e}")
 
 
 def install_framework(profile="standard", interactive=False, force=False):
@@ -152,42 +226,20 @@ def show_commands():
     """
     利用可能なコマンド一覧を表示
     """
-    config = get_config()
-    commands = config.get("commands", {})
-    prefix = config.get("prefix", "/sg")
+    from .supergemini.registry import load_registry
+
+    registry = load_registry()
+    prefix = registry["prefix"]
 
     print("📋 SuperGemini コマンド一覧:")
     print("")
 
-    # 設定ファイルからコマンドをカテゴリごとに動的に整理
-    categories = {}
-    for cmd_name, cmd_info in commands.items():
-        if cmd_info.get("enabled", True):
-            category = cmd_info.get("category", "その他")
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(
-                {"name": cmd_name, "description": cmd_info.get("description", "")}
-            )
-
-    # カテゴリの表示順序を定義（設定にない場合は最後に表示）
-    category_order = ["分析系", "開発系", "設計系", "管理系", "ツール系"]
-
-    # 順序に従ってカテゴリを表示
-    for category in category_order:
-        if category in categories:
-            print(f"【{category}】")
-            for cmd in categories[category]:
-                print(f"  {prefix}:{cmd['name']} - {cmd['description']}")
-            print("")
-
-    # 定義されていないカテゴリがあれば最後に表示
-    for category, cmd_list in categories.items():
-        if category not in category_order:
-            print(f"【{category}】")
-            for cmd in cmd_list:
-                print(f"  {prefix}:{cmd['name']} - {cmd['description']}")
-            print("")
+    # カテゴリはレジストリ作成時に表示順へ並べ替え済み
+    for category, commands in registry["categories"]:
+        print(f"【{category}】")
+        for cmd_name, description in commands:
+            print(f"  {prefix}:{cmd_name} - {description}")
+        print("")
 
     print("使用例: /sg:implement ログイン機能")
 
@@ -196,22 +248,16 @@ def show_personas():
     """
     利用可能なペルソナ一覧を表示
     """
-    config = get_config()
-    personas_config = get_personas_config()
-    personas = config.get("personas", [])
+    from .supergemini.registry import load_registry
+
+    registry = load_registry()
 
     print("🎭 SuperGemini ペルソナ一覧:")
     print("")
 
-    # ペルソナ設定ファイルからペルソナ詳細を取得
-    personas_data = personas_config.get("personas", {})
-
-    for persona in personas:
-        if persona in personas_data:
-            persona_info = personas_data[persona]
-            emoji = persona_info.get("emoji", "")
-            title = persona_info.get("title", "")
-            print(f"  @{persona} - {emoji} {title}")
+    for persona, label in registry["personas"]:
+        if label is not None:
+            print(f"  @{persona} - {label}")
         else:
             print(f"  @{persona}")
 
@@ -225,19 +271,16 @@ def show_persona_detail(persona_name):
     """
     指定されたペルソナの詳細情報を表示
     """
-    personas_config = get_personas_config()
-    personas_data = personas_config.get("personas", {})
+    from .supergemini.registry import load_registry
+
+    persona_details = load_registry()["persona_details"]
 
-    if persona_name not in personas_data:
+    if persona_name not in persona_details:
         print(f"❌ ペルソナ '{persona_name}' が見つかりません。")
         print("利用可能なペルソナ一覧を確認するには: python -m gemini personas")
         return
 
-    persona_info = personas_data[persona_name]
-    emoji = persona_info.get("emoji", "")
-    title = persona_info.get("title", "")
-    description = persona_info.get("description", "")
-    specialties = persona_info.get("specialties", [])
+    emoji, title, description, specialties = persona_details[persona_name]
 
     print(f"🎭 ペルソナ詳細: @{persona_name}")
     print("=" * 50)
@@ -257,23 +300,86 @@ def show_persona_detail(persona_name):
     print(f"  @{persona_name} として、システムの改善提案をして")
 
 
-def show_config(edit=False, reset=False):
+def show_search(query, limit=10):
+    """
+    コマンドとペルソナを検索して表示
+    """
+    from .supergemini.registry import load_registry
+    from .supergemini.search import search
+
+    results = search(query, limit)
+    if not results:
+        print(f"❌ 「{query}」に一致するコマンド・ペルソナが見つかりません。")
+        return
+
+    prefix = load_registry()["prefix"]
+
+    print(f"🔍 「{query}」の検索結果:")
+    print("")
+    for kind, name, summary, _ in results:
+        if kind == "command":
+            print(f"  {prefix}:{name} - {summary}")
+        else:
+            print(f"  @{name} - {summary}")
+    print("")
+    print("詳細情報を見るには: python -m gemini persona-detail <persona名>")
+
+
+def _parse_setting(text):
+    """
+    KEY=VALUE を (キー, 値) にする（値はJSONとして解釈できなければ文字列）
+    """
+    import json
+
+    key, separator, value = text.partition("=")
+    if not separator or not key:
+        raise ValueError(f"KEY=VALUE の形式で指定してください: {text}")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def show_config(edit=False, reset=False, settings=(), defer=False, flush=False):
     """
     設定の表示・編集
     """
-    from . import CONFIG_PATH
+    from . import CONFIG_PATH, default_config
+    from .supergemini import config_store
 
     if reset:
-        if os.path.exists(CONFIG_PATH):
-            os.remove(CONFIG_PATH)
-        config = get_config()  # 新しい設定ファイルを作成
+        config_store.reset_config(default_config())
         print("✅ 設定をデフォルトにリセットしました")
         return
 
+    if settings:
+        try:
+            changes = [_parse_setting(text) for text in settings]
+            config_store.update_config(
+                changes, write_behind=defer, schema=default_config()
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if defer:
+            print("📝 設定の変更を記録しました（後でまとめて書き込みます）")
+        else:
+            print("✅ 設定を変更しました")
+        return
+
+    if flush:
+        if config_store.flush_config():
+            print("✅ 書き込み待ちの変更を設定ファイルに書き込みました")
+        else:
+            print("ℹ️  書き込み待ちの変更はありません")
+        return
+
     config = get_config()
 
     if edit:
-        # エディタで開く
+        # 書き込み待ちの変更を反映してからエディタで開く
+        config_store.flush_config()
+
         import subprocess
 
         editor = os.environ.get("EDITOR", "nano")
@@ -293,13 +399,134 @@ def show_config(edit=False, reset=False):
         print(f"  • 設定ファイル: {CONFIG_PATH}")
 
 
-def main():
+def show_render(template, arguments, persona=None, project=None, no_project=False):
+    """
+    コマンドのテンプレートを描画して表示（描画した部分から順に出力する）
+    """
+    from .supergemini.templates import project_context, render
+
+    try:
+        chunks = render(
+            template,
+            persona=persona,
+            arguments=" ".join(arguments),
+            project={} if no_project else project_context(project),
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    write = sys.stdout.write
+    for chunk in chunks:
+        write(chunk)
+
+
+def show_completions(force=False, print_index=False):
+    """
+    シェル補完用のインデックスを更新（設定が変わっていない場合は作り直さない）
+    """
+    from .supergemini.completions import COMPLETIONS_PATH, update_index
+
+    if update_index(force=force):
+        print(f"✅ 補完インデックスを更新しました: {COMPLETIONS_PATH}")
+    else:
+        print(f"ℹ️  補完インデックスは最新です: {COMPLETIONS_PATH}")
+
+    if print_index:
+        with open(COMPLETIONS_PATH, "r", encoding="utf-8") as f:
+            print("")
+            print(f.read(), end="")
+
+
+def _request_daemon(argv):
+    """
+    起動中のデーモンにコマンドを任せる（任せた場合は終了コード、デーモンがなければNone）
+    """
+    if not argv or argv[0] not in DAEMON_COMMANDS:
+        return None
+    if "-h" in argv or "--help" in argv or os.environ.get("SUPERGEMINI_NO_DAEMON"):
+        return None
+
+    from .supergemini.daemon import request
+
+    response = request(argv)
+    if response is None:
+        return None
+    status, out, err = response
+    sys.stdout.write(out)
+    sys.stderr.write(err)
+    return status
+
+
+def _handle_daemon_request(argv):
+    """
+    デーモンが受けた要求をこのプロセスで実行し、(終了コード, 標準出力, 標準エラー出力) を返す
+    """
+    import io
+    from contextlib import redirect_stderr, redirect_stdout
+
+    if not argv or argv[0] not in DAEMON_COMMANDS:
+        return 2, "", f"❌ デーモンでは実行できないコマンドです: {' '.join(argv)}\n"
+
+    out, err = io.StringIO(), io.StringIO()
+    status = 0
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            main(argv)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return status, out.getvalue(), err.getvalue()
+
+
+def show_daemon(action, foreground=False):
+    """
+    デーモンの起動・停止・状態表示
+    """
+    from .supergemini import daemon
+
+    if action == "status":
+        status = daemon.is_running()
+        if status is None:
+            print("ℹ️  SuperGemini デーモンは起動していません")
+        else:
+            print("🟢 SuperGemini デーモンは起動しています")
+            print(status, end="")
+    elif action == "stop":
+        if daemon.stop():
+            print("✅ SuperGemini デーモンを停止しました")
+        else:
+            print("ℹ️  SuperGemini デーモンは起動していません")
+    elif foreground:
+        print(f"🚀 SuperGemini デーモンを起動します: {daemon.SOCKET_PATH}", flush=True)
+        if not daemon.serve(_handle_daemon_request):
+            print("ℹ️  SuperGemini デーモンは既に起動しています")
+    elif daemon.is_running() is not None:
+        print("ℹ️  SuperGemini デーモンは既に起動しています")
+    else:
+        command = [sys.executable, "-m", "gemini", "daemon", "start", "--foreground"]
+        pid = daemon.start_background(command)
+        if pid is None:
+            print("❌ SuperGemini デーモンを起動できませんでした")
+            sys.exit(1)
+        print(f"✅ SuperGemini デーモンを起動しました (PID {pid}, {daemon.SOCKET_PATH})")
+
+
+def main(argv=None):
     """
     メイン関数
+
+    argv を省略した場合はコマンドライン引数を使い、表示用のコマンドは
+    起動中のデーモンがあればデーモンに任せる。
     """
+    if argv is None:
+        argv = sys.argv[1:]
+        status = _request_daemon(argv)
+        if status is not None:
+            sys.exit(status)
+
     # コマンドライン引数のパース
     parser = create_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # コマンドが指定されていない場合はヘルプを表示
     if not args.command:
@@ -317,8 +544,18 @@ def main():
         show_personas()
     elif args.command == "persona-detail":
         show_persona_detail(args.persona_name)
+    elif args.command == "search":
+        show_search(" ".join(args.query), args.limit)
     elif args.command == "config":
-        show_config(args.edit, args.reset)
+        show_config(args.edit, args.reset, args.set, args.defer, args.flush)
+    elif args.command == "render":
+        show_render(
+            args.template, args.arguments, args.persona, args.project, args.no_project
+        )
+    elif args.command == "completions":
+        show_completions(args.force, args.print)
+    elif args.command == "daemon":
+        show_daemon(args.action, args.foreground)
     else:
         parser.print_help()
 
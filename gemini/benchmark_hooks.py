@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+SuperGemini フック実行のベンチマークスクリプト
+登録数を変えながら execute_hooks 相当の処理を繰り返し、
+従来の HookRegistry（イベント名の辞書＋リスト）と現在の HookRegistry（コンパイル済み実行表）の
+1回あたりの実行時間を比較します。
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini.supergemini.hooks import TIMING_INTERVAL, HookRegistry  # noqa: E402
+
+# 1イベントあたりのフック数
+DEFAULT_SIZES = "1,10,100,500"
+
+# 登録するイベントの数（実行するイベント以外にも登録して辞書を大きくする）
+EVENT_COUNT = 50
+
+
+class LegacyHookRegistry:
+    """変更前の HookRegistry（比較用）"""
+
+    def __init__(self):
+        self.hooks = {}
+
+    def register(self, event_name, callback):
+        if event_name not in self.hooks:
+            self.hooks[event_name] = []
+        self.hooks[event_name].append(callback)
+
+    def execute(self, event_name, data=None):
+        if event_name in self.hooks:
+            for callback in self.hooks[event_name]:
+                data = callback(data) if data is not None else callback()
+        return data
+
+
+def passthrough(data):
+    return data
+
+
+def build_legacy(size):
+    registry = LegacyHookRegistry()
+    for event in range(EVENT_COUNT):
+        for _ in range(size):
+            registry.register(f"response.event{event}", passthrough)
+    return registry
+
+
+def build_current(size, wildcard, timing_interval=TIMING_INTERVAL):
+    """wildcard=True の場合は半分を "response.*" で登録する"""
+    registry = HookRegistry(timing_interval=timing_interval)
+    exact = size // 2 if wildcard else size
+    for event in range(EVENT_COUNT):
+        for _ in range(exact):
+            registry.register(f"response.event{event}", passthrough)
+    if wildcard:
+        for _ in range(size - exact):
+            registry.register("response.*", passthrough)
+    return registry
+
+
+def measure(execute, number):
+    """1回あたりの実行時間（秒、5回の最良値）"""
+    return min(timeit.repeat(execute, number=number, repeat=5)) / number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SuperGemini フック実行のベンチマーク")
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"1イベントあたりのフック数（カンマ区切り、デフォルト: {DEFAULT_SIZES}）",
+    )
+    parser.add_argument(
+        "--calls", type=int, default=200000, help="計測するフック呼び出しの総数"
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+
+    print(
+        f"{'フック数':>8} {'従来':>12} {'現在':>12} {'現在(*)':>12} {'毎回記録':>12} {'記録なし':>12}"
+        f" {'未登録(従来/現在)':>22}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        number = max(args.calls // size, 100)
+        legacy = build_legacy(size)
+        current = build_current(size, wildcard=False)
+        wildcard = build_current(size, wildcard=True)
+        timed = build_current(size, wildcard=True, timing_interval=1)
+        untimed = build_current(size, wildcard=True, timing_interval=0)
+        event = "response.event0"
+
+        legacy_time = measure(lambda: legacy.execute(event, 1), number)
+        current_time = measure(lambda: current.execute(event, 1), number)
+        wildcard_time = measure(lambda: wildcard.execute(event, 1), number)
+        timed_time = measure(lambda: timed.execute(event, 1), number)
+        untimed_time = measure(lambda: untimed.execute(event, 1), number)
+        legacy_miss = measure(lambda: legacy.execute("request.none", 1), 100000)
+        current_miss = measure(lambda: current.execute("request.none", 1), 100000)
+
+        print(
+            f"{size:>8} {legacy_time * 1e6:>10.2f}μs {current_time * 1e6:>10.2f}μs"
+            f" {wildcard_time * 1e6:>10.2f}μs {timed_time * 1e6:>10.2f}μs"
+            f" {untimed_time * 1e6:>10.2f}μs"
+            f" {legacy_miss * 1e9:>9.0f}ns /{current_miss * 1e9:>6.0f}ns"
+        )
+
+    print("")
+    print(
+        f"現在の実装は例外の分離を含み、{TIMING_INTERVAL}回に1回（「毎回記録」は毎回）"
+        "各フックの実行時間を記録します。"
+    )
+    print("現在(*)・毎回記録・記録なしは半分のフックを \"response.*\" で登録しています。")
+
+
+if __name__ == "__main__":
+    main()
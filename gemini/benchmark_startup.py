@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+SuperGemini CLIの起動時間チェック
+python -X importtime -m gemini <引数> を繰り返し実行し、モジュールの読み込み時間の合計と
+実行時間（最良値）が予算内に収まっているかを確認します。
+一時的なHOMEで実行し、--help・version がファイルを作成しないことも確認します。
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 計測するコマンドライン（カンマ区切り、各コマンドの引数は空白区切り）
+DEFAULT_COMMANDS = "--help,version"
+
+# 読み込み時間の予算（ミリ秒）
+DEFAULT_BUDGET_MS = 30.0
+
+# ファイルを作成してはいけないコマンド
+SIDE_EFFECT_FREE_COMMANDS = {"--help", "version"}
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_import_time(stderr):
+    """
+    -X importtime の出力から (最上位モジュールの累積時間の合計(μs), [(累積時間, モジュール名), ...]) を返す
+    """
+    total = 0
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative = int(match.group(2))
+        name = match.group(4)
+        modules.append((cumulative, name))
+        if len(match.group(3)) == 1:
+            total += cumulative
+    return total, modules
+
+
+def run_once(command, home_dir):
+    """
+    1回実行して (読み込み時間の合計(μs), モジュール一覧, 実行時間(秒)) を返す
+    """
+    env = dict(os.environ, HOME=home_dir)
+    # 実際の利用時と同じくバイトコードのキャッシュを使う
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "gemini", *command.split()],
+        cwd=REPOSITORY_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"'{command}' の実行に失敗しました: {result.stderr.strip()}")
+    total, modules = parse_import_time(result.stderr)
+    return total, modules, elapsed
+
+
+def benchmark_command(command, repeat):
+    """
+    コマンドを repeat 回実行し、最良の結果と作成されたファイルを返す
+    """
+    best = None
+    created = []
+    with tempfile.TemporaryDirectory(prefix="supergemini-startup-") as home_dir:
+        # 1回目はバイトコードのキャッシュ作成を含むため計測に使わない
+        run_once(command, home_dir)
+        for _ in range(repeat):
+            total, modules, elapsed = run_once(command, home_dir)
+            if best is None or total < best["import_us"]:
+                best = {"import_us": total, "modules": modules}
+            best["elapsed"] = min(best.get("elapsed", elapsed), elapsed)
+        for root, dirs, files in os.walk(home_dir):
+            created.extend(
+                os.path.relpath(os.path.join(root, name), home_dir)
+                for name in dirs + files
+            )
+    best["created"] = sorted(created)
+    return best
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SuperGemini CLIの起動時間チェック")
+    parser.add_argument(
+        "--commands",
+        default=DEFAULT_COMMANDS,
+        help=f"計測するコマンドライン（カンマ区切り、デフォルト: {DEFAULT_COMMANDS}）",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"読み込み時間の予算（ミリ秒、デフォルト: {DEFAULT_BUDGET_MS:g}）",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="各コマンドの実行回数（デフォルト: 10）"
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="表示する時間のかかったモジュール数"
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    failed = False
+
+    for command in args.commands.split(","):
+        result = benchmark_command(command, args.repeat)
+        import_ms = result["import_us"] / 1000
+        within_budget = import_ms <= args.budget_ms
+        mark = "✅" if within_budget else "❌"
+        print(
+            f"{mark} gemini {command}: 読み込み {import_ms:.1f} ms"
+            f"（予算 {args.budget_ms:g} ms）, 実行時間 {result['elapsed'] * 1000:.1f} ms"
+        )
+        for cumulative, name in sorted(result["modules"], reverse=True)[: args.top]:
+            print(f"    {cumulative / 1000:6.1f} ms  {name}")
+
+        if command in SIDE_EFFECT_FREE_COMMANDS and result["created"]:
+            print(f"❌ gemini {command} がファイルを作成しました: {', '.join(result['created'])}")
+            failed = True
+        if not within_budget:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
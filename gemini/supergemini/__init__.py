@@ -7,14 +7,12 @@ __version__ = "1.0.0"
 __author__ = "SuperGemini Team"
 __license__ = "MIT"
 
+# インポート時にはファイルシステムやロガーに触れない（シェルフックから頻繁に呼ばれるため）。
+# json・logging は使う関数の中で読み込み、ディレクトリとログ出力先は初回のログ出力時に作成する。
 import os
-import sys
-import json
-import logging
-from pathlib import Path
 
 # グローバル定数
-HOME_DIR = str(Path.home())
+HOME_DIR = os.path.expanduser("~")
 GEMINI_HOME = os.path.join(HOME_DIR, ".gemini")
 SHARED_DIR = os.path.join(GEMINI_HOME, "shared")
 COMMANDS_DIR = os.path.join(GEMINI_HOME, "commands")
@@ -22,6 +20,8 @@ GEMINI_MD = os.path.join(GEMINI_HOME, "GEMINI.md")
 
 # 設定ファイルのパス
 CONFIG_PATH = os.path.join(SHARED_DIR, "settings.json")
+# 書き込み待ちの設定変更の記録（supergemini.config_store を参照）
+CONFIG_JOURNAL_PATH = CONFIG_PATH + ".journal"
 PERSONAS_CONFIG_PATH = os.path.join(
     os.path.dirname(__file__), "..", "Core", "personas.json"
 )
@@ -31,174 +31,299 @@ __all__ = [
     "__version__",
     "show_version",
     "get_config",
+    "default_config",
     "get_personas_config",
+    "invalidate_config_cache",
+    "content_hash",
+    "get_logger",
     "GEMINI_HOME",
     "SHARED_DIR",
     "COMMANDS_DIR",
     "GEMINI_MD",
     "CONFIG_PATH",
+    "CONFIG_JOURNAL_PATH",
     "PERSONAS_CONFIG_PATH",
 ]
 
-# ディレクトリの存在確認と作成
-os.makedirs(GEMINI_HOME, exist_ok=True)
-
-# ロガーの設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(os.path.join(GEMINI_HOME, "supergemini.log")),
-        logging.StreamHandler(),
-    ],
-)
+# ロガーの設定が済んでいるか
+_logging_configured = False
 
-logger = logging.getLogger("SuperGemini")
 
+def get_logger(name="SuperGemini"):
+    """
+    ロガーを取得する
 
-def get_config():
+    初回呼び出し時に GEMINI_HOME を作成し、ログファイル（JSON Lines形式）と標準エラー出力への
+    出力を設定する。書き込みはバックグラウンドのスレッドで行う（supergemini.logs を参照）。
     """
-    SuperGeminiの設定を読み込む
+    global _logging_configured
+    import logging
+
+    if not _logging_configured:
+        _logging_configured = True
+        from .logs import setup_logging
+
+        os.makedirs(GEMINI_HOME, exist_ok=True)
+        setup_logging(GEMINI_HOME)
+
+    return logging.getLogger(name)
+
+
+def __getattr__(name):
+    # 従来の supergemini.logger は参照された時点でロガーを設定して返す
+    if name == "logger":
+        return get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 読み込んだ設定ファイルのキャッシュ {パス: ((st_mtime_ns, st_size, st_ino), 内容)}
+_config_cache = {}
+
+
+def _file_signature(path):
+    """
+    キャッシュの有効性確認に使うファイルの識別情報（存在しない場合はNone）
     """
-    if os.path.exists(CONFIG_PATH):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _help_formatter(prog):
+    """
+    CLIのヘルプの整形（端末幅を自前で求め、argparse に shutil を読み込ませない）
+    """
+    import argparse
+    import sys
+
+    try:
+        width = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
         try:
-            with open(CONFIG_PATH, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"設定ファイルの読み込みエラー: {e}")
-            return {}
+            width = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            width = 80
+    return argparse.HelpFormatter(prog, width=width - 2)
+
+
+def content_hash(*sources):
+    """
+    キャッシュの有効性確認に使う内容のハッシュ（16バイト、存在しない内容はNoneで渡す）
+    """
+    try:
+        # hashlib はOpenSSLの読み込みで起動が遅くなるため、組み込みのblake2を直接使う
+        from _blake2 import blake2b
+    except ImportError:
+        from hashlib import blake2b
+
+    digest = blake2b(digest_size=16)
+    for data in sources:
+        if data is None:
+            digest.update(b"\xff")
+        else:
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+    return digest.digest()
+
+
+def _load_cached_json(path, encoding=None):
+    """
+    JSONファイルを読み込む（更新時刻・サイズ・inodeが変わっていなければキャッシュを返す）
+
+    ファイルが存在しない場合は FileNotFoundError を送出する。
+    戻り値はキャッシュと共有されるため、呼び出し側で変更しないこと。
+    """
+    signature = _file_signature(path)
+    if signature is None:
+        _config_cache.pop(path, None)
+        raise FileNotFoundError(path)
+
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    import json
+
+    with open(path, "r", encoding=encoding) as f:
+        data = json.load(f)
+    _config_cache[path] = (signature, data)
+    return data
+
+
+def invalidate_config_cache(path=None):
+    """
+    設定ファイルのキャッシュを破棄する（pathを省略した場合はすべて）
+    """
+    if path is None:
+        _config_cache.clear()
     else:
-        # デフォルト設定
-        default_config = {
-            "version": __version__,
-            "personas": [
-                "architect",
-                "developer",
-                "analyst",
-                "tester",
-                "devops",
-                "security",
-                "frontend",
-                "backend",
-                "scribe",
-            ],
-            "commands": {
-                "analyze": {
-                    "enabled": True,
-                    "description": "コード分析、問題特定、改善提案",
-                    "category": "分析系",
-                },
-                "explain": {
-                    "enabled": True,
-                    "description": "コードの動作説明、アルゴリズム解説",
-                    "category": "分析系",
-                },
-                "troubleshoot": {
-                    "enabled": True,
-                    "description": "バグ解析、エラー原因特定、解決策提示",
-                    "category": "分析系",
-                },
-                "implement": {
-                    "enabled": True,
-                    "description": "機能実装、新規開発",
-                    "category": "開発系",
-                },
-                "improve": {
-                    "enabled": True,
-                    "description": "リファクタリング、最適化",
-                    "category": "開発系",
-                },
-                "build": {
-                    "enabled": True,
-                    "description": "ビルド、コンパイル、パッケージング",
-                    "category": "開発系",
-                },
-                "design": {
-                    "enabled": True,
-                    "description": "アーキテクチャ設計、システム設計",
-                    "category": "設計系",
-                },
-                "estimate": {
-                    "enabled": True,
-                    "description": "作業工数見積もり、スケジュール算出",
-                    "category": "設計系",
-                },
-                "task": {
-                    "enabled": True,
-                    "description": "タスク分解、作業計画",
-                    "category": "管理系",
-                },
-                "workflow": {
-                    "enabled": True,
-                    "description": "ワークフロー設計、プロセス改善",
-                    "category": "管理系",
-                },
-                "document": {
-                    "enabled": True,
-                    "description": "ドキュメント生成、仕様書作成",
-                    "category": "管理系",
-                },
-                "test": {
-                    "enabled": True,
-                    "description": "テスト作成、テスト実行計画",
-                    "category": "ツール系",
-                },
-                "git": {
-                    "enabled": True,
-                    "description": "Git操作、ブランチ戦略",
-                    "category": "ツール系",
-                },
-                "cleanup": {
-                    "enabled": True,
-                    "description": "コード整理、不要ファイル削除",
-                    "category": "ツール系",
-                },
-                "load": {
-                    "enabled": True,
-                    "description": "プロジェクト構造分析、依存関係把握",
-                    "category": "ツール系",
-                },
-                "index": {
-                    "enabled": True,
-                    "description": "コードベース索引化、関連性分析",
-                    "category": "ツール系",
-                },
-                "spawn": {
-                    "enabled": True,
-                    "description": "プロジェクト初期化、テンプレート生成",
-                    "category": "ツール系",
-                },
-            },
-            "language": "ja",
-            "prefix": "/sg",
-        }
-
-        # 設定ディレクトリの作成
-        os.makedirs(SHARED_DIR, exist_ok=True)
-
-        # デフォルト設定を保存
-        try:
-            with open(CONFIG_PATH, "w") as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"設定ファイルの保存エラー: {e}")
+        _config_cache.pop(path, None)
+
+
+def get_config():
+    """
+    SuperGeminiの設定を読み込む
+
+    2回目以降はファイルが変更されていなければstat()のみでキャッシュを返す。
+    書き込み待ちの変更（config_store.update_config(write_behind=True)）があれば反映した内容を返す。
+    戻り値はキャッシュと共有されるため、変更する場合は config_store を使うこと。
+    """
+    try:
+        config = _load_cached_json(CONFIG_PATH, encoding="utf-8")
+    except FileNotFoundError:
+        config = _create_default_config()
+    except Exception as e:
+        get_logger().error(f"設定ファイルの読み込みエラー: {e}")
+        return {}
+
+    if _file_signature(CONFIG_JOURNAL_PATH) is not None:
+        from .config_store import apply_pending_changes
+
+        config = apply_pending_changes(config)
+    return config
+
+
+def default_config():
+    """
+    デフォルト設定
+    """
+    return {
+        "version": __version__,
+        "personas": [
+            "architect",
+            "developer",
+            "analyst",
+            "tester",
+            "devops",
+            "security",
+            "frontend",
+            "backend",
+            "scribe",
+        ],
+        "commands": {
+            "analyze": {
+                "enabled": True,
+                "description": "コード分析、問題特定、改善提案",
+                "category": "分析系",
+            },
+            "explain": {
+                "enabled": True,
+                "description": "コードの動作説明、アルゴリズム解説",
+                "category": "分析系",
+            },
+            "troubleshoot": {
+                "enabled": True,
+                "description": "バグ解析、エラー原因特定、解決策提示",
+                "category": "分析系",
+            },
+            "implement": {
+                "enabled": True,
+                "description": "機能実装、新規開発",
+                "category": "開発系",
+            },
+            "improve": {
+                "enabled": True,
+                "description": "リファクタリング、最適化",
+                "category": "開発系",
+            },
+            "build": {
+                "enabled": True,
+                "description": "ビルド、コンパイル、パッケージング",
+                "category": "開発系",
+            },
+            "design": {
+                "enabled": True,
+                "description": "アーキテクチャ設計、システム設計",
+                "category": "設計系",
+            },
+            "estimate": {
+                "enabled": True,
+                "description": "作業工数見積もり、スケジュール算出",
+                "category": "設計系",
+            },
+            "task": {
+                "enabled": True,
+                "description": "タスク分解、作業計画",
+                "category": "管理系",
+            },
+            "workflow": {
+                "enabled": True,
+                "description": "ワークフロー設計、プロセス改善",
+                "category": "管理系",
+            },
+            "document": {
+                "enabled": True,
+                "description": "ドキュメント生成、仕様書作成",
+                "category": "管理系",
+            },
+            "test": {
+                "enabled": True,
+                "description": "テスト作成、テスト実行計画",
+                "category": "ツール系",
+            },
+            "git": {
+                "enabled": True,
+                "description": "Git操作、ブランチ戦略",
+                "category": "ツール系",
+            },
+            "cleanup": {
+                "enabled": True,
+                "description": "コード整理、不要ファイル削除",
+                "category": "ツール系",
+            },
+            "load": {
+                "enabled": True,
+                "description": "プロジェクト構造分析、依存関係把握",
+                "category": "ツール系",
+            },
+            "index": {
+                "enabled": True,
+                "description": "コードベース索引化、関連性分析",
+                "category": "ツール系",
+            },
+            "spawn": {
+                "enabled": True,
+                "description": "プロジェクト初期化、テンプレート生成",
+                "category": "ツール系",
+            },
+        },
+        "language": "ja",
+        "prefix": "/sg",
+    }
 
-        return default_config
+
+def _create_default_config():
+    """
+    デフォルト設定を保存して返す（以降の呼び出しでは保存したファイルをキャッシュから返す）
+    """
+    from .config_store import create_config
+
+    try:
+        config = create_config(default_config())
+    except Exception as e:
+        get_logger().error(f"設定ファイルの保存エラー: {e}")
+        return default_config()
+
+    signature = _file_signature(CONFIG_PATH)
+    if signature is not None:
+        _config_cache[CONFIG_PATH] = (signature, config)
+    return config
 
 
 def get_personas_config():
     """
     ペルソナ設定を読み込む
+
+    get_config() と同じキャッシュを使う。戻り値は変更しないこと。
     """
-    if os.path.exists(PERSONAS_CONFIG_PATH):
-        try:
-            with open(PERSONAS_CONFIG_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"ペルソナ設定ファイルの読み込みエラー: {e}")
-            return {}
-    else:
-        logger.warning(f"ペルソナ設定ファイルが見つかりません: {PERSONAS_CONFIG_PATH}")
+    try:
+        return _load_cached_json(PERSONAS_CONFIG_PATH, encoding="utf-8")
+    except FileNotFoundError:
+        get_logger().warning(f"ペルソナ設定ファイルが見つかりません: {PERSONAS_CONFIG_PATH}")
+        return {}
+    except Exception as e:
+        get_logger().error(f"ペルソナ設定ファイルの読み込みエラー: {e}")
         return {}
 
 
@@ -6,28 +6,31 @@ Gemini CLIを拡張するためのコマンドラインツール
 
 import os
 import sys
-import argparse
-import logging
-import shutil
-from pathlib import Path
 
-from . import __version__, show_version, get_config
+from . import __version__, show_version, get_config, get_logger
 from . import GEMINI_HOME, SHARED_DIR, COMMANDS_DIR, GEMINI_MD
-
-# ロガーの設定
-logger = logging.getLogger("SuperGemini.CLI")
+from . import _help_formatter
 
 def create_parser():
     """
     コマンドラインパーサーの作成
     """
+    import argparse
+    from functools import partial
+
     parser = argparse.ArgumentParser(
         description="SuperGemini - Gemini CLI拡張フレームワーク",
-        epilog="SuperGemini v" + __version__
+        epilog="SuperGemini v" + __version__,
+        formatter_class=_help_formatter
     )
 
     # サブコマンドの設定
-    subparsers = parser.add_subparsers(dest="command", help="コマンド")
+    # サブコマンドのパーサーも同じ整形を使う
+    subparsers = parser.add_subparsers(
+        dest="command",
+        help="コマンド",
+        parser_class=partial(argparse.ArgumentParser, formatter_class=_help_formatter),
+    )
 
     # バージョン表示コマンド
     version_parser = subparsers.add_parser("version", help="バージョン情報を表示")
@@ -71,7 +74,7 @@ def setup_environment():
                 f.write("SuperGemini は Gemini CLI のための拡張フレームワークです。\n")
                 f.write("詳細な使い方については、`SuperGemini commands` を実行して確認してください。\n")
         except Exception as e:
-            logger.error(f"GEMINI.md ファイルの作成エラー: {e}")
+            get_logger("SuperGemini.CLI").error(f"GEMINI.md ファイルの作成エラー: {e}")
 
 def install_framework(profile="standard", interactive=False, force=False):
     """
@@ -0,0 +1,104 @@
+"""
+SuperGemini シェル補完用のインデックス
+
+コマンド名とペルソナ名をタブ区切りのテキストファイルとして settings.json の隣に書き出します。
+シェルの補完スクリプト（zsh/functions/supergemini.zsh）はこのファイルを直接読むため、
+補完のたびに Python を起動する必要がありません。
+
+内容は元ファイルのハッシュが変わった場合だけ書き直し、変わっていない場合は更新時刻だけを
+更新します（補完スクリプトは元ファイルがインデックスより新しい場合に作り直しを依頼するため）。
+
+インデックスの形式（1行1項目、フィールドはタブ区切り）:
+    version <形式のバージョン> <元ファイルのハッシュ>
+    source  <元ファイルのパス>          （補完スクリプトが更新を確認するファイル）
+    python  <Pythonのパス> <gemini パッケージのあるディレクトリ>
+    prefix  <コマンドのプレフィックス>
+    command <コマンド名> <説明>
+    persona <ペルソナ名> <"絵文字 タイトル" または空>
+"""
+
+import os
+import sys
+
+from . import CONFIG_JOURNAL_PATH, CONFIG_PATH, PERSONAS_CONFIG_PATH, SHARED_DIR
+from .registry import load_registry, read_sources
+
+# インデックスのパス
+COMPLETIONS_PATH = os.path.join(SHARED_DIR, "completions.index")
+
+# インデックスの形式のバージョン（形式を変えたら上げる）
+COMPLETIONS_VERSION = 1
+
+# gemini パッケージのあるディレクトリ（補完スクリプトが作り直すときの PYTHONPATH）
+PACKAGE_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def _field(text):
+    """
+    タブ・改行を空白に置き換える（1行のフィールドに収める）
+    """
+    return " ".join(str(text).split())
+
+
+def build_index(registry, source_hash):
+    """
+    レジストリからインデックスの内容（文字列）を作成する（source_hash は16進数の文字列）
+    """
+    rows = [("version", COMPLETIONS_VERSION, source_hash)]
+    for path in (CONFIG_PATH, CONFIG_JOURNAL_PATH, PERSONAS_CONFIG_PATH):
+        rows.append(("source", os.path.abspath(path)))
+    rows.append(("python", sys.executable, PACKAGE_ROOT))
+    rows.append(("prefix", registry["prefix"]))
+    for _category, commands in registry["categories"]:
+        for cmd_name, description in commands:
+            rows.append(("command", cmd_name, description))
+    for persona, label in registry["personas"]:
+        rows.append(("persona", persona, label or ""))
+    return "".join("\t".join(_field(value) for value in row) + "\n" for row in rows)
+
+
+def _read_version_line(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.readline().rstrip("\n").split("\t")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def update_index(path=COMPLETIONS_PATH, force=False):
+    """
+    元ファイルが変わっていればインデックスを書き直す（書き直した場合はTrue）
+
+    変わっていない場合は更新時刻だけを更新する。
+    """
+    source_hash = read_sources()[0].hex()
+    if not force and _read_version_line(path) == [
+        "version",
+        str(COMPLETIONS_VERSION),
+        source_hash,
+    ]:
+        os.utime(path)
+        return False
+
+    content = build_index(load_registry(), source_hash)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+__all__ = [
+    "COMPLETIONS_PATH",
+    "build_index",
+    "update_index",
+]
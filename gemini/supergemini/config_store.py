@@ -0,0 +1,327 @@
+"""
+SuperGemini 設定ファイルの書き込み
+
+settings.json は一時ファイルに書き込んで fsync してから置き換えるため、途中で止まっても
+読みかけの壊れたファイルが残りません。書き込みは settings.json.lock への flock で
+排他制御するため、複数のシェルから同時に変更しても他の変更を上書きしません。
+
+write_behind=True で変更した場合は settings.json を書き換えず、変更内容だけを
+settings.json.journal に1行ずつ追記します。get_config() はこの記録を反映した内容を返し、
+記録が JOURNAL_COMPACT_ENTRIES 件に達したとき（または flush_config() を呼んだとき）に
+まとめて1回で settings.json に書き込みます。
+
+変更は "commands.test.enabled" のように "." 区切りのキーで指定します。
+schema（デフォルト設定）を渡した場合は、値の型がデフォルト設定の同じキーの値と
+異なる変更を書き込む前に拒否します。
+"""
+
+import copy
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+from . import (
+    CONFIG_JOURNAL_PATH,
+    CONFIG_PATH,
+    SHARED_DIR,
+    _file_signature,
+    get_logger,
+    invalidate_config_cache,
+)
+
+# 排他制御に使うファイル（settings.json は置き換えるため別のファイルをロックする）
+CONFIG_LOCK_PATH = CONFIG_PATH + ".lock"
+
+# 書き込み待ちの変更がこの件数に達したら settings.json にまとめて書き込む
+JOURNAL_COMPACT_ENTRIES = 32
+
+# 書き込み待ちの変更を反映した設定のキャッシュ
+# ((settings.json の識別情報, journal の識別情報), 反映した設定)
+_merged_cache = None
+
+
+@contextmanager
+def config_lock():
+    """
+    設定ファイルの書き込みロックを取得する（他のプロセスが解放するまで待つ）
+    """
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    with open(CONFIG_LOCK_PATH, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _fsync_directory(path):
+    fd = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data):
+    """
+    JSONファイルを置き換える（一時ファイルに書き込み、fsync してから rename する）
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(path)
+    invalidate_config_cache(path)
+
+
+def _read_config_file():
+    """
+    キャッシュを使わずに settings.json を読む（存在しない場合は空の辞書）
+    """
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _split_key(key):
+    return key.split(".") if isinstance(key, str) else list(key)
+
+
+# 型の表示名（エラーメッセージ用）
+_TYPE_NAMES = {
+    bool: "真偽値（true/false）",
+    int: "数値",
+    float: "数値",
+    str: "文字列",
+    list: "リスト",
+    dict: "オブジェクト",
+}
+
+
+def _schema_child(schema, name):
+    """
+    schema の name に対応するデフォルト値（不明な場合はNone）
+
+    "commands" のように値がすべてオブジェクトの場合は、新しいキーも同じ形式とみなす。
+    """
+    if not isinstance(schema, dict):
+        return None
+    if name in schema:
+        return schema[name]
+    values = list(schema.values())
+    if values and all(isinstance(value, dict) for value in values):
+        return values[0]
+    return None
+
+
+def _matches(value, expected):
+    if isinstance(expected, bool) or isinstance(value, bool):
+        return isinstance(value, bool) and isinstance(expected, bool)
+    if isinstance(expected, (int, float)):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(expected))
+
+
+def _check_value(key, value, expected):
+    if expected is None:
+        return
+    if not _matches(value, expected):
+        raise ValueError(
+            f"{key} には{_TYPE_NAMES.get(type(expected), type(expected).__name__)}を"
+            f"指定してください（指定された値: {json.dumps(value, ensure_ascii=False)}）"
+        )
+    if isinstance(expected, dict):
+        for name, child in value.items():
+            _check_value(f"{key}.{name}", child, _schema_child(expected, name))
+    elif isinstance(expected, list) and expected:
+        for index, item in enumerate(value):
+            _check_value(f"{key}[{index}]", item, expected[0])
+
+
+def validate_changes(changes, schema):
+    """
+    変更の値の型がデフォルト設定（schema）の同じキーの値と一致することを確認する
+
+    一致しない変更があれば ValueError を送出する。デフォルト設定にないキーは確認しない。
+    """
+    items = changes.items() if isinstance(changes, dict) else changes
+    for key, value in items:
+        expected = schema
+        for name in _split_key(key):
+            expected = _schema_child(expected, name)
+        key = key if isinstance(key, str) else ".".join(key)
+        _check_value(key, value, expected)
+
+
+def apply_changes(config, changes):
+    """
+    設定に変更を反映する（changes は {"." 区切りのキー: 値} または [(キー, 値), ...]）
+    """
+    items = changes.items() if isinstance(changes, dict) else changes
+    for key, value in items:
+        *parents, name = _split_key(key)
+        target = config
+        for parent in parents:
+            child = target.get(parent)
+            if not isinstance(child, dict):
+                child = target[parent] = {}
+            target = child
+        target[name] = value
+    return config
+
+
+def _parse_journal(data):
+    """
+    書き込み待ちの変更の記録を [(キー, 値), ...] にする（書きかけの行は無視する）
+    """
+    changes = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            changes.append((entry["key"], entry["value"]))
+        except (ValueError, KeyError, TypeError):
+            get_logger().warning(f"設定の変更記録の不正な行を無視しました: {line[:80]!r}")
+    return changes
+
+
+def apply_journal(config, data):
+    """
+    書き込み待ちの変更の記録（バイト列または文字列）を反映した設定のコピーを返す
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    return apply_changes(copy.deepcopy(config), _parse_journal(data))
+
+
+def _read_journal():
+    try:
+        with open(CONFIG_JOURNAL_PATH, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def apply_pending_changes(config):
+    """
+    get_config() から呼ばれ、書き込み待ちの変更を反映した設定を返す（ファイルが変わるまでキャッシュする）
+    """
+    global _merged_cache
+
+    key = (_file_signature(CONFIG_PATH), _file_signature(CONFIG_JOURNAL_PATH))
+    if _merged_cache is not None and _merged_cache[0] == key:
+        return _merged_cache[1]
+
+    merged = apply_journal(config, _read_journal())
+    _merged_cache = (key, merged)
+    return merged
+
+
+def _compact():
+    """
+    書き込み待ちの変更を settings.json に書き込んで記録を消す（ロックを取得した状態で呼ぶ）
+    """
+    journal = _read_journal()
+    if not journal:
+        return False
+    config = apply_journal(_read_config_file(), journal)
+    atomic_write_json(CONFIG_PATH, config)
+    os.remove(CONFIG_JOURNAL_PATH)
+    return True
+
+
+def create_config(default):
+    """
+    settings.json がなければ default で作成し、設定を返す
+
+    ロックを取得してから存在を確認するため、同時に起動しても作成は1回だけになる。
+    """
+    with config_lock():
+        if os.path.exists(CONFIG_PATH):
+            return _read_config_file()
+        atomic_write_json(CONFIG_PATH, default)
+        return default
+
+
+def update_config(changes, write_behind=False, schema=None):
+    """
+    設定を変更する
+
+    write_behind=False の場合は書き込み待ちの変更と合わせて settings.json に1回で書き込む。
+    write_behind=True の場合は変更を記録に追記するだけにし、記録が
+    JOURNAL_COMPACT_ENTRIES 件に達したときにまとめて書き込む。
+    schema を渡した場合は、書き込む前に validate_changes() で値の型を確認する。
+    """
+    items = list(changes.items() if isinstance(changes, dict) else changes)
+    if schema is not None:
+        validate_changes(items, schema)
+    with config_lock():
+        if not write_behind:
+            config = apply_journal(_read_config_file(), _read_journal())
+            atomic_write_json(CONFIG_PATH, apply_changes(config, items))
+            try:
+                os.remove(CONFIG_JOURNAL_PATH)
+            except FileNotFoundError:
+                pass
+            return
+
+        lines = "".join(
+            json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+            for key, value in items
+        )
+        with open(CONFIG_JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if _read_journal().count("\n") >= JOURNAL_COMPACT_ENTRIES:
+            _compact()
+
+
+def flush_config():
+    """
+    書き込み待ちの変更を settings.json に書き込む（書き込んだ場合はTrue）
+    """
+    with config_lock():
+        return _compact()
+
+
+def reset_config(default):
+    """
+    settings.json を default で置き換え、書き込み待ちの変更を破棄する
+    """
+    with config_lock():
+        atomic_write_json(CONFIG_PATH, default)
+        try:
+            os.remove(CONFIG_JOURNAL_PATH)
+        except FileNotFoundError:
+            pass
+
+
+__all__ = [
+    "CONFIG_LOCK_PATH",
+    "JOURNAL_COMPACT_ENTRIES",
+    "config_lock",
+    "atomic_write_json",
+    "validate_changes",
+    "apply_changes",
+    "apply_journal",
+    "apply_pending_changes",
+    "create_config",
+    "update_config",
+    "flush_config",
+    "reset_config",
+]
@@ -0,0 +1,265 @@
+"""
+SuperGemini デーモン
+
+設定・レジストリ・検索インデックスをメモリに保持したまま常駐し、
+Unixドメインソケットで CLI からの要求に応えます。CLI は起動中のデーモンがあれば
+引数を送って結果を表示するだけになり、なければ従来どおり自分で処理します。
+
+元ファイル（settings.json、書き込み待ちの変更の記録、personas.json）は
+WATCH_INTERVAL 秒ごとと要求を受けるたびに更新時刻・サイズ・inodeを確認し、
+変わっていればメモリ上のデータを破棄して読み込み直します。
+
+通信の形式:
+    要求: 引数を "\\0" で連結したUTF-8のバイト列（送信後に書き込み側を閉じる）
+    応答: "終了コード\\n標準出力のバイト数\\n" の後に標準出力と標準エラー出力を続けたUTF-8のバイト列
+"""
+
+import os
+
+from . import (
+    CONFIG_JOURNAL_PATH,
+    CONFIG_PATH,
+    GEMINI_HOME,
+    PERSONAS_CONFIG_PATH,
+    _file_signature,
+    get_logger,
+)
+
+# ソケットのパス
+SOCKET_PATH = os.path.join(GEMINI_HOME, "supergemini.sock")
+
+# 元ファイルの変更を確認する間隔（秒）
+WATCH_INTERVAL = 1.0
+
+# 変更を監視するファイル
+WATCHED_PATHS = (CONFIG_PATH, CONFIG_JOURNAL_PATH, PERSONAS_CONFIG_PATH)
+
+# 応答を待つ時間（秒、超えた場合はデーモンがないものとして扱う）
+REQUEST_TIMEOUT = 5.0
+
+# バックグラウンドで起動したデーモンが応答するまで待つ時間（秒）
+START_TIMEOUT = 5.0
+
+# デーモン自身への要求（handler には渡さない）
+STATUS_REQUEST = ["daemon", "status"]
+STOP_REQUEST = ["daemon", "stop"]
+
+
+def _decode_response(data):
+    try:
+        status, length, body = data.split(b"\n", 2)
+        status, length = int(status), int(length)
+    except ValueError:
+        return None
+    return (
+        status,
+        body[:length].decode("utf-8", errors="replace"),
+        body[length:].decode("utf-8", errors="replace"),
+    )
+
+
+def _encode_response(status, out, err):
+    out = out.encode("utf-8")
+    return f"{status}\n{len(out)}\n".encode("utf-8") + out + err.encode("utf-8")
+
+
+def request(argv, socket_path=SOCKET_PATH, timeout=REQUEST_TIMEOUT):
+    """
+    デーモンに要求を送り、(終了コード, 標準出力, 標準エラー出力) を返す
+
+    デーモンが起動していない（接続できない・応答がない）場合はNone。
+    """
+    if not os.path.exists(socket_path):
+        return None
+
+    # socket モジュールは読み込みに数msかかるため、組み込みの _socket を直接使う
+    import _socket
+
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall("\0".join(argv).encode("utf-8"))
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    return _decode_response(b"".join(chunks))
+
+
+def is_running(socket_path=SOCKET_PATH):
+    """
+    デーモンが起動していればその状態（文字列）、起動していなければNone
+    """
+    response = request(STATUS_REQUEST, socket_path)
+    return None if response is None else response[1]
+
+
+def stop(socket_path=SOCKET_PATH):
+    """
+    デーモンを停止する（起動していなかった場合はFalse）
+    """
+    return request(STOP_REQUEST, socket_path) is not None
+
+
+def start_background(command, socket_path=SOCKET_PATH, timeout=START_TIMEOUT):
+    """
+    command（デーモンをフォアグラウンドで起動するコマンドライン）を端末から切り離して起動し、
+    応答するまで待つ（起動したプロセスのPID、応答しないまま終了・時間切れになった場合はNone）
+    """
+    import subprocess
+    import time
+
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_running(socket_path) is not None:
+            return process.pid
+        if process.poll() is not None:
+            return None
+        time.sleep(0.05)
+    return None
+
+
+class _Watcher:
+    """監視するファイルの識別情報を記録し、変わったかどうかを返す"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.signatures = self._stat()
+
+    def _stat(self):
+        return tuple(_file_signature(path) for path in self.paths)
+
+    def changed(self):
+        signatures = self._stat()
+        if signatures == self.signatures:
+            return False
+        self.signatures = signatures
+        return True
+
+
+def _preload():
+    """
+    レジストリと検索インデックスを読み込んでメモリに保持する
+
+    シェル補完用のインデックスがある場合は、それも合わせて更新する。
+    """
+    from .completions import COMPLETIONS_PATH, update_index
+    from .registry import load_registry
+    from .search import load_index
+
+    try:
+        load_registry()
+        load_index()
+        if os.path.exists(COMPLETIONS_PATH):
+            update_index()
+    except Exception as e:
+        get_logger().warning(f"デーモンのデータの読み込みに失敗しました: {e}")
+
+
+def serve(handler, socket_path=SOCKET_PATH, watch_interval=WATCH_INTERVAL):
+    """
+    デーモンとして要求を待ち受ける（停止の要求を受けるか SIGTERM を受けるまで戻らない）
+
+    handler(argv) は (終了コード, 標準出力, 標準エラー出力) を返す。
+    要求は1件ずつ順に処理するため、handler は標準出力を差し替えて実行してよい。
+    既に別のデーモンが起動している場合は何もせずFalseを返す。
+    """
+    import signal
+    import socketserver
+    import sys
+    import time
+
+    from .registry import keep_resident, release_resident
+
+    if is_running(socket_path) is not None:
+        return False
+    try:
+        # 前回のデーモンが異常終了して残ったソケット
+        os.remove(socket_path)
+    except FileNotFoundError:
+        pass
+
+    keep_resident()
+    watcher = _Watcher(WATCHED_PATHS)
+    _preload()
+
+    def refresh():
+        if watcher.changed():
+            release_resident()
+            _preload()
+
+    state = {"stopping": False, "requests": 0, "started": time.time()}
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            argv = self.rfile.read().decode("utf-8", errors="replace").split("\0")
+            refresh()
+            state["requests"] += 1
+            if argv == STATUS_REQUEST:
+                response = (
+                    0,
+                    f"PID: {os.getpid()}\n"
+                    f"ソケット: {socket_path}\n"
+                    f"起動からの経過: {time.time() - state['started']:.0f}秒\n"
+                    f"処理した要求: {state['requests']}\n",
+                    "",
+                )
+            elif argv == STOP_REQUEST:
+                state["stopping"] = True
+                response = (0, "", "")
+            else:
+                try:
+                    response = handler(argv)
+                except Exception as e:
+                    get_logger().exception(f"デーモンの要求の処理エラー: {argv}")
+                    response = (1, "", f"❌ エラー: {e}\n")
+            self.wfile.write(_encode_response(*response))
+
+    # ソケットは所有者だけが接続できるようにする
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, RequestHandler)
+    finally:
+        os.umask(old_umask)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server.timeout = watch_interval
+    get_logger().info(f"デーモンを起動しました (PID {os.getpid()}, {socket_path})")
+    try:
+        while not state["stopping"]:
+            server.handle_request()
+            refresh()
+    finally:
+        server.server_close()
+        try:
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+        get_logger().info("デーモンを停止しました")
+    return True
+
+
+__all__ = [
+    "SOCKET_PATH",
+    "WATCH_INTERVAL",
+    "request",
+    "is_running",
+    "stop",
+    "start_background",
+    "serve",
+]
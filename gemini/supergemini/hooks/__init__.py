@@ -7,6 +7,10 @@ SuperGemini Hooks Module
 - プラグイン拡張のためのフックポイント定義
 - イベント駆動型の処理実行
 - カスタム処理の挿入ポイント
+- 優先度による実行順序の制御
+- async def のフックの実行と、データを変換しないフックの並列実行
+- フックごとのタイムアウトと実行時間の記録（同期実行は TIMING_INTERVAL 回に1回記録）
+- "response.*" のようなパターンによるイベントの購読
 
 主な用途:
 - プロンプト処理の前後での追加処理
@@ -15,63 +19,412 @@ SuperGemini Hooks Module
 - ログ記録やモニタリング
 
 使用例:
-    from supergemini.hooks import register_hook, execute_hooks
+    from supergemini.hooks import (
+        register_hook, execute_hooks, get_hook_timings, record_hook_timings
+    )
 
-    # フックの登録
-    @register_hook('before_response')
+    # フックの登録（priority が小さいほど先に実行）
+    @register_hook('before_response', priority=10)
     def custom_filter(data):
         # カスタム処理
         return modified_data
 
+    # "." 区切りの名前空間のパターンでまとめて購読できる（"*" は1階層、"**" は1階層以上）
+    @register_hook('response.*')
+    def log_response(data):
+        return data
+
+    # データを変換しないフックは parallel=True で並列に実行できる
+    @register_hook('before_response', transform=False, timeout=0.5)
+    async def notify(data):
+        await send_notification(data)
+
     # フックの実行
-    result = execute_hooks('before_response', input_data)
+    result = execute_hooks('before_response', input_data, parallel=True)
+
+    # どのフックに時間がかかっているかを確認（毎回記録する場合は record_hook_timings(1)）
+    for timing in get_hook_timings('before_response'):
+        print(timing['hook'], timing['total'], timing['max'])
+
+イベントごとの実行順序はパターンの照合も含めて初回の実行時に実行表へまとめ、
+register が呼ばれるまで使い回します。
+
+フックで例外が発生した場合やタイムアウトした場合はログに記録し、データを変更せずに
+次のフックへ進みます。同期関数のフックは途中で止められないため、タイムアウトした場合も
+スレッド上で最後まで実行されます（結果は使われません）。
 """
 
 __version__ = "1.0.0"
 
+import time
+
+# フックの実行結果の状態
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+
+# 同期実行の実行時間を記録する間隔（N回に1回、各イベントの初回は必ず記録する）
+# フックごとに時刻を取得すると実行が数倍遅くなるため、毎回は記録しない
+TIMING_INTERVAL = 16
+
+
+class Hook:
+    """登録されたフック"""
+
+    __slots__ = ("callback", "name", "priority", "transform", "timeout", "is_async", "order")
+
+    def __init__(self, callback, priority=0, transform=True, timeout=None, order=0):
+        import inspect
+
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", None) or repr(callback)
+        module = getattr(callback, "__module__", None)
+        if module:
+            self.name = f"{module}.{self.name}"
+        code = getattr(callback, "__code__", None)
+        if code is not None and "<lambda>" in self.name:
+            # 無名関数同士の実行時間が混ざらないように定義位置を付ける
+            self.name = f"{self.name}:{code.co_firstlineno}"
+        self.priority = priority
+        self.transform = transform
+        self.timeout = timeout
+        self.is_async = inspect.iscoroutinefunction(callback)
+        self.order = order
+
+    def __call__(self, data):
+        return self.callback(data) if data is not None else self.callback()
+
+
+class HookTiming:
+    """フックごとの実行時間の集計"""
+
+    __slots__ = ("calls", "total", "max", "errors", "timeouts")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.timeouts = 0
+
+    def record(self, elapsed, status):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        if status == STATUS_ERROR:
+            self.errors += 1
+        elif status == STATUS_TIMEOUT:
+            self.timeouts += 1
+
+
+class _Dispatch:
+    """イベントごとにコンパイルした実行表"""
+
+    __slots__ = (
+        "entries",
+        "table",
+        "calls",
+        "needs_event_loop",
+        "parallel_observers",
+        "executions",
+    )
+
+    def __init__(self, entries):
+        # ((Hook, HookTiming), ...)（実行順）
+        self.entries = entries
+        # 同期実行用に展開した ((callback, transform, HookTiming, Hook), ...)
+        self.table = tuple(
+            (hook.callback, hook.transform, timing, hook) for hook, timing in entries
+        )
+        # 実行時間を記録しない場合の ((callback, transform, Hook), ...)
+        self.calls = tuple((hook.callback, hook.transform, hook) for hook, _ in entries)
+        self.needs_event_loop = any(
+            hook.is_async or hook.timeout is not None for hook, _ in entries
+        )
+        self.parallel_observers = any(not hook.transform for hook, _ in entries)
+        # 同期実行の回数（実行時間を記録するかどうかの判定に使う）
+        self.executions = 0
+
+
+def _compile_pattern(pattern):
+    """イベント名のパターンを照合関数にする
+
+    イベント名は "." 区切りの名前空間で、"*" は1階層（"response.*" は "response.before" に一致）、
+    "**" は1階層以上（"response.**" は "response.before.filter" にも一致）に一致する。
+    """
+    if "*" not in pattern:
+        return pattern.__eq__
+
+    import re
+
+    parts = []
+    for segment in pattern.split("."):
+        if segment == "**":
+            parts.append(r".+")
+        else:
+            parts.append(re.escape(segment).replace(r"\*", r"[^.]*"))
+    return re.compile(r"\.".join(parts)).fullmatch
+
 
 class HookRegistry:
     """フック登録とトリガー管理クラス"""
 
-    def __init__(self):
+    def __init__(self, max_workers=None, timing_interval=TIMING_INTERVAL):
+        # {イベント名またはパターン: [Hook, ...]}（登録順）
         self.hooks = {}
+        # {イベント名: {フック名: HookTiming}}
+        self.timings = {}
+        # 同期実行の実行時間を記録する間隔（1は毎回、0は記録しない）
+        self.timing_interval = timing_interval
+        self.max_workers = max_workers
+        self._executor = None
+        self._order = 0
+        # {パターン: 照合関数}
+        self._patterns = {}
+        # {イベント名: _Dispatch}（register のたびに作り直す）
+        self._dispatch = {}
 
-    def register(self, event_name, callback):
-        """フックを登録"""
-        if event_name not in self.hooks:
-            self.hooks[event_name] = []
-        self.hooks[event_name].append(callback)
-
-    def execute(self, event_name, data=None):
-        """指定されたイベントのフックを実行"""
-        if event_name in self.hooks:
-            for callback in self.hooks[event_name]:
-                data = callback(data) if data is not None else callback()
+    def register(self, event_name, callback, priority=0, transform=True, timeout=None):
+        """フックを登録
+
+        event_name には "response.*" のようなパターンも指定できる。
+        priority が小さいフックほど先に実行する（同じ優先度は登録順）。
+        transform=False のフックは戻り値を使わず、並列実行の対象になる。
+        timeout は秒数で、超えた場合はそのフックの結果を使わずに次へ進む。
+        """
+        if event_name not in self._patterns:
+            self._patterns[event_name] = _compile_pattern(event_name)
+        hook = Hook(callback, priority, transform, timeout, self._order)
+        self._order += 1
+        self.hooks.setdefault(event_name, []).append(hook)
+        self._dispatch.clear()
+        return hook
+
+    def _compile(self, event_name):
+        """イベントに一致するフックを実行順に並べた実行表を作成"""
+        hooks = [
+            hook
+            for pattern, matches in self._patterns.items()
+            if matches(event_name)
+            for hook in self.hooks[pattern]
+        ]
+        hooks.sort(key=lambda h: (h.priority, h.order))
+
+        timings = self.timings.setdefault(event_name, {})
+        entries = []
+        for hook in hooks:
+            timing = timings.get(hook.name)
+            if timing is None:
+                timing = timings[hook.name] = HookTiming()
+            entries.append((hook, timing))
+
+        dispatch = self._dispatch[event_name] = _Dispatch(tuple(entries))
+        return dispatch
+
+    def _report_failure(self, event_name, hook, status, error=None):
+        from .. import get_logger
+
+        if status == STATUS_TIMEOUT:
+            get_logger("SuperGemini.Hooks").warning(
+                f"フックがタイムアウトしました ({event_name}: {hook.name}, {hook.timeout}秒)"
+            )
+        else:
+            get_logger("SuperGemini.Hooks").error(
+                f"フックの実行エラー ({event_name}: {hook.name}): {error}"
+            )
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="supergemini-hook"
+            )
+        return self._executor
+
+    async def _run_async(self, event_name, hook, timing, data, in_thread=False):
+        """フックをイベントループ上で実行し、(成功したか, 戻り値) を返す"""
+        import asyncio
+
+        started = time.perf_counter()
+        status = STATUS_OK
+        result = None
+        try:
+            if hook.is_async:
+                result = await asyncio.wait_for(hook(data), hook.timeout)
+            elif in_thread or hook.timeout is not None:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._get_executor(), hook, data)
+                result = await asyncio.wait_for(future, hook.timeout)
+            else:
+                result = hook(data)
+        except asyncio.TimeoutError:
+            status = STATUS_TIMEOUT
+            self._report_failure(event_name, hook, status)
+        except Exception as e:
+            status = STATUS_ERROR
+            self._report_failure(event_name, hook, status, e)
+        timing.record(time.perf_counter() - started, status)
+        return status == STATUS_OK, result
+
+    async def execute_async(self, event_name, data=None, parallel=False):
+        """指定されたイベントのフックを実行（イベントループ内から呼ぶ場合）
+
+        parallel=True の場合、transform=False のフックは変換用のフックがすべて
+        終わった後のデータを受け取り、まとめて並列に実行する。
+        """
+        import asyncio
+
+        dispatch = self._dispatch.get(event_name) or self._compile(event_name)
+        observers = []
+        for hook, timing in dispatch.entries:
+            if parallel and not hook.transform:
+                observers.append((hook, timing))
+                continue
+            ok, result = await self._run_async(event_name, hook, timing, data)
+            if ok and hook.transform:
+                data = result
+
+        if observers:
+            await asyncio.gather(
+                *(
+                    self._run_async(event_name, hook, timing, data, in_thread=True)
+                    for hook, timing in observers
+                )
+            )
+        return data
+
+    def execute(self, event_name, data=None, parallel=False):
+        """指定されたイベントのフックを実行
+
+        async def のフックやタイムアウトの指定があるフック、並列実行するフックがある場合は
+        イベントループを起動して実行する。イベントループ内からは execute_async を使う。
+        """
+        dispatch = self._dispatch.get(event_name) or self._compile(event_name)
+        table = dispatch.table
+        if not table:
+            return data
+        if dispatch.needs_event_loop or (parallel and dispatch.parallel_observers):
+            import asyncio
+
+            return asyncio.run(self.execute_async(event_name, data, parallel))
+
+        executions = dispatch.executions
+        dispatch.executions = executions + 1
+        interval = self.timing_interval
+        if not interval or executions % interval:
+            # 例外が発生したら同じイテレータで次のフックから再開する
+            # （フックごとに try を設定しない）
+            calls = iter(dispatch.calls)
+            while True:
+                try:
+                    for callback, transform, hook in calls:
+                        result = callback(data) if data is not None else callback()
+                        if transform:
+                            data = result
+                    return data
+                except Exception as e:
+                    self._report_failure(event_name, hook, STATUS_ERROR, e)
+
+        # 直前のフックの終了時刻を次のフックの開始時刻として使い、時刻の取得を1回に抑える
+        perf_counter = time.perf_counter
+        started = perf_counter()
+        for callback, transform, timing, hook in table:
+            try:
+                result = callback(data) if data is not None else callback()
+            except Exception as e:
+                finished = perf_counter()
+                timing.record(finished - started, STATUS_ERROR)
+                self._report_failure(event_name, hook, STATUS_ERROR, e)
+                started = perf_counter()
+                continue
+            finished = perf_counter()
+            elapsed = finished - started
+            started = finished
+            timing.calls += 1
+            timing.total += elapsed
+            if elapsed > timing.max:
+                timing.max = elapsed
+            if transform:
+                data = result
         return data
 
+    def get_timings(self, event_name=None):
+        """フックごとの実行時間を合計時間の長い順に返す（記録がないフックは含めない）"""
+        timings = []
+        for event, hooks in self.timings.items():
+            if event_name is not None and event != event_name:
+                continue
+            for name, timing in hooks.items():
+                if not timing.calls:
+                    continue
+                timings.append(
+                    {
+                        "event": event,
+                        "hook": name,
+                        "calls": timing.calls,
+                        "total": timing.total,
+                        "mean": timing.total / timing.calls,
+                        "max": timing.max,
+                        "errors": timing.errors,
+                        "timeouts": timing.timeouts,
+                    }
+                )
+        timings.sort(key=lambda t: t["total"], reverse=True)
+        return timings
+
+    def reset_timings(self):
+        """実行時間の記録を消去"""
+        self.timings.clear()
+        self._dispatch.clear()
+
 
 # グローバルフックレジストリ
 _hook_registry = HookRegistry()
 
 
-def register_hook(event_name):
+def register_hook(event_name, priority=0, transform=True, timeout=None):
     """デコレータ形式でフックを登録"""
 
     def decorator(func):
-        _hook_registry.register(event_name, func)
+        _hook_registry.register(event_name, func, priority, transform, timeout)
         return func
 
     return decorator
 
 
-def execute_hooks(event_name, data=None):
+def execute_hooks(event_name, data=None, parallel=False):
     """フックを実行"""
-    return _hook_registry.execute(event_name, data)
+    return _hook_registry.execute(event_name, data, parallel)
+
+
+async def execute_hooks_async(event_name, data=None, parallel=False):
+    """フックを実行（イベントループ内から呼ぶ場合）"""
+    return await _hook_registry.execute_async(event_name, data, parallel)
 
 
 def list_hooks():
     """登録されているフックの一覧を取得"""
-    return dict(_hook_registry.hooks)
+    return {
+        event_name: [hook.callback for hook in hooks]
+        for event_name, hooks in _hook_registry.hooks.items()
+    }
+
+
+def record_hook_timings(interval=1):
+    """同期実行の実行時間を記録する間隔を設定する（1は毎回、0は記録しない）"""
+    _hook_registry.timing_interval = interval
+
+
+def get_hook_timings(event_name=None):
+    """フックごとの実行時間を取得"""
+    return _hook_registry.get_timings(event_name)
+
+
+def reset_hook_timings():
+    """フックの実行時間の記録を消去"""
+    _hook_registry.reset_timings()
 
 
 # Export main components
@@ -79,5 +432,9 @@ __all__ = [
     "HookRegistry",
     "register_hook",
     "execute_hooks",
+    "execute_hooks_async",
     "list_hooks",
+    "record_hook_timings",
+    "get_hook_timings",
+    "reset_hook_timings",
 ]
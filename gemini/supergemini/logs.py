@@ -0,0 +1,151 @@
+"""
+SuperGemini ログ出力
+
+ログの記録はキューに積むだけにし、ファイルと標準エラー出力への書き込みは
+バックグラウンドのスレッドで行います。ファイルにはJSON Lines形式で書き込み、
+一定のサイズ（SUPERGEMINI_LOG_ROTATE_WHEN を指定した場合は一定の時間）ごとに
+ローテーションして、古いファイルはgzipで圧縮します。
+
+環境変数:
+    SUPERGEMINI_LOG_MAX_BYTES     ローテーションするサイズ（デフォルト: 1 MiB）
+    SUPERGEMINI_LOG_BACKUP_COUNT  残す圧縮済みファイルの数（デフォルト: 5）
+    SUPERGEMINI_LOG_ROTATE_WHEN   時間でローテーションする場合の単位（"midnight", "H" など）
+"""
+
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from datetime import datetime
+
+# ログファイル名
+LOG_FILE_NAME = "supergemini.log"
+
+# サイズでローテーションする場合の上限
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+# 残す圧縮済みファイルの数
+DEFAULT_BACKUP_COUNT = 5
+
+# 標準エラー出力の書式
+CONSOLE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """1件のログを1行のJSONにする"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """メッセージと例外を文字列にしてからキューに積む
+
+    標準の QueueHandler は例外の内容をメッセージに連結するため、
+    JSONで別の項目として残せるように分けておく。
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _compressed_name(name):
+    return f"{name}.gz"
+
+
+def _compress_rotated(source, dest):
+    """ローテーションしたファイルを圧縮して置き換える"""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def create_file_handler(log_dir):
+    """JSON Lines形式でローテーションと圧縮を行うファイルハンドラを作成"""
+    path = os.path.join(log_dir, LOG_FILE_NAME)
+    backup_count = _env_int("SUPERGEMINI_LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT)
+    when = os.environ.get("SUPERGEMINI_LOG_ROTATE_WHEN")
+
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=_env_int("SUPERGEMINI_LOG_MAX_BYTES", DEFAULT_MAX_BYTES),
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+    handler.namer = _compressed_name
+    handler.rotator = _compress_rotated
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def setup_logging(log_dir, level=logging.INFO):
+    """
+    ルートロガーにキュー経由のハンドラを設定し、書き込み用のスレッドを開始する
+
+    ルートロガーに既にハンドラがある場合は何もしない（logging.basicConfig と同じ）。
+    書き込み用のスレッドは終了時に残りのログを書き出してから止まる。
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        create_file_handler(log_dir),
+        console_handler,
+        respect_handler_level=True,
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+    return listener
+
+
+__all__ = [
+    "LOG_FILE_NAME",
+    "JsonFormatter",
+    "create_file_handler",
+    "setup_logging",
+]
@@ -0,0 +1,238 @@
+"""
+SuperGemini コマンド・ペルソナのレジストリ
+
+settings.json（書き込み待ちの変更を含む）と personas.json を結合し、カテゴリ順に並べたコマンド一覧・ペルソナ一覧・
+ペルソナ詳細をmarshal形式のスナップショットとして settings.json の隣に保存します。
+スナップショットには元ファイルの内容のハッシュを記録し、一致する場合だけ使うため、
+元ファイルを編集すると次回の読み込みで作り直されます。
+
+レジストリの形式:
+    {
+        "prefix": "/sg",
+        "categories": ((カテゴリ名, ((コマンド名, 説明), ...)), ...),
+        "personas": ((ペルソナ名, "絵文字 タイトル" または None), ...),
+        "persona_details": {ペルソナ名: (絵文字, タイトル, 説明, (専門分野, ...))},
+    }
+"""
+
+import marshal
+import os
+
+from . import (
+    CONFIG_JOURNAL_PATH,
+    CONFIG_PATH,
+    PERSONAS_CONFIG_PATH,
+    SHARED_DIR,
+    content_hash,
+    get_config,
+    get_logger,
+)
+
+# スナップショットのパス
+REGISTRY_PATH = os.path.join(SHARED_DIR, "registry.snapshot")
+
+# スナップショットの形式のバージョン（形式や結合方法を変えたら上げる）
+REGISTRY_VERSION = 1
+
+# メモリに保持しているスナップショット {パス: データ}（keep_resident() を呼ぶまではNone）
+_resident = None
+
+# カテゴリの表示順序（ここにないカテゴリは設定ファイルに現れた順に最後に並べる）
+CATEGORY_ORDER = ("分析系", "開発系", "設計系", "管理系", "ツール系")
+
+
+def _read_source(path):
+    """
+    元ファイルの内容を読む（存在しない場合はNone）
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _parse_json(data, path):
+    """
+    元ファイルの内容をJSONとして解析する（解析できない場合は空の辞書）
+    """
+    import json
+
+    if data is None:
+        return {}
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        get_logger().error(f"設定ファイルの読み込みエラー ({path}): {e}")
+        return {}
+
+
+def build_registry(config, personas_config):
+    """
+    設定とペルソナ設定からレジストリを作成する
+    """
+    categories = {}
+    for cmd_name, cmd_info in config.get("commands", {}).items():
+        if cmd_info.get("enabled", True):
+            category = cmd_info.get("category", "その他")
+            categories.setdefault(category, []).append(
+                (cmd_name, cmd_info.get("description", ""))
+            )
+
+    ordered_categories = [
+        category for category in CATEGORY_ORDER if category in categories
+    ]
+    ordered_categories += [
+        category for category in categories if category not in CATEGORY_ORDER
+    ]
+
+    personas_data = personas_config.get("personas", {})
+    personas = []
+    for persona in config.get("personas", []):
+        if persona in personas_data:
+            persona_info = personas_data[persona]
+            label = f"{persona_info.get('emoji', '')} {persona_info.get('title', '')}"
+        else:
+            label = None
+        personas.append((persona, label))
+
+    persona_details = {
+        name: (
+            info.get("emoji", ""),
+            info.get("title", ""),
+            info.get("description", ""),
+            tuple(info.get("specialties", [])),
+        )
+        for name, info in personas_data.items()
+    }
+
+    return {
+        "prefix": config.get("prefix", "/sg"),
+        "categories": tuple(
+            (category, tuple(categories[category])) for category in ordered_categories
+        ),
+        "personas": tuple(personas),
+        "persona_details": persona_details,
+    }
+
+
+def read_sources():
+    """
+    元ファイルを読み、(内容のハッシュ, settings.jsonの内容, 書き込み待ちの変更の記録, personas.jsonの内容) を返す
+
+    settings.json がない場合はデフォルト設定を作成してから読む。
+    """
+    config_data = _read_source(CONFIG_PATH)
+    if config_data is None:
+        get_config()
+        config_data = _read_source(CONFIG_PATH)
+    journal_data = _read_source(CONFIG_JOURNAL_PATH)
+    personas_data = _read_source(PERSONAS_CONFIG_PATH)
+    # カテゴリの表示順序を変えた場合も作り直す
+    source_hash = content_hash(
+        config_data, journal_data, personas_data, repr(CATEGORY_ORDER).encode("utf-8")
+    )
+    return source_hash, config_data, journal_data, personas_data
+
+
+def load_snapshot(path, version, source_hash):
+    """
+    スナップショットを読み込む（形式のバージョンか元ファイルのハッシュが異なる場合はNone）
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot_version, snapshot_hash, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if snapshot_version != version or snapshot_hash != source_hash:
+        return None
+    return data
+
+
+def save_snapshot(path, version, source_hash, data):
+    """
+    スナップショットを保存する（一時ファイルに書き込んでから置き換える）
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(marshal.dumps((version, source_hash, data)))
+        os.replace(temporary_path, path)
+    except OSError as e:
+        get_logger().warning(f"スナップショットを保存できませんでした ({path}): {e}")
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+
+
+def keep_resident():
+    """
+    読み込んだスナップショットをメモリに保持するようにする（デーモンなど長時間動くプロセス用）
+
+    保持している間は元ファイルを確認しないため、元ファイルが変わったら release_resident() で破棄する。
+    """
+    global _resident
+    if _resident is None:
+        _resident = {}
+
+
+def release_resident():
+    """
+    メモリに保持しているスナップショットを破棄する（次回の読み込みで元ファイルを確認する）
+    """
+    if _resident is not None:
+        _resident.clear()
+
+
+def load_cached(path, version, build):
+    """
+    スナップショットを読み込む
+
+    元ファイルの内容がスナップショット作成時と同じであればスナップショットをそのまま返し、
+    異なる場合（またはスナップショットがない場合）は build(settings.jsonの内容, 書き込み待ちの変更の記録,
+    personas.jsonの内容) で作り直して保存する。
+    """
+    if _resident is not None and path in _resident:
+        return _resident[path]
+
+    source_hash, *sources = read_sources()
+    data = load_snapshot(path, version, source_hash)
+    if data is None:
+        data = build(*sources)
+        save_snapshot(path, version, source_hash, data)
+    if _resident is not None:
+        _resident[path] = data
+    return data
+
+
+def _build_from_sources(config_data, journal_data, personas_data):
+    if personas_data is None:
+        get_logger().warning(f"ペルソナ設定ファイルが見つかりません: {PERSONAS_CONFIG_PATH}")
+    config = _parse_json(config_data, CONFIG_PATH)
+    if journal_data:
+        from .config_store import apply_journal
+
+        config = apply_journal(config, journal_data)
+    return build_registry(config, _parse_json(personas_data, PERSONAS_CONFIG_PATH))
+
+
+def load_registry():
+    """
+    レジストリを読み込む（元ファイルが変わっていれば作り直して保存する）
+    """
+    return load_cached(REGISTRY_PATH, REGISTRY_VERSION, _build_from_sources)
+
+
+__all__ = [
+    "REGISTRY_PATH",
+    "CATEGORY_ORDER",
+    "build_registry",
+    "read_sources",
+    "load_snapshot",
+    "save_snapshot",
+    "keep_resident",
+    "release_resident",
+    "load_cached",
+    "load_registry",
+]
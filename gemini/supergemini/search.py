@@ -0,0 +1,194 @@
+"""
+SuperGemini コマンド・ペルソナ検索
+
+有効なコマンド（名前・説明・カテゴリ）とペルソナ（名前・タイトル・専門分野・説明）の
+文字n-gramから転置インデックスを作成し、レジストリと同じく元ファイルの内容のハッシュ付きで
+settings.json の隣に保存します。日本語は単語に区切られていないため、検索語は2文字ずつ
+（1文字の語は1文字で）区切って照合し、一定の割合以上のn-gramが一致した文書を
+一致した割合、次に一致したn-gramの重みの合計で順位付けします（打ち間違いや
+送り仮名の違いがあっても見つかるようにする）。
+
+インデックスの形式:
+    {
+        "documents": ((種類, 名前, 要約), ...),
+        "postings": {n-gram: (文書番号 u32, 重み×IDF f32) の並びのバイト列},
+    }
+転置リストをバイト列にしておくと、文書が数百件になってもmarshalの読み込みが
+n-gramの数に比例するだけで済み、検索時は使うn-gramの分だけ展開すればよい。
+"""
+
+import math
+import os
+import struct
+import unicodedata
+
+from . import SHARED_DIR
+from .registry import load_cached, load_registry
+
+# インデックスのパス
+INDEX_PATH = os.path.join(SHARED_DIR, "search.index")
+
+# インデックスの形式のバージョン（形式や重みを変えたら上げる）
+INDEX_VERSION = 2
+
+# 転置リストの1件（文書番号, 重み×IDF）
+POSTING = struct.Struct("<If")
+
+# フィールドごとの重み（同じn-gramが複数のフィールドに現れる場合は大きい方を使う）
+COMMAND_FIELD_WEIGHTS = {"name": 3.0, "description": 1.0, "category": 0.5}
+PERSONA_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "title": 2.0,
+    "specialties": 1.5,
+    "description": 1.0,
+}
+
+# カタカナをひらがなに揃える変換表（「テスト」と「てすと」を同じ語として扱う）
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# 検索語のn-gramのうち、この割合以上が一致した文書だけを結果に含める
+# （半分だけの一致は無関係な語でも起きるため、半分より大きくする。
+# 例:「テスト」の「すと」は「インフラストラクチャ」にも含まれる）
+MIN_COVERAGE = 0.6
+
+
+def _normalize(text):
+    """
+    照合用に正規化する（全角英数字・半角カナの統一、大文字小文字とカタカナ・ひらがなの同一視）
+    """
+    return unicodedata.normalize("NFKC", text).casefold().translate(_KATAKANA_TO_HIRAGANA)
+
+
+def _tokens(text):
+    return _normalize(text).split()
+
+
+def _index_grams(text):
+    """
+    インデックスに登録するn-gram（各語の1文字と連続する2文字）
+    """
+    grams = set()
+    for token in _tokens(text):
+        grams.update(token)
+        grams.update(token[i : i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def _query_grams(query):
+    """
+    検索語のn-gram（2文字以上の語は連続する2文字、1文字の語はその文字）
+    """
+    grams = set()
+    for token in _tokens(query):
+        if len(token) == 1:
+            grams.add(token)
+        else:
+            grams.update(token[i : i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def _documents(registry):
+    """
+    レジストリから (種類, 名前, 要約, [(テキスト, 重み), ...]) を作る
+
+    一覧表示と同じく、settings.json で有効にしたペルソナだけを含める。
+    """
+    for category, commands in registry["categories"]:
+        for cmd_name, description in commands:
+            weights = COMMAND_FIELD_WEIGHTS
+            fields = [
+                (cmd_name, weights["name"]),
+                (description, weights["description"]),
+                (category, weights["category"]),
+            ]
+            yield "command", cmd_name, description, fields
+
+    for name, _label in registry["personas"]:
+        details = registry["persona_details"].get(name)
+        if details is None:
+            continue
+        emoji, title, description, specialties = details
+        weights = PERSONA_FIELD_WEIGHTS
+        fields = [
+            (name, weights["name"]),
+            (title, weights["title"]),
+            (description, weights["description"]),
+        ]
+        fields += [(specialty, weights["specialties"]) for specialty in specialties]
+        yield "persona", name, f"{emoji} {title}", fields
+
+
+def build_index(registry):
+    """
+    レジストリから検索インデックスを作成する
+    """
+    documents = []
+    postings = {}
+    for doc_id, (kind, name, summary, fields) in enumerate(_documents(registry)):
+        documents.append((kind, name, summary))
+        gram_weights = {}
+        for text, weight in fields:
+            for gram in _index_grams(text):
+                if gram_weights.get(gram, 0) < weight:
+                    gram_weights[gram] = weight
+        for gram, weight in gram_weights.items():
+            postings.setdefault(gram, []).append((doc_id, weight))
+
+    # 多くの文書に現れるn-gramほど順位への影響を小さくする
+    document_count = len(documents)
+    for gram, entries in postings.items():
+        idf = math.log(1 + document_count / len(entries))
+        postings[gram] = b"".join(
+            POSTING.pack(doc_id, weight * idf) for doc_id, weight in entries
+        )
+
+    return {"documents": tuple(documents), "postings": postings}
+
+
+def load_index():
+    """
+    検索インデックスを読み込む（元ファイルが変わっていれば作り直して保存する）
+    """
+    return load_cached(
+        INDEX_PATH, INDEX_VERSION, lambda *sources: build_index(load_registry())
+    )
+
+
+def search(query, limit=10, index=None):
+    """
+    コマンドとペルソナを検索し、[(種類, 名前, 要約, スコア), ...] を一致した順に返す
+
+    種類は "command" または "persona"。一致したn-gramの割合が高い文書を先にし、
+    同じ割合の文書はスコアの高い順に並べる。
+    """
+    if index is None:
+        index = load_index()
+
+    grams = _query_grams(query)
+    if not grams:
+        return []
+
+    postings = index["postings"]
+    scores = {}
+    matches = {}
+    for gram in grams:
+        for doc_id, score in POSTING.iter_unpack(postings.get(gram, b"")):
+            scores[doc_id] = scores.get(doc_id, 0.0) + score
+            matches[doc_id] = matches.get(doc_id, 0) + 1
+
+    required = max(1, math.ceil(len(grams) * MIN_COVERAGE))
+    ranked = sorted(
+        (doc_id for doc_id, count in matches.items() if count >= required),
+        key=lambda doc_id: (-matches[doc_id], -scores[doc_id], doc_id),
+    )
+
+    documents = index["documents"]
+    return [(*documents[doc_id], scores[doc_id]) for doc_id in ranked[:limit]]
+
+
+__all__ = [
+    "INDEX_PATH",
+    "build_index",
+    "load_index",
+    "search",
+]
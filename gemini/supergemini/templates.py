@@ -0,0 +1,372 @@
+"""
+SuperGemini コマンドテンプレートの描画
+
+Commands/*.md をテンプレートとして、ペルソナ（personas.json）・引数・プロジェクトの情報を
+埋め込んで出力します。テンプレートは一度だけ解析して中間形式（ノードのタプル）にし、
+レジストリと同じくテンプレートの内容のハッシュ付きでスナップショットとして保存するため、
+次回からは Markdown を解析し直しません。同じプロセスで続けて描画する場合は
+メモリ上の中間形式をそのまま使い、ファイルも読み直しません。
+
+記法（Mustache のサブセット）:
+    {{name}}               値を埋め込む（"persona.title" のように "." で辿る。{{.}} は現在の値）
+    {{#name}}...{{/name}}  値が空でなければ描画する（リストの場合は要素ごとに描画する）
+    {{^name}}...{{/name}}  値が空の場合だけ描画する
+    {{>name}}              Commands/name.md を埋め込む
+タグだけの行（{{name}} を除く）は行ごと取り除きます。"_" で始まるファイルは
+埋め込み用の部品として扱い、コマンドのテンプレートには含めません。
+
+描画に使える値:
+    command    {"name", "prefix", "description"}
+    persona    {"name", "emoji", "title", "description", "specialties"}（指定した場合のみ）
+    arguments  引数（空白区切りで連結した文字列）
+    project    {"name", "path", "branch"}
+"""
+
+import os
+
+from . import SHARED_DIR, _file_signature, content_hash
+from .registry import load_registry, load_snapshot, save_snapshot
+
+# テンプレートのディレクトリ
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Commands")
+
+# 中間形式のスナップショットのパス
+TEMPLATES_PATH = os.path.join(SHARED_DIR, "templates.snapshot")
+
+# 中間形式のバージョン（ノードの形式や解析方法を変えたら上げる）
+TEMPLATES_VERSION = 1
+
+# ノードの種類（文字列のノードはそのまま出力する）
+VARIABLE = 0  # (VARIABLE, パス)
+SECTION = 1  # (SECTION, パス, 子ノード)
+INVERTED = 2  # (INVERTED, パス, 子ノード)
+PARTIAL = 3  # (PARTIAL, 部品名)
+
+# タグの正規表現（re の読み込みを避けるため、初めて解析するときに作成する）
+_tag_pattern = None
+
+# メモリ上の中間形式 ((ファイルの一覧, 識別情報), {テンプレート名: ノードのタプル})
+_loaded = None
+
+
+def _compile_tag_pattern():
+    global _tag_pattern
+    if _tag_pattern is None:
+        import re
+
+        _tag_pattern = re.compile(
+            # タグだけの行（前後の空白と改行ごと取り除く）
+            r"^[ \t]*\{\{[ \t]*(?P<line_kind>[#^/>])[ \t]*(?P<line_name>[^{}]*?)"
+            r"[ \t]*\}\}[ \t]*(?:\n|\Z)"
+            # 行の途中のタグ
+            r"|\{\{[ \t]*(?P<kind>[#^/>]?)[ \t]*(?P<name>[^{}]*?)[ \t]*\}\}",
+            re.MULTILINE,
+        )
+    return _tag_pattern
+
+
+def _path(name):
+    return () if name == "." else tuple(name.split("."))
+
+
+def _freeze(nodes):
+    return tuple(
+        (node[0], node[1], _freeze(node[2]))
+        if not isinstance(node, str) and node[0] in (SECTION, INVERTED)
+        else node
+        for node in nodes
+    )
+
+
+def compile_template(source, name="<template>"):
+    """
+    テンプレートの文字列を中間形式（ノードのタプル）にする
+
+    セクションの対応が取れていない場合は ValueError を送出する。
+    """
+    root = []
+    # (セクション名, 子ノードの一覧)
+    stack = [(None, root)]
+    position = 0
+    for match in _compile_tag_pattern().finditer(source):
+        nodes = stack[-1][1]
+        if match.start() > position:
+            nodes.append(source[position : match.start()])
+        position = match.end()
+
+        if match.group("line_kind") is not None:
+            kind, tag_name = match.group("line_kind"), match.group("line_name")
+        else:
+            kind, tag_name = match.group("kind"), match.group("name")
+        line = source.count("\n", 0, match.start()) + 1
+
+        if kind in ("#", "^"):
+            children = []
+            node_kind = SECTION if kind == "#" else INVERTED
+            nodes.append((node_kind, _path(tag_name), children))
+            stack.append((tag_name, children))
+        elif kind == "/":
+            if stack[-1][0] != tag_name:
+                raise ValueError(
+                    f"{name}: {line}行目の {{{{/{tag_name}}}}} に対応するセクションがありません"
+                )
+            stack.pop()
+        elif kind == ">":
+            nodes.append((PARTIAL, tag_name))
+        else:
+            nodes.append((VARIABLE, _path(tag_name)))
+
+    if len(stack) > 1:
+        raise ValueError(f"{name}: {{{{#{stack[-1][0]}}}}} が閉じられていません")
+    if position < len(source):
+        root.append(source[position:])
+    return _freeze(root)
+
+
+def _partials(nodes):
+    for node in nodes:
+        if isinstance(node, str):
+            continue
+        if node[0] == PARTIAL:
+            yield node[1]
+        elif node[0] in (SECTION, INVERTED):
+            yield from _partials(node[2])
+
+
+def _check_partials(templates):
+    """
+    埋め込む部品が存在し、埋め込みが循環していないことを確認する（問題があれば ValueError）
+    """
+    checked = set()
+
+    def visit(name, chain):
+        if name in checked:
+            return
+        if name in chain:
+            cycle = chain[chain.index(name) :] + [name]
+            raise ValueError(f"部品の埋め込みが循環しています: {' → '.join(cycle)}")
+        chain.append(name)
+        for partial in _partials(templates[name]):
+            if partial not in templates:
+                raise ValueError(f"{name}: 部品 '{partial}' が見つかりません")
+            visit(partial, chain)
+        chain.pop()
+        checked.add(name)
+
+    for name in templates:
+        visit(name, [])
+
+
+def _template_files():
+    try:
+        names = sorted(os.listdir(TEMPLATES_DIR))
+    except FileNotFoundError:
+        return ()
+    return tuple(
+        (name[:-3], os.path.join(TEMPLATES_DIR, name))
+        for name in names
+        if name.endswith(".md")
+    )
+
+
+def load_templates():
+    """
+    全テンプレート（部品を含む）の中間形式を {名前: ノードのタプル} で返す
+
+    テンプレートのファイルが前回の読み込みから変わっていなければメモリ上の中間形式を、
+    内容がスナップショット作成時と同じであればスナップショットを返し、
+    どちらでもない場合は解析し直してスナップショットを保存する。
+    存在しない部品を埋め込んでいる場合や埋め込みが循環している場合は ValueError を送出する。
+    """
+    global _loaded
+
+    files = _template_files()
+    key = (files, tuple(_file_signature(path) for _name, path in files))
+    if _loaded is not None and _loaded[0] == key:
+        return _loaded[1]
+
+    sources = []
+    for _name, path in files:
+        with open(path, "rb") as f:
+            sources.append(f.read())
+    parts = []
+    for (name, _path), data in zip(files, sources):
+        parts += [name.encode("utf-8"), data]
+    source_hash = content_hash(*parts)
+
+    templates = load_snapshot(TEMPLATES_PATH, TEMPLATES_VERSION, source_hash)
+    if templates is None:
+        templates = {
+            name: compile_template(data.decode("utf-8"), name)
+            for (name, _path), data in zip(files, sources)
+        }
+        _check_partials(templates)
+        save_snapshot(TEMPLATES_PATH, TEMPLATES_VERSION, source_hash, templates)
+
+    _loaded = (key, templates)
+    return templates
+
+
+def list_templates():
+    """
+    描画できるコマンドのテンプレート名（部品を除く）
+    """
+    return sorted(name for name in load_templates() if not name.startswith("_"))
+
+
+def _find_git(path):
+    """
+    path を含むGitリポジトリの (ルート, ブランチ名) を返す（git コマンドは起動しない）
+
+    Gitの管理外の場合は (None, None)、ブランチ以外を指している場合のブランチ名はNone。
+    """
+    directory = path
+    while True:
+        git_dir = os.path.join(directory, ".git")
+        if os.path.isfile(git_dir):
+            # ワークツリー・サブモジュールの .git は "gitdir: <パス>" だけのファイル
+            try:
+                with open(git_dir, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                content = ""
+            if content.startswith("gitdir:"):
+                git_dir = os.path.join(directory, content[len("gitdir:") :].strip())
+        try:
+            with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+                head = f.read().strip()
+        except OSError:
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None, None
+            directory = parent
+            continue
+        prefix = "ref: refs/heads/"
+        return directory, head[len(prefix) :] if head.startswith(prefix) else None
+
+
+def project_context(path=None):
+    """
+    プロジェクトの情報 {"name", "path", "branch"}（path を省略した場合はカレントディレクトリ）
+
+    Gitリポジトリの中であればリポジトリのルートをプロジェクトとする。
+    """
+    path = os.path.abspath(path or os.getcwd())
+    root, branch = _find_git(path)
+    if root is not None:
+        path = root
+    return {"name": os.path.basename(path), "path": path, "branch": branch}
+
+
+def _lookup(stack, path):
+    if not path:
+        return stack[-1]
+    for scope in reversed(stack):
+        if isinstance(scope, dict) and path[0] in scope:
+            value = scope[path[0]]
+            break
+    else:
+        return None
+    for key in path[1:]:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _text(value):
+    if value is None or value is False:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "、".join(str(item) for item in value)
+    return str(value)
+
+
+def _render_nodes(nodes, stack, templates):
+    for node in nodes:
+        if isinstance(node, str):
+            yield node
+            continue
+
+        kind = node[0]
+        if kind == VARIABLE:
+            text = _text(_lookup(stack, node[1]))
+            if text:
+                yield text
+        elif kind == PARTIAL:
+            yield from _render_nodes(templates[node[1]], stack, templates)
+        else:
+            value = _lookup(stack, node[1])
+            if kind == INVERTED:
+                if not value:
+                    yield from _render_nodes(node[2], stack, templates)
+            elif value:
+                for item in value if isinstance(value, (list, tuple)) else (value,):
+                    stack.append(item)
+                    yield from _render_nodes(node[2], stack, templates)
+                    stack.pop()
+
+
+def _command_description(registry, command):
+    for _category, commands in registry["categories"]:
+        for cmd_name, description in commands:
+            if cmd_name == command:
+                return description
+    return ""
+
+
+def render(command, persona=None, arguments="", project=None):
+    """
+    コマンドのテンプレートを描画し、出力する文字列を順に返すイテレータを返す
+
+    persona はペルソナ名（先頭の "@" は省略可）、project は project_context() の戻り値
+    （省略した場合はカレントディレクトリ、空の辞書を渡すとプロジェクトの情報を埋め込まない）。
+    テンプレートやペルソナが見つからない場合は、描画を始める前に ValueError を送出する。
+    """
+    # レジストリを先に読む（settings.json のディレクトリがなければ作成される）
+    registry = load_registry()
+    templates = load_templates()
+    if command.startswith("_") or command not in templates:
+        available = ", ".join(list_templates())
+        raise ValueError(
+            f"コマンド '{command}' のテンプレートが見つかりません（利用可能: {available}）"
+        )
+
+    persona_data = None
+    if persona:
+        persona = persona.lstrip("@")
+        details = registry["persona_details"].get(persona)
+        if details is None:
+            raise ValueError(
+                f"ペルソナ '{persona}' が見つかりません（一覧: python -m gemini personas）"
+            )
+        emoji, title, description, specialties = details
+        persona_data = {
+            "name": persona,
+            "emoji": emoji,
+            "title": title,
+            "description": description,
+            "specialties": list(specialties),
+        }
+
+    context = {
+        "command": {
+            "name": command,
+            "prefix": registry["prefix"],
+            "description": _command_description(registry, command),
+        },
+        "persona": persona_data,
+        "arguments": arguments,
+        "project": project_context() if project is None else project,
+    }
+    return _render_nodes(templates[command], [context], templates)
+
+
+__all__ = [
+    "TEMPLATES_DIR",
+    "compile_template",
+    "load_templates",
+    "list_templates",
+    "project_context",
+    "render",
+]
@@ -104,14 +104,16 @@ install-packages-supergemini:
 	ln -sf $(DOTFILES_DIR)/gemini/supergemini/GEMINI.md $(HOME_DIR)/.gemini/GEMINI.md || true; \
 	\
 	echo "📝 カスタムツールファイルを作成中..."; \
-	cp -f $(DOTFILES_DIR)/gemini/supergemini/Commands/help.md $(HOME_DIR)/.gemini/user-tools/user-help.md 2>/dev/null || \
-	printf "import-help: # /user-help コマンド\n\nSuperGeminiフレームワークのコマンド一覧を表示します。\n" > $(HOME_DIR)/.gemini/user-tools/user-help.md; \
-	\
-	cp -f $(DOTFILES_DIR)/gemini/supergemini/Commands/analyze.md $(HOME_DIR)/.gemini/user-tools/user-analyze.md 2>/dev/null || \
-	printf "import-analyze: # /user-analyze コマンド\n\nコードや機能を分析します。\n" > $(HOME_DIR)/.gemini/user-tools/user-analyze.md; \
-	\
-	cp -f $(DOTFILES_DIR)/gemini/supergemini/Commands/implement.md $(HOME_DIR)/.gemini/user-tools/user-implement.md 2>/dev/null || \
-	printf "import-implement: # /user-implement コマンド\n\n新機能を実装します。\n" > $(HOME_DIR)/.gemini/user-tools/user-implement.md; \
+	# テンプレートを描画して作成（"_" で始まる埋め込み用の部品は除く） \
+	# 描画できない場合はテンプレートのタグを取り除いて作成 \
+	for template in $(DOTFILES_DIR)/gemini/supergemini/Commands/*.md; do \
+		name=$$(basename "$$template" .md); \
+		case "$$name" in _*) continue ;; esac; \
+		dest=$(HOME_DIR)/.gemini/user-tools/user-$$name.md; \
+		(cd $(DOTFILES_DIR) && python3 -m gemini render --no-project "$$name") > "$$dest" 2>/dev/null || \
+		sed -e '/^[[:space:]]*{{[^{}]*}}[[:space:]]*$$/d' -e 's/{{[^{}]*}}//g' "$$template" > "$$dest" || \
+		echo "⚠️  $$dest の作成に失敗しました"; \
+	done; \
 	\
 	echo "🔧 Gemini CLI設定ファイルを更新中..."; \
 	echo '{"selectedAuthType":"oauth-personal","usageStatisticsEnabled":false,"customToolsDirectory":"~/.gemini/user-tools","enableCustomTools":true}' > $(HOME_DIR)/.gemini/settings.json || true; \
@@ -207,6 +209,12 @@ install-gemini-ecosystem:
 	@echo "";
 	@echo "✅ Gemini エコシステムの一括インストールが完了しました"
 
+# SuperGemini CLIの起動時間チェック（シェルフックから頻繁に呼ばれるため読み込み時間に予算を設ける）
+.PHONY: check-supergemini-startup
+check-supergemini-startup:  ## SuperGemini CLIの起動時間を確認
+	@echo "⏱️  SuperGemini CLIの起動時間を確認中..."
+	@cd $(DOTFILES_DIR) && python3 gemini/benchmark_startup.py
+
 # ========================================
 # エイリアス
 # ========================================
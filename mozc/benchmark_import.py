@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Mozc UT辞書インポートのベンチマークスクリプト
+合成したUT辞書形式のTSVファイルを各インポートモードで一時データベースに取り込み、
+スループット・最大メモリ使用量・データベースとWALのサイズをJSONに記録します。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_SCRIPT = os.path.join(SCRIPT_DIR, 'import_ut_dictionary.py')
+
+# 合成する辞書ファイルの行数
+DEFAULT_SIZES = '100k,1M,5M'
+
+# モード名と import_ut_dictionary.py に渡す引数
+# incremental は同じ辞書ファイルを全件インポート済みのデータベースに差分インポートする
+IMPORT_MODES = {
+    'full': [],
+    'full-text': ['--reader', 'text'],
+    'full-parallel': ['--workers', str(os.cpu_count() or 1)],
+    'bulk': ['--bulk'],
+    'incremental': ['--incremental'],
+}
+DEFAULT_MODES = 'full,full-parallel,bulk,incremental'
+
+# WALファイルのサイズを確認する間隔（秒）
+WAL_POLL_SECONDS = 0.05
+
+# 読み・単語の生成に使う文字と品詞（UT辞書の分布を大まかに模したもの）
+HIRAGANA = [chr(code) for code in range(ord('ぁ'), ord('ゖ') + 1)]
+KATAKANA = [chr(code) for code in range(ord('ァ'), ord('ヺ') + 1)]
+KANJI = [chr(code) for code in range(0x4E00, 0x4E00 + 3000)]
+POS_WEIGHTS = [
+    ('名詞', 40), ('固有名詞', 20), ('人名', 12), ('地名', 10), ('組織', 4),
+    ('動詞', 6), ('形容詞', 3), ('副詞', 2), ('短縮よみ', 2), ('顔文字', 1),
+]
+
+
+def parse_size(text):
+    """'100k' や '1M' 形式の行数を整数に変換"""
+    text = text.strip()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:].lower())
+    if multiplier is not None:
+        return int(float(text[:-1]) * multiplier)
+    return int(text)
+
+
+def format_size(lines):
+    """行数を '100k' や '1M' 形式で表す"""
+    if lines >= 1000000 and lines % 1000000 == 0:
+        return f'{lines // 1000000}M'
+    if lines >= 1000 and lines % 1000 == 0:
+        return f'{lines // 1000}k'
+    return str(lines)
+
+
+def generate_dictionary(path, lines, seed=0):
+    """UT辞書形式（読み, 単語, ID, 品詞, コスト）の合成TSVファイルを作成
+
+    約1%のコメント行、約0.5%の空行、約0.2%の列が足りない行を含む。
+    同じ行数とシードからは同じ内容のファイルが生成される。
+    """
+    rng = random.Random(seed)
+    pos_names = [pos for pos, _ in POS_WEIGHTS]
+    pos_weights = [weight for _, weight in POS_WEIGHTS]
+    # 読みは3-6文字、単語は2-5文字が中心になるよう分布させる
+    reading_lengths = [2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 7, 8, 10, 12]
+    value_lengths = [1, 2, 2, 3, 3, 3, 4, 4, 5, 6, 8, 10]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        buffer = []
+        for number in range(lines):
+            roll = rng.random()
+            if roll < 0.01:
+                buffer.append(f'# 合成データ {number}\n')
+            elif roll < 0.015:
+                buffer.append('\n')
+            elif roll < 0.017:
+                buffer.append(f'不正な行\t{number}\n')
+            else:
+                reading = ''.join(rng.choices(HIRAGANA, k=rng.choice(reading_lengths)))
+                characters = KATAKANA if rng.random() < 0.3 else KANJI
+                value = ''.join(rng.choices(characters, k=rng.choice(value_lengths)))
+                pos = rng.choices(pos_names, pos_weights)[0]
+                buffer.append(f'{reading}\t{value}\t{rng.randrange(3000)}\t{pos}\t{rng.randrange(10000)}\n')
+
+            if len(buffer) >= 10000:
+                f.write(''.join(buffer))
+                buffer = []
+        f.write(''.join(buffer))
+
+
+def prepare_dictionary(work_dir, lines, seed):
+    """合成辞書ファイルを用意（同じ条件のファイルがあれば再利用）"""
+    path = os.path.join(work_dir, f'ut_synthetic_{format_size(lines)}_seed{seed}.txt')
+    if not os.path.exists(path):
+        print(f'🧪 合成辞書を生成中: {format_size(lines)} 行')
+        started = time.time()
+        generate_dictionary(path + '.tmp', lines, seed)
+        os.replace(path + '.tmp', path)
+        print(f'   {os.path.getsize(path) / 1024 / 1024:.1f} MiB, {time.time() - started:.1f}秒')
+    return path
+
+
+def _watch_wal(wal_file, stop, peak):
+    """WALファイルの最大サイズを記録（インポート終了時にWALは削除されるため実行中に確認する）"""
+    while not stop.wait(WAL_POLL_SECONDS):
+        try:
+            peak[0] = max(peak[0], os.path.getsize(wal_file))
+        except OSError:
+            pass
+
+
+def run_import(dictionary_file, database_file, options, status_file):
+    """インポートスクリプトを子プロセスで実行し、(経過秒, 最大RSSバイト, 最大WALバイト, 終了コード) を返す"""
+    command = [sys.executable, IMPORT_SCRIPT, dictionary_file, database_file,
+               '--status-file', status_file] + options
+    stop = threading.Event()
+    wal_peak = [0]
+    watcher = threading.Thread(target=_watch_wal, args=(f'{database_file}-wal', stop, wal_peak), daemon=True)
+    watcher.start()
+
+    with tempfile.TemporaryFile() as errors:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=errors)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        watcher.join()
+
+        returncode = os.waitstatus_to_exitcode(status)
+        if returncode != 0:
+            errors.seek(0)
+            print(errors.read().decode('utf-8', 'replace'), file=sys.stderr)
+
+    # macOSはバイト、Linuxはキロバイト単位
+    peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return elapsed, peak_rss, wal_peak[0], returncode
+
+
+def read_status(status_file):
+    """ステータスファイルから段階ごとの経過時間と最後のレコードを取り出す"""
+    phases = {}
+    last = {}
+    with open(status_file, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['event'] == 'phase':
+                phases[record['phase']] = record['elapsed']
+            last = record
+    return phases, last
+
+
+def benchmark_mode(dictionary_file, lines, mode, work_dir):
+    """1つのモードでインポートを実行して結果を返す"""
+    database_file = os.path.join(work_dir, f'bench_{mode}.db')
+    status_file = os.path.join(work_dir, f'bench_{mode}.status')
+    for path in (database_file, f'{database_file}-wal', f'{database_file}-shm', f'{database_file}.bak'):
+        if os.path.exists(path):
+            os.remove(path)
+
+    if mode == 'incremental':
+        # 差分インポートの前提となる全件インポート（計測しない）
+        run_import(dictionary_file, database_file, [], status_file)
+
+    elapsed, peak_rss, wal_peak, returncode = run_import(
+        dictionary_file, database_file, IMPORT_MODES[mode], status_file
+    )
+    phases, last = read_status(status_file)
+
+    conn = sqlite3.connect(database_file)
+    try:
+        rows = conn.execute('SELECT COUNT(*) FROM user_dictionary').fetchone()[0]
+    finally:
+        conn.close()
+
+    processed = last.get('entries', 0)
+    result = {
+        'lines': lines,
+        'size': format_size(lines),
+        'mode': mode,
+        'options': IMPORT_MODES[mode],
+        'status': last.get('status', 'unknown') if returncode == 0 else 'failed',
+        'elapsed_seconds': round(elapsed, 3),
+        'rows': rows,
+        'rows_per_sec': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+        'parse_seconds': last.get('parse_seconds'),
+        'insert_seconds': last.get('insert_seconds'),
+        'commit_seconds': last.get('commit_seconds'),
+        'phase_seconds': phases,
+        'peak_rss_bytes': peak_rss,
+        'database_bytes': os.path.getsize(database_file),
+        'peak_wal_bytes': wal_peak,
+    }
+
+    for path in (database_file, f'{database_file}.bak', status_file):
+        if os.path.exists(path):
+            os.remove(path)
+    return result
+
+
+def environment_info():
+    """計測環境の情報"""
+    info = {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        info['git_commit'] = subprocess.run(
+            ['git', '-C', SCRIPT_DIR, 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def best_results(results):
+    """行数とモードの組み合わせごとにスループットが最も高い結果を返す（繰り返し計測時のばらつき対策）"""
+    best = {}
+    for result in results:
+        key = (result['lines'], result['mode'])
+        if key not in best or result['rows_per_sec'] > best[key]['rows_per_sec']:
+            best[key] = result
+    return best
+
+
+def compare_with_baseline(results, baseline_file, tolerance):
+    """基準の結果と比べてスループットが tolerance 以上落ちた組み合わせを返す"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = best_results(json.load(f)['results'])
+
+    regressions = []
+    for key, result in best_results(results).items():
+        previous = baseline.get(key)
+        if previous is None or not previous['rows_per_sec']:
+            continue
+        change = result['rows_per_sec'] / previous['rows_per_sec'] - 1
+        if change < -tolerance:
+            regressions.append((result, previous, change))
+    return regressions
+
+
+def print_result(result):
+    """1件の結果を表示"""
+    print(
+        f"📊 {result['size']:>5} {result['mode']:<14} {result['rows_per_sec']:>12,.0f} エントリ/秒"
+        f"  {result['elapsed_seconds']:>8.2f}秒"
+        f"  RSS {result['peak_rss_bytes'] / 1024 / 1024:>7.1f} MiB"
+        f"  DB {result['database_bytes'] / 1024 / 1024:>7.1f} MiB"
+        f"  WAL {result['peak_wal_bytes'] / 1024 / 1024:>7.1f} MiB"
+    )
+
+
+def parse_args(argv=None):
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(
+        description='合成したUT辞書でMozc UT辞書インポートのベンチマークを実行します'
+    )
+    parser.add_argument(
+        '--sizes', default=DEFAULT_SIZES,
+        help=f'辞書ファイルの行数（カンマ区切り、k/M 表記可、デフォルト: {DEFAULT_SIZES}）'
+    )
+    parser.add_argument(
+        '--modes', default=DEFAULT_MODES,
+        help=f'計測するモード（カンマ区切り、{", ".join(IMPORT_MODES)}、デフォルト: {DEFAULT_MODES}）'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=1,
+        help='各組み合わせの計測回数（基準との比較には最速の結果を使う、デフォルト: 1）'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='合成辞書の乱数シード（デフォルト: 0）')
+    parser.add_argument(
+        '--work-dir',
+        help='合成辞書と一時データベースを置くディレクトリ（未指定時は一時ディレクトリ、指定時は合成辞書を再利用）'
+    )
+    parser.add_argument('--output', default='benchmark_import.json', help='結果を書き出すJSONファイル')
+    parser.add_argument('--baseline', help='比較する過去の結果（JSONファイル）')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.1,
+        help='基準からのスループット低下をリグレッションとみなす割合（デフォルト: 0.1）'
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        args.sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        parser.error(f'--sizes の形式が正しくありません: {args.sizes}')
+    args.modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in args.modes if mode not in IMPORT_MODES]
+    if unknown:
+        parser.error(f'不明なモード: {", ".join(unknown)}')
+    if args.repeat < 1:
+        parser.error('--repeat には1以上を指定してください')
+    return args
+
+
+def run_benchmarks(args, work_dir):
+    """全ての行数とモードの組み合わせを計測"""
+    results = []
+    for lines in args.sizes:
+        dictionary_file = prepare_dictionary(work_dir, lines, args.seed)
+        for mode in args.modes:
+            for _ in range(args.repeat):
+                result = benchmark_mode(dictionary_file, lines, mode, work_dir)
+                print_result(result)
+                results.append(result)
+    return results
+
+
+def main():
+    """メイン処理"""
+    args = parse_args()
+
+    print('🤖 Mozc UT辞書インポートのベンチマーク開始')
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+        results = run_benchmarks(args, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix='mozc_bench_') as work_dir:
+            results = run_benchmarks(args, work_dir)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment_info(), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f'💾 結果を保存しました: {args.output}')
+
+    failed = [result for result in results if result['status'] != 'ok']
+    if failed:
+        print(f'❌ {len(failed)} 件のインポートが失敗しました')
+        sys.exit(1)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for result, previous, change in regressions:
+            print(
+                f"⚠️  {result['size']} {result['mode']}: {previous['rows_per_sec']:,.0f}"
+                f" → {result['rows_per_sec']:,.0f} エントリ/秒（{change:+.1%}）"
+            )
+        if regressions:
+            print(f'❌ {len(regressions)} 件のリグレッションを検出しました')
+            sys.exit(1)
+        print('✅ リグレッションはありません')
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@ fi
 
 DB_FILE="$1"
 LOG_FILE="${DB_FILE}.import.log"
+# インポートスクリプトが書き出す進捗レコード（JSON Lines）
+STATUS_FILE="${DB_FILE}.import.status"
 SUCCESS_FILE="${DB_FILE}.success"
 FAILED_FILE="${DB_FILE}.failed"
 
@@ -34,6 +36,43 @@ print_info() {
     echo "ℹ️  $1"
 }
 
+# ステータスファイルの最新レコードから進捗とスループットを表示
+print_telemetry() {
+    [ -s "$STATUS_FILE" ] && command -v python3 >/dev/null 2>&1 || return 1
+
+    python3 - "$STATUS_FILE" <<'PYEOF'
+import json
+import sys
+
+record = None
+with open(sys.argv[1], encoding='utf-8') as f:
+    for line in f:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # 書き込み途中の行は無視
+            pass
+if record is None:
+    sys.exit(1)
+
+def mib(value):
+    return f'{value / 1024 / 1024:.1f} MiB' if value is not None else '-'
+
+print(f"ℹ️  段階: {record['phase']} / 経過: {record['elapsed']:.1f}秒 / 更新: {record['event']}")
+if record.get('total_bytes'):
+    percent = record['bytes'] * 100 / record['total_bytes']
+    print(f"ℹ️  進捗: {percent:.1f}% ({mib(record['bytes'])} / {mib(record['total_bytes'])})")
+print(f"ℹ️  処理済み: {record['lines']:,} 行 / {record['entries']:,} エントリ")
+if 'rows_per_sec' in record:
+    print(f"ℹ️  スループット: {record['rows_per_sec']:,.0f} エントリ/秒, {mib(record['bytes_per_sec'])}/秒")
+print(f"ℹ️  時間の内訳: パース {record['parse_seconds']:.1f}秒 / 挿入 {record['insert_seconds']:.1f}秒"
+      f" (うちコミット {record['commit_seconds']:.1f}秒, {record['commits']} 回)")
+if record.get('eta_seconds') is not None and record['event'] == 'progress':
+    print(f"ℹ️  残り時間（推定）: {record['eta_seconds']:.0f}秒")
+print(f"ℹ️  メモリ: RSS {mib(record['rss_bytes'])} / 最大 {mib(record['peak_rss_bytes'])}")
+PYEOF
+}
+
 # 処理状況の確認
 if [ -f "$SUCCESS_FILE" ]; then
     print_success "辞書インポートが完了しています"
@@ -48,6 +87,8 @@ if [ -f "$SUCCESS_FILE" ]; then
         fi
     fi
 
+    print_telemetry || true
+
     exit 0
 
 elif [ -f "$FAILED_FILE" ]; then
@@ -66,7 +107,9 @@ else
     if pgrep -f "setup_mozc_import.sh" >/dev/null 2>&1; then
         print_status "辞書インポートが実行中です..."
 
-        if [ -f "$LOG_FILE" ]; then
+        if print_telemetry; then
+            print_info "ステータスファイル: $STATUS_FILE"
+        elif [ -f "$LOG_FILE" ]; then
             print_info "ログファイル: $LOG_FILE"
             print_info "最新の進捗:"
             tail -5 "$LOG_FILE" | grep -E "🤖|✅|📊|処理済み" | tail -3
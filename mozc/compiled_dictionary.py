@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Mozcユーザー辞書のコンパイル済みファイル
+読みでソートした辞書エントリを前方圧縮したブロックに詰めたバイナリ形式で、
+mmapしたまま完全一致検索と前方一致検索ができます。
+
+ファイル構成（数値はリトルエンディアン）:
+  ヘッダー      HEADER（マジック, バージョン, エントリ数, 読みの数, ブロック数, 1ブロックの読みの数, 品詞数,
+                各領域のオフセット）
+  データ領域    ブロックの並び。1ブロックに BLOCK_KEYS 個の読みを格納する
+  品詞表        品詞ごとに (varint 長さ, UTF-8)
+  ブロック索引  ブロックごとの先頭位置（データ領域の先頭からの u64）
+
+ブロック内の読みは直前の読みと共通する先頭バイト数と残りのバイト列で表す（ブロック先頭は共通部分0）。
+  varint 共通バイト数, varint 残りの長さ, 残りのバイト列,
+  varint 単語数, varint 単語リストのバイト数, 単語リスト（varint 長さ, UTF-8, varint 品詞番号 の並び）
+読みはUTF-8のバイト列順（=コードポイント順、SQLiteのBINARY照合順序と同じ）に並ぶ。
+"""
+
+import mmap
+import os
+import struct
+
+MAGIC = b'MZUTDIC\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIIIQQQ')
+INDEX_ENTRY = struct.Struct('<Q')
+
+# 1ブロックに格納する読みの数（大きいほど小さくなり、検索時に読むバイト数が増える）
+BLOCK_KEYS = 16
+
+
+def _encode_varint(value):
+    """非負整数をLEB128形式のバイト列にする"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _decode_varint(buf, pos):
+    """LEB128形式の整数を読み、(値, 次の位置) を返す"""
+    byte = buf[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _shared_prefix_length(a, b):
+    """2つのバイト列の共通する先頭バイト数"""
+    limit = min(len(a), len(b))
+    length = 0
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def write_compiled_dictionary(path, rows):
+    """(読み, 単語, 品詞) を読みのUTF-8バイト列順に並べたものからコンパイル済みファイルを作成
+
+    同じ読みのエントリは連続している必要がある。一時ファイルに書き込んでから
+    置き換えるため、書き込み中も既存のファイルはそのまま読める。
+    戻り値は (エントリ数, 読みの数, ファイルサイズ)。
+    """
+    pos_ids = {}
+    block_offsets = []
+    entry_count = 0
+    key_count = 0
+    temporary_path = f'{path}.tmp'
+
+    with open(temporary_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        data_offset = f.tell()
+        block = bytearray()
+        block_size = 0
+        previous_key = b''
+        current_key = None
+        values = bytearray()
+        value_count = 0
+
+        def flush_key():
+            nonlocal block, block_size, previous_key, key_count
+            shared = _shared_prefix_length(previous_key, current_key) if block_size else 0
+            block += _encode_varint(shared)
+            block += _encode_varint(len(current_key) - shared)
+            block += current_key[shared:]
+            block += _encode_varint(value_count)
+            block += _encode_varint(len(values))
+            block += values
+            previous_key = current_key
+            key_count += 1
+            block_size += 1
+            if block_size >= BLOCK_KEYS:
+                flush_block()
+
+        def flush_block():
+            nonlocal block, block_size
+            block_offsets.append(f.tell() - data_offset)
+            f.write(block)
+            block = bytearray()
+            block_size = 0
+
+        for key, value, pos in rows:
+            key = key.encode('utf-8')
+            if key != current_key:
+                if current_key is not None:
+                    flush_key()
+                current_key = key
+                values = bytearray()
+                value_count = 0
+
+            value = (value or '').encode('utf-8')
+            pos_id = pos_ids.setdefault(pos or '', len(pos_ids))
+            values += _encode_varint(len(value))
+            values += value
+            values += _encode_varint(pos_id)
+            value_count += 1
+            entry_count += 1
+
+        if current_key is not None:
+            flush_key()
+        if block_size:
+            flush_block()
+
+        pos_offset = f.tell()
+        for pos in pos_ids:
+            encoded = pos.encode('utf-8')
+            f.write(_encode_varint(len(encoded)))
+            f.write(encoded)
+
+        index_offset = f.tell()
+        for offset in block_offsets:
+            f.write(INDEX_ENTRY.pack(offset))
+        size = f.tell()
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, VERSION, entry_count, key_count, len(block_offsets), BLOCK_KEYS, len(pos_ids),
+            pos_offset, index_offset, data_offset
+        ))
+
+    os.replace(temporary_path, path)
+    return entry_count, key_count, size
+
+
+class CompiledDictionary:
+    """コンパイル済みファイルをmmapして検索する
+
+    with 文で使うか、使い終わったら close() を呼ぶ。
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, self.entry_count, self.key_count, self.block_count, self.block_keys, pos_count,
+             pos_offset, self.index_offset, self.data_offset) = HEADER.unpack_from(self.buf, 0)
+        except struct.error:
+            self.buf.close()
+            raise ValueError(f'コンパイル済み辞書ではありません: {path}')
+        if magic != MAGIC or version != VERSION:
+            self.buf.close()
+            raise ValueError(f'対応していない形式です: {path}')
+
+        self.pos_names = []
+        offset = pos_offset
+        for _ in range(pos_count):
+            length, offset = _decode_varint(self.buf, offset)
+            self.pos_names.append(self.buf[offset:offset + length].decode('utf-8'))
+            offset += length
+
+    def close(self):
+        self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.entry_count
+
+    def _block_start(self, block):
+        return self.data_offset + INDEX_ENTRY.unpack_from(self.buf, self.index_offset + block * INDEX_ENTRY.size)[0]
+
+    def _first_key(self, block):
+        # ブロック先頭の読みは共通部分が0なので、そのまま取り出せる
+        offset = self._block_start(block) + 1
+        length, offset = _decode_varint(self.buf, offset)
+        return self.buf[offset:offset + length]
+
+    def _find_block(self, key):
+        """key 以上の読みが最初に現れうるブロック（先頭の読みが key 以下の最後のブロック）"""
+        low, high = 0, self.block_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._first_key(middle) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return max(low - 1, 0)
+
+    def _iter_keys(self, block):
+        """block 以降の (読みのバイト列, 単語リストの開始位置, 単語リストの終了位置, 単語数) を順に返す"""
+        buf = self.buf
+        for current in range(block, self.block_count):
+            offset = self._block_start(current)
+            key = b''
+            for _ in range(min(self.block_keys, self.key_count - current * self.block_keys)):
+                shared, offset = _decode_varint(buf, offset)
+                length, offset = _decode_varint(buf, offset)
+                key = key[:shared] + buf[offset:offset + length]
+                offset += length
+                value_count, offset = _decode_varint(buf, offset)
+                size, offset = _decode_varint(buf, offset)
+                yield key, offset, offset + size, value_count
+                offset += size
+
+    def _decode_values(self, start, value_count):
+        buf = self.buf
+        values = []
+        offset = start
+        for _ in range(value_count):
+            length, offset = _decode_varint(buf, offset)
+            value = buf[offset:offset + length].decode('utf-8')
+            offset += length
+            pos_id, offset = _decode_varint(buf, offset)
+            values.append((value, self.pos_names[pos_id]))
+        return values
+
+    def exact(self, reading):
+        """読みの完全一致検索（[(単語, 品詞), ...] を返す）"""
+        if not self.block_count:
+            return []
+        key = reading.encode('utf-8')
+        for current, start, _, value_count in self._iter_keys(self._find_block(key)):
+            if current == key:
+                return self._decode_values(start, value_count)
+            if current > key:
+                break
+        return []
+
+    def prefix(self, prefix, limit=None):
+        """読みの前方一致検索（(読み, 単語, 品詞) を読み順に返す）"""
+        if not self.block_count:
+            return
+        key = prefix.encode('utf-8')
+        count = 0
+        for current, start, _, value_count in self._iter_keys(self._find_block(key)):
+            if current < key:
+                continue
+            if not current.startswith(key):
+                return
+            reading = current.decode('utf-8')
+            for value, pos in self._decode_values(start, value_count):
+                if limit is not None and count >= limit:
+                    return
+                yield reading, value, pos
+                count += 1
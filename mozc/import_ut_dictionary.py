@@ -4,16 +4,149 @@ Mozc UT辞書自動インポートスクリプト
 大量の辞書エントリを効率的にMozcのユーザー辞書データベースにインポートします。
 """
 
+import argparse
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import mmap
+import queue
+import re
+import resource
+import shutil
+import subprocess
 import sys
 import os
 import sqlite3
+import tarfile
+import threading
 import time
 import signal
-from pathlib import Path
+import unicodedata
+import zipfile
+from collections import deque
+from itertools import chain, repeat
+from operator import itemgetter
+from multiprocessing import Pool
+
+from compiled_dictionary import write_compiled_dictionary
+
+# インポートするエントリのコメント
+UT_COMMENT = 'UT辞書エントリ'
+# UT辞書エントリを識別するためのLIKEパターン
+UT_COMMENT_PATTERN = 'UT辞書%'
+
+# 差分インポート用にUT辞書エントリの内容ハッシュを保持するテーブル
+FINGERPRINT_TABLE = 'ut_dictionary_fingerprint'
+
+# 中断したインポートを再開するための進捗を記録するテーブル
+PROGRESS_TABLE = 'ut_import_progress'
+
+# 入力ファイルのフィンガープリントに使う先頭・末尾のバイト数
+SOURCE_SAMPLE_BYTES = 64 * 1024
+
+# 進捗レコードを書き出す最短間隔（秒）
+STATUS_INTERVAL_SECONDS = 1.0
+
+# コミット間隔（エントリ数）の初期値と下限
+COMMIT_INTERVAL = 50000
+MIN_COMMIT_INTERVAL = 10000
+# 1トランザクションで書き込むWALの上限（コミット間隔の上限の見積もりに使う）
+WAL_BUDGET_BYTES = 32 * 1024 * 1024
+# コミット間隔ごとにエントリあたりの処理時間を平均する最小エントリ数
+COMMIT_TUNING_ROWS = 200000
+# コミット間隔を変えたときに改善・悪化とみなすエントリあたりの処理時間の変化率
+COMMIT_TUNING_TOLERANCE = 0.1
+# 調整を終えた後、この変化率を超えて遅くなったら調整をやり直す
+COMMIT_RETUNING_THRESHOLD = 0.3
+
+# ユーザー辞書テーブルのインデックス（一括ロード後にまとめて作成する）
+USER_DICTIONARY_INDEXES = (
+    # 読みによる完全一致・前方一致検索用（検索結果の列を含むカバリングインデックス）
+    ('idx_user_dictionary_key', '(key, value, pos)'),
+    # 品詞ごとの件数集計用
+    ('idx_user_dictionary_pos', '(pos)'),
+    # comment LIKE 'UT辞書%' で使えるよう NOCASE で作成（UT辞書のみの品詞集計も兼ねる）
+    ('idx_user_dictionary_comment', '(comment COLLATE NOCASE, pos)'),
+)
+# 一括ロードのステージングテーブルに作るインデックス名の接尾辞
+# （SQLiteはインデックス名を変更できないため、入れ替えのたびに接尾辞なしと交互に使う）
+STAGING_INDEX_SUFFIX = '_next'
+
+INSERT_SQL = 'INSERT INTO {table} (key, value, pos, comment) VALUES (?, ?, ?, ?)'
+
+# 一括ロードモードでエントリを読み込み、最後に user_dictionary と入れ替えるテーブル
+STAGING_TABLE = 'user_dictionary_staging'
+
+# 並列パース時に1ワーカーへ渡すバイト範囲の目安
+CHUNK_BYTES = 8 * 1024 * 1024
+
+# mmap読み込み時に1回でパースするバイト範囲の目安
+MMAP_WINDOW_BYTES = 256 * 1024
+
+# 圧縮ファイル・アーカイブを伸長しながら読み込む際のブロックサイズと先読みブロック数
+STREAM_BLOCK_BYTES = 256 * 1024
+STREAM_QUEUE_BLOCKS = 8
+
+# 伸長しながら読み込む圧縮形式の拡張子
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+TAR_SUFFIXES = ('.tar', '.tgz', '.tbz', '.tbz2', '.txz', '.tzst')
+
+# 1行からインポート対象の列（0, 1, 3列目）と以降の残りを取り出すパターン
+# 行頭の空白を除いた先頭が'#'の行（コメント行）や列数が足りない行にはマッチしない
+_ENTRY_LINE = re.compile(
+    rb'^[ \t\r\x0b\x0c]*'
+    rb'([^ \t\n\r\x0b\x0c#][^\t\n]*)\t'
+    rb'([^\t\n]+)\t'
+    rb'[^\t\n]*\t'
+    rb'([^\t\n]*)([^\n]*)',
+    re.MULTILINE,
+)
+_NEWLINE = re.compile(rb'\n')
+
+# 読みとして受け付ける文字（ひらがな・踊り字・長音記号・濁点/半濁点）
+_HIRAGANA_READING = re.compile('[ぁ-ゖゝゞー゛゜]+')
+# 改行区切りで連結した読みが全てひらがなかどうか（バッチ単位の判定に使う。読みは空にならない）
+_HIRAGANA_READINGS = re.compile('[ぁ-ゖゝゞー゛゜\n]*')
+# 改行区切りで連結した列の前後の空白と連続する空白
+_EXTRA_SPACES = re.compile(r'^ +| +$| (?= )', re.MULTILINE)
+# 単独の濁点・半濁点（゛゜）はNFKCで「空白＋結合文字」に分解されるため、
+# 正規化の前に結合文字にして直前の仮名と合成し（う゛ → ゔ）、合成できなかったものは元に戻す
+_SPACING_TO_COMBINING_MARKS = str.maketrans('\u309b\u309c', '\u3099\u309a')
+_COMBINING_TO_SPACING_MARKS = str.maketrans('\u3099\u309a', '\u309b\u309c')
+_KEY, _VALUE, _POS = itemgetter(0), itemgetter(1), itemgetter(2)
+
+# Mozcのユーザー辞書で使える品詞（--allowed-pos mozc で指定）
+MOZC_USER_POS = (
+    '名詞', '短縮よみ', 'サジェストのみ', '固有名詞', '人名', '姓', '名', '組織', '地名',
+    '名詞サ変', '名詞形動', '数', 'アルファベット', '記号', '顔文字',
+    '副詞', '連体詞', '接続詞', '感動詞', '接頭語', '助数詞', '接尾一般', '接尾人名', '接尾地名',
+    '動詞ワ行五段', '動詞カ行五段', '動詞サ行五段', '動詞タ行五段', '動詞ナ行五段',
+    '動詞マ行五段', '動詞ラ行五段', '動詞ガ行五段', '動詞バ行五段', '動詞ハ行四段',
+    '動詞一段', '動詞カ変', '動詞サ変', '動詞ザ変', '動詞ラ変',
+    '形容詞', '終助詞', '句読点', '独立語', '抑制単語',
+)
+
+
+class ImportInterrupted(Exception):
+    """シグナルによりインポートを中断した（進捗は記録済み）"""
+
+
+# 進捗を記録しながらインポートしている間は、シグナル受信時にすぐ終了せず
+# コミット済みの位置を記録してから終了する
+_checkpoint_active = False
+_interrupt_requested = False
 
 
 def signal_handler(sig, frame):
     """シグナルハンドラー"""
+    global _interrupt_requested
+    if _checkpoint_active and not _interrupt_requested:
+        _interrupt_requested = True
+        print('\n⚠️  中断を受け付けました。処理中のトランザクションを確定してから終了します（もう一度で即時終了）')
+        return
+
     print('\n⚠️  処理が中断されました')
     sys.exit(1)
 
@@ -33,7 +166,7 @@ def optimize_database(conn):
     conn.execute('PRAGMA mmap_size = 268435456')  # 256MB
 
 
-def create_user_dictionary_table(conn):
+def create_user_dictionary_table(conn, clear_existing=True):
     """ユーザー辞書テーブルの作成"""
     conn.execute('''
         CREATE TABLE IF NOT EXISTS user_dictionary (
@@ -44,128 +177,1413 @@ def create_user_dictionary_table(conn):
             comment TEXT
         )
     ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+            entry_id INTEGER PRIMARY KEY,
+            digest INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            byte_offset INTEGER NOT NULL,
+            line_number INTEGER NOT NULL,
+            entries INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    if clear_existing:
+        clear_ut_entries(conn)
 
-    # 既存のUT辞書エントリを削除
-    conn.execute('DELETE FROM user_dictionary WHERE comment LIKE "UT辞書%"')
+
+def clear_ut_entries(conn):
+    """既存のUT辞書エントリと関連する記録を削除"""
+    conn.execute('DELETE FROM user_dictionary WHERE comment LIKE ?', (UT_COMMENT_PATTERN,))
+    conn.execute(f'DELETE FROM {FINGERPRINT_TABLE}')
+    conn.execute(f'DELETE FROM {PROGRESS_TABLE}')
     conn.commit()
 
 
-def import_dictionary_entries(conn, dictionary_file):
+def user_dictionary_index_names(conn, table='user_dictionary'):
+    """テーブルに作成済みのインデックス名（自動作成のものを除く）"""
+    return {
+        name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        )
+    }
+
+
+def drop_user_dictionary_indexes(conn):
+    """一括ロード前にインデックスを削除（ロード中のインデックス更新を避ける）"""
+    for name, _ in USER_DICTIONARY_INDEXES:
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+        conn.execute(f'DROP INDEX IF EXISTS {name}{STAGING_INDEX_SUFFIX}')
+    conn.commit()
+
+
+def create_user_dictionary_indexes(conn, table='user_dictionary', suffix=''):
+    """一括ロード後にインデックスを作成（どちらかの名前で作成済みのものは除く）"""
+    print('🗂️  インデックスを作成中...')
+    existing = user_dictionary_index_names(conn, table)
+    for name, columns in USER_DICTIONARY_INDEXES:
+        if name not in existing and f'{name}{STAGING_INDEX_SUFFIX}' not in existing:
+            conn.execute(f'CREATE INDEX {name}{suffix} ON {table} {columns}')
+    conn.commit()
+
+
+def entry_digest(key, value, pos):
+    """エントリの内容から64bitのハッシュ値を計算（SQLiteのINTEGERに収まる符号付き整数）"""
+    data = f'{key}\t{value}\t{pos}'.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True)
+
+
+def dedupe_digest(key, value, pos):
+    """重複の判定に使う128bitのハッシュ値（プロセスによらず同じ値になり、衝突は無視できる）"""
+    return hashlib.blake2b(f'{key}\t{value}\t{pos}'.encode('utf-8'), digest_size=16).digest()
+
+
+def parse_line(line):
+    """1行をパースしてインサート用のタプルを返す（対象外の行はNone）"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    parts = line.split('\t')
+    if len(parts) >= 4:
+        key, value, pos = parts[0], parts[1], parts[3]
+        if key and value:
+            return (key, value, pos, UT_COMMENT)
+    return None
+
+
+def split_into_chunks(dictionary_file, chunk_bytes=CHUNK_BYTES, start=0):
+    """ファイルの start 以降を行境界に揃えたバイト範囲に分割"""
+    file_size = os.path.getsize(dictionary_file)
+    chunks = []
+
+    with open(dictionary_file, 'rb') as f:
+        while start < file_size:
+            end = start + chunk_bytes
+            if end < file_size:
+                # 範囲の末尾を次の改行の直後まで延ばす
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            else:
+                end = file_size
+            chunks.append((start, end))
+            start = end
+
+    return chunks
+
+
+def parse_buffer(buf, start, end):
+    """バイト列（mmap可）の start から end までを必要な列のみデコードしてパースし、(エントリのリスト, 行数) を返す"""
+    entries = []
+    append = entries.append
+
+    for key, value, pos, rest in _ENTRY_LINE.findall(buf, start, end):
+        if not rest or rest.isspace():
+            # 4列目が行末の列の場合は strip() 相当の処理をする
+            pos = pos.rstrip()
+            if not pos:
+                continue
+        append((key.decode('utf-8'), value.decode('utf-8'), pos.decode('utf-8'), UT_COMMENT))
+
+    # mmapにはcount()がないため正規表現で数える（1バイトのbytesは共有されるため割り当ては少ない）
+    line_count = len(_NEWLINE.findall(buf, start, end))
+    if end > start and buf[end - 1] != 0x0a:
+        line_count += 1
+    return entries, line_count
+
+
+def open_mmap(dictionary_file):
+    """辞書ファイルを読み取り専用でmmapする（空ファイルの場合はNone）"""
+    with open(dictionary_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def parse_chunk(task):
+    """指定されたバイト範囲をパース（ワーカープロセスで実行）"""
+    dictionary_file, start, end = task
+    buf = open_mmap(dictionary_file)
+    if buf is None:
+        return None, 0, end
+
+    try:
+        entries, line_count = parse_buffer(buf, start, end)
+    finally:
+        buf.close()
+    return _pack_entries(entries), line_count, end
+
+
+def _pack_entries(entries):
+    """プロセス間転送用にエントリを列ごとの改行区切りの文字列にまとめる"""
+    if not entries:
+        return None
+    keys, values, poses, _ = zip(*entries)
+    return '\n'.join(keys), '\n'.join(values), '\n'.join(poses)
+
+
+def _unpack_entries(packed):
+    """_pack_entries でまとめたエントリをタプルのリストに戻す"""
+    if packed is None:
+        return []
+    keys, values, poses = packed
+    return list(zip(keys.split('\n'), values.split('\n'), poses.split('\n'), repeat(UT_COMMENT)))
+
+
+def _init_worker():
+    """ワーカープロセスの初期化（中断処理は親プロセスに任せる）"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def iter_serial_chunks(dictionary_file, chunk_lines=10000, start=0):
+    """単一プロセスで1行ずつ読み込み、chunk_lines行ごとに (エントリ, 行数, 読み込み位置) を返す"""
+    entries = []
+    line_count = 0
+    offset = start
+    with open(dictionary_file, 'rb') as f:
+        f.seek(start)
+        for raw_line in f:
+            offset += len(raw_line)
+            line_count += 1
+            entry = parse_line(raw_line.decode('utf-8'))
+            if entry is not None:
+                entries.append(entry)
+
+            if line_count >= chunk_lines:
+                yield entries, line_count, offset
+                entries = []
+                line_count = 0
+
+    if line_count:
+        yield entries, line_count, offset
+
+
+def iter_mmap_chunks(dictionary_file, window_bytes=MMAP_WINDOW_BYTES, start=0):
+    """mmapしたファイルの start 以降を行境界に揃えた範囲ごとにバイト列のままパースして返す"""
+    buf = open_mmap(dictionary_file)
+    if buf is None:
+        return
+
+    try:
+        can_advise = hasattr(buf, 'madvise')
+        if can_advise:
+            buf.madvise(mmap.MADV_SEQUENTIAL)
+
+        size = len(buf)
+        while start < size:
+            newline = buf.find(b'\n', start + window_bytes)
+            end = size if newline < 0 else newline + 1
+            entries, line_count = parse_buffer(buf, start, end)
+            yield entries, line_count, end
+
+            # パース済みのページを手放してRSSが増え続けないようにする
+            release = end - end % mmap.PAGESIZE
+            if can_advise and release:
+                buf.madvise(mmap.MADV_DONTNEED, 0, release)
+            start = end
+    finally:
+        buf.close()
+
+
+def _iter_ordered_results(func, tasks, workers):
+    """プロセスプールでタスクを並列実行し、投入順に結果を返す"""
+    # 書き込みが追いつかない場合にパース結果がメモリに溜まりすぎないよう先読み数を制限
+    max_pending = workers * 2
+
+    with Pool(workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.apply_async(func, (task,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+
+
+def iter_parallel_chunks(dictionary_file, workers, start=0):
+    """プロセスプールでバイト範囲ごとに並列パースし、ファイル順に結果を返す"""
+    tasks = [
+        (dictionary_file, chunk_start, chunk_end)
+        for chunk_start, chunk_end in split_into_chunks(dictionary_file, start=start)
+    ]
+    for packed, line_count, end in _iter_ordered_results(parse_chunk, tasks, workers):
+        yield _unpack_entries(packed), line_count, end
+
+
+def is_stream_source(dictionary_file):
+    """伸長しながら読み込む必要があるファイル（圧縮ファイル・アーカイブ）かどうか"""
+    name = dictionary_file.lower()
+    return (
+        name.endswith(COMPRESSED_SUFFIXES + TAR_SUFFIXES + ('.zip',))
+        or '.tar.' in os.path.basename(name)
+    )
+
+
+def _open_zstd(dictionary_file):
+    """zstd圧縮ファイルを伸長しながら読むファイルオブジェクトを返す"""
+    try:
+        from compression import zstd
+        return zstd.open(dictionary_file, 'rb')
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(dictionary_file, 'rb'), closefd=True)
+    except ImportError:
+        pass
+
+    if shutil.which('zstd') is None:
+        raise RuntimeError('zstd形式の読み込みには zstandard パッケージまたは zstd コマンドが必要です')
+    return _CommandStream(['zstd', '-dc', '--', dictionary_file])
+
+
+class _CommandStream:
+    """外部コマンドの標準出力を読むファイルオブジェクト（閉じる際に終了コードを確認する）"""
+
+    def __init__(self, command):
+        self._command = command
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE)
+
+    def read(self, size=-1):
+        return self._process.stdout.read(size)
+
+    def close(self):
+        self._process.stdout.close()
+        returncode = self._process.wait()
+        if returncode != 0:
+            raise RuntimeError(f'{self._command[0]} が失敗しました（終了コード: {returncode}）')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_decompressed(dictionary_file):
+    """拡張子に応じて伸長しながら読むバイナリファイルオブジェクトを返す"""
+    name = dictionary_file.lower()
+    if name.endswith(('.gz', '.tgz')):
+        return gzip.open(dictionary_file, 'rb')
+    if name.endswith(('.bz2', '.tbz', '.tbz2')):
+        return bz2.open(dictionary_file, 'rb')
+    if name.endswith(('.xz', '.txz')):
+        return lzma.open(dictionary_file, 'rb')
+    if name.endswith(('.zst', '.tzst')):
+        return _open_zstd(dictionary_file)
+    return open(dictionary_file, 'rb')
+
+
+def _is_dictionary_member(name, member):
+    """アーカイブ内のファイルが読み込み対象かどうか"""
+    if member is not None:
+        return name == member or os.path.basename(name) == member
+    return name.lower().endswith('.txt')
+
+
+def iter_source_streams(dictionary_file, member=None):
+    """辞書ファイル（圧縮ファイル・アーカイブ内のファイルを含む）のストリームを順に返す"""
+    name = dictionary_file.lower()
+    found = False
+
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(dictionary_file) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_dictionary_member(info.filename, member):
+                    found = True
+                    with archive.open(info) as stream:
+                        yield stream
+    elif name.endswith(TAR_SUFFIXES) or '.tar.' in os.path.basename(name):
+        # ストリームモードで開き、アーカイブ全体を展開せずに順に読み込む
+        with open_decompressed(dictionary_file) as raw, tarfile.open(fileobj=raw, mode='r|') as archive:
+            for info in archive:
+                if info.isfile() and _is_dictionary_member(info.name, member):
+                    found = True
+                    yield archive.extractfile(info)
+    else:
+        with open_decompressed(dictionary_file) as stream:
+            found = True
+            yield stream
+
+    if not found:
+        raise FileNotFoundError(f'アーカイブ内に辞書ファイルが見つかりません: {dictionary_file}')
+
+
+def _decompress_worker(dictionary_file, member, blocks):
+    """伸長したデータをブロック単位でキューに送る（別スレッドで実行）"""
+    try:
+        for stream in iter_source_streams(dictionary_file, member):
+            last = b'\n'
+            while True:
+                block = stream.read(STREAM_BLOCK_BYTES)
+                if not block:
+                    break
+                blocks.put(block)
+                last = block[-1:]
+            # アーカイブ内のファイルの境界で行が連結されないようにする
+            if last != b'\n':
+                blocks.put(b'\n')
+        blocks.put(None)
+    except BaseException as e:
+        blocks.put(e)
+
+
+def iter_stream_blocks(dictionary_file, member=None, start=0):
+    """伸長しながら読み込み、行境界に揃えたバイト列と伸長後の読み込み位置を順に返す"""
+    blocks = queue.Queue(maxsize=STREAM_QUEUE_BLOCKS)
+    thread = threading.Thread(
+        target=_decompress_worker, args=(dictionary_file, member, blocks), daemon=True
+    )
+    thread.start()
+
+    remainder = b''
+    offset = 0
+    while True:
+        block = blocks.get()
+        if block is None:
+            break
+        if isinstance(block, BaseException):
+            raise block
+
+        data = remainder + block
+        newline = data.rfind(b'\n')
+        if newline < 0:
+            remainder = data
+            continue
+        remainder = data[newline + 1:]
+        data = data[:newline + 1]
+
+        block_start = offset
+        offset += len(data)
+        if offset <= start:
+            continue
+        if block_start < start:
+            data = data[start - block_start:]
+        yield data, offset
+
+    if remainder and offset + len(remainder) > start:
+        yield remainder[max(start - offset, 0):], offset + len(remainder)
+
+
+def parse_block(task):
+    """行境界に揃えたバイト列をパース（ワーカープロセスで実行）"""
+    block, offset = task
+    entries, line_count = parse_buffer(block, 0, len(block))
+    return _pack_entries(entries), line_count, offset
+
+
+def iter_stream_chunks(dictionary_file, workers=1, member=None, start=0):
+    """圧縮ファイル・アーカイブを伸長しながらパースして返す"""
+    blocks = iter_stream_blocks(dictionary_file, member, start)
+    if workers > 1:
+        for packed, line_count, offset in _iter_ordered_results(parse_block, blocks, workers):
+            yield _unpack_entries(packed), line_count, offset
+    else:
+        for block, offset in blocks:
+            entries, line_count = parse_buffer(block, 0, len(block))
+            yield entries, line_count, offset
+
+
+def iter_dictionary_chunks(dictionary_file, workers=1, reader='mmap', member=None, start=0):
+    """指定された読み込み方式で (エントリのリスト, 行数, 読み込み位置) を順に返す"""
+    if is_stream_source(dictionary_file):
+        return iter_stream_chunks(dictionary_file, workers, member, start)
+    if workers > 1:
+        return iter_parallel_chunks(dictionary_file, workers, start)
+    if reader == 'mmap':
+        return iter_mmap_chunks(dictionary_file, start=start)
+    return iter_serial_chunks(dictionary_file, start=start)
+
+
+def normalize_entries(entries):
+    """読みと単語をNFKC正規化して空白を整理し、(残すエントリ, 除外したエントリ) を返す"""
+    if not entries:
+        return entries, []
+
+    count = len(entries)
+    text = '\n'.join(chain(map(_KEY, entries), map(_VALUE, entries)))
+    source = text
+    if '\u309b' in text or '\u309c' in text:
+        source = text.translate(_SPACING_TO_COMBINING_MARKS)
+    normalized = source if unicodedata.is_normalized('NFKC', source) else unicodedata.normalize('NFKC', source)
+    if '\u3099' in normalized or '\u309a' in normalized:
+        # 読みだけ単独の濁点・半濁点に戻す（単語の結合文字はそのまま残す）
+        columns = normalized.split('\n')
+        keys = '\n'.join(columns[:count]).translate(_COMBINING_TO_SPACING_MARKS)
+        normalized = '\n'.join(chain((keys,), columns[count:]))
+    # 正規表現での置換は遅いため、空白の整理が必要な場合のみ行う
+    if ('  ' in normalized or ' \n' in normalized or '\n ' in normalized
+            or normalized.startswith(' ') or normalized.endswith(' ')):
+        normalized = _EXTRA_SPACES.sub('', normalized)
+    if normalized is text:
+        return entries, []
+
+    columns = normalized.split('\n')
+    accepted = []
+    rejected = []
+    for key, value, entry in zip(columns[:count], columns[count:], entries):
+        if key and value:
+            accepted.append((key, value, entry[2], entry[3]))
+        else:
+            rejected.append(entry)
+    return accepted, rejected
+
+
+def filter_hiragana_readings(entries):
+    """読みがひらがな（長音記号・踊り字を含む）以外のエントリを除外する"""
+    if not entries or _HIRAGANA_READINGS.fullmatch('\n'.join(map(_KEY, entries))):
+        return entries, []
+
+    accepted = []
+    rejected = []
+    for entry in entries:
+        (accepted if _HIRAGANA_READING.fullmatch(entry[0]) else rejected).append(entry)
+    return accepted, rejected
+
+
+def filter_allowed_pos(entries, allowed_pos):
+    """品詞が allowed_pos に含まれないエントリを除外する"""
+    if allowed_pos.issuperset(map(_POS, entries)):
+        return entries, []
+
+    accepted = []
+    rejected = []
+    for entry in entries:
+        (accepted if entry[2] in allowed_pos else rejected).append(entry)
+    return accepted, rejected
+
+
+def build_entry_filters(normalize=False, require_hiragana=False, allowed_pos=None):
+    """パースとインサートの間に適用する (名前, フィルタ関数) のリストを作る"""
+    filters = []
+    if normalize:
+        filters.append(('normalize', normalize_entries))
+    if require_hiragana:
+        filters.append(('reading', filter_hiragana_readings))
+    if allowed_pos:
+        allowed_pos = frozenset(allowed_pos)
+        filters.append(('pos', lambda entries: filter_allowed_pos(entries, allowed_pos)))
+    return filters
+
+
+def parse_allowed_pos(text):
+    """カンマ区切りの品詞リスト（'mozc' はMozcのユーザー辞書の品詞一覧）"""
+    allowed_pos = set()
+    for pos in text.split(','):
+        pos = pos.strip()
+        if pos == 'mozc':
+            allowed_pos.update(MOZC_USER_POS)
+        elif pos:
+            allowed_pos.add(pos)
+    return allowed_pos
+
+
+def iter_source_chunks(dictionary_files, workers=1, reader='mmap', member=None, dedupe=False, stats=None,
+                       resume_state=None, seen=None, filters=(), rejects=None):
+    """複数の辞書ファイルを順にパースし、(辞書ファイル, エントリのリスト, 行数, 読み込み位置) を返す"""
+    if dedupe and seen is None:
+        seen = set()
+    elif not dedupe:
+        seen = None
+    resume_state = resume_state or {}
+
+    for dictionary_file in dictionary_files:
+        progress = resume_state.get(dictionary_file)
+        if progress is not None and progress['completed']:
+            continue
+        start = progress['byte_offset'] if progress is not None else 0
+
+        source_stats = {'lines': 0, 'entries': 0, 'duplicates': 0, 'rejected': {}}
+        if stats is not None:
+            stats[dictionary_file] = source_stats
+
+        for entries, line_count, offset in iter_dictionary_chunks(dictionary_file, workers, reader, member, start):
+            for reason, entry_filter in filters:
+                entries, rejected = entry_filter(entries)
+                if rejected:
+                    source_stats['rejected'][reason] = source_stats['rejected'].get(reason, 0) + len(rejected)
+                    if rejects is not None:
+                        rejects.writelines(f'{reason}\t{key}\t{value}\t{pos}\n' for key, value, pos, _ in rejected)
+
+            if seen is not None and entries:
+                kept = []
+                for entry in entries:
+                    digest = dedupe_digest(*entry[:3])
+                    if digest not in seen:
+                        seen.add(digest)
+                        kept.append(entry)
+                source_stats['duplicates'] += len(entries) - len(kept)
+                entries = kept
+
+            source_stats['lines'] += line_count
+            source_stats['entries'] += len(entries)
+            yield dictionary_file, entries, line_count, offset
+
+
+def find_missing_files(dictionary_files):
+    """存在しない辞書ファイルを表示し、1つでもあれば真を返す"""
+    missing = [path for path in dictionary_files if not os.path.exists(path)]
+    for path in missing:
+        print(f'❌ 辞書ファイルが見つかりません: {path}')
+    return bool(missing)
+
+
+def source_fingerprint(dictionary_file):
+    """入力ファイルのフィンガープリント（サイズ・更新時刻・先頭と末尾のハッシュ値）"""
+    stat = os.stat(dictionary_file)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(dictionary_file, 'rb') as f:
+        digest.update(f.read(SOURCE_SAMPLE_BYTES))
+        if stat.st_size > SOURCE_SAMPLE_BYTES:
+            f.seek(max(stat.st_size - SOURCE_SAMPLE_BYTES, SOURCE_SAMPLE_BYTES))
+            digest.update(f.read())
+    return f'{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}'
+
+
+def load_resume_state(conn, dictionary_files):
+    """中断したインポートの進捗を読み込む（入力ファイルが記録時と異なる場合は空の辞書）"""
+    rows = conn.execute(
+        f'SELECT source, fingerprint, byte_offset, line_number, entries, completed FROM {PROGRESS_TABLE}'
+    ).fetchall()
+    if not rows:
+        return {}
+
+    recorded = {row[0]: row[1:] for row in rows}
+    state = {}
+    for dictionary_file in dictionary_files:
+        source = os.path.abspath(dictionary_file)
+        if source not in recorded:
+            continue
+        fingerprint, byte_offset, line_number, entries, completed = recorded.pop(source)
+        if fingerprint != source_fingerprint(dictionary_file):
+            print(f'⚠️  前回から変更されているため再開できません: {dictionary_file}')
+            return {}
+        state[dictionary_file] = {
+            'byte_offset': byte_offset,
+            'line_number': line_number,
+            'entries': entries,
+            'completed': bool(completed),
+        }
+
+    if recorded:
+        print('⚠️  前回と辞書ファイルの指定が異なるため再開できません')
+        return {}
+    return state
+
+
+def save_progress(conn, dictionary_file, fingerprint, byte_offset, line_number, entries, completed=False):
+    """インポートの進捗を記録（呼び出し側のトランザクションでコミットする）"""
+    conn.execute(
+        f'''INSERT OR REPLACE INTO {PROGRESS_TABLE}
+           (source, fingerprint, byte_offset, line_number, entries, completed, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        (os.path.abspath(dictionary_file), fingerprint, byte_offset, line_number, entries,
+         int(completed), time.time())
+    )
+
+
+def print_source_stats(stats):
+    """辞書ファイルごとの読み込み結果を表示"""
+    for dictionary_file, source_stats in stats.items():
+        message = f'📚 {dictionary_file}: {source_stats["entries"]:,} エントリ'
+        if source_stats['duplicates']:
+            message += f'（重複 {source_stats["duplicates"]:,} 件を除外）'
+        print(message)
+        if source_stats.get('rejected'):
+            details = ', '.join(f'{reason} {count:,}' for reason, count in source_stats['rejected'].items())
+            print(f'🚫 {dictionary_file}: {sum(source_stats["rejected"].values()):,} エントリを除外（{details}）')
+
+
+def current_rss_bytes():
+    """現在の常駐メモリ量（取得できない場合はNone）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    """最大常駐メモリ量（macOSはバイト、Linuxはキロバイト単位で返される）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ImportTelemetry:
+    """インポートの進捗をJSON Lines形式でステータスファイルに記録する"""
+
+    def __init__(self, status_file=None, interval=STATUS_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stream = open(status_file, 'w', encoding='utf-8', buffering=1) if status_file else None
+        self.started = time.monotonic()
+        self.last_emit = self.started
+        self.last_entries = 0
+        self.phase = 'load'
+        self.source = None
+        self.lines = 0
+        self.entries = 0
+        self.commits = 0
+        self.parse_seconds = 0.0
+        self.insert_seconds = 0.0
+        self.commit_seconds = 0.0
+        self.commit_interval = None
+        self.offsets = {}
+        self.sizes = {}
+        self.resumed_bytes = 0
+
+    def start(self, dictionary_files, mode, workers=1, resume_state=None):
+        """インポート開始を記録（圧縮ファイルは伸長後のサイズが分からないため残り時間は出さない）"""
+        resume_state = resume_state or {}
+        for dictionary_file in dictionary_files:
+            progress = resume_state.get(dictionary_file)
+            self.sizes[dictionary_file] = (
+                None if is_stream_source(dictionary_file) else os.path.getsize(dictionary_file)
+            )
+            if progress is not None:
+                offset = self.sizes[dictionary_file] if progress['completed'] else progress['byte_offset']
+                self.offsets[dictionary_file] = offset or 0
+        self.resumed_bytes = sum(self.offsets.values())
+        self.emit('start', mode=mode, workers=workers, sources=list(dictionary_files),
+                  resumed=bool(resume_state))
+
+    def record_chunk(self, dictionary_file, line_count, entry_count, offset, parse_seconds, insert_seconds):
+        """1チャンク分の処理を集計し、間隔が空いていれば progress を書き出す"""
+        self.source = dictionary_file
+        self.lines += line_count
+        self.entries += entry_count
+        self.offsets[dictionary_file] = offset
+        self.parse_seconds += parse_seconds
+        self.insert_seconds += insert_seconds
+        if time.monotonic() - self.last_emit >= self.interval:
+            self.progress()
+
+    def record_commit(self, seconds):
+        """コミット1回分の時間を集計"""
+        self.commits += 1
+        self.commit_seconds += seconds
+
+    def record_tuning(self, previous, interval, cost):
+        """コミット間隔の変更を記録"""
+        self.commit_interval = interval
+        self.emit('tune', previous_commit_interval=previous, seconds_per_entry=round(cost, 9))
+
+    def set_phase(self, phase):
+        """処理段階（load / indexes / swap など）の切り替えを記録"""
+        self.phase = phase
+        self.emit('phase')
+
+    def throughput(self):
+        """開始からの平均スループットと残り時間"""
+        elapsed = time.monotonic() - self.started
+        bytes_read = sum(self.offsets.values())
+        bytes_per_sec = (bytes_read - self.resumed_bytes) / elapsed if elapsed > 0 else 0.0
+
+        total_bytes = None
+        eta_seconds = None
+        if self.sizes and None not in self.sizes.values():
+            total_bytes = sum(self.sizes.values())
+            if bytes_per_sec > 0:
+                eta_seconds = round(max(total_bytes - bytes_read, 0) / bytes_per_sec, 1)
+
+        return {
+            'bytes': bytes_read,
+            'total_bytes': total_bytes,
+            'rows_per_sec': round(self.entries / elapsed, 1) if elapsed > 0 else 0.0,
+            'bytes_per_sec': round(bytes_per_sec, 1),
+            'eta_seconds': eta_seconds,
+        }
+
+    def progress(self):
+        """現在の進捗とスループットを書き出す"""
+        interval = time.monotonic() - self.last_emit
+        interval_rows = self.entries - self.last_entries
+        self.emit(
+            'progress',
+            interval_rows_per_sec=round(interval_rows / interval, 1) if interval > 0 else 0.0,
+            **self.throughput()
+        )
+        self.last_entries = self.entries
+
+    def finish(self, status, **fields):
+        """終了（ok / failed / interrupted）を記録してファイルを閉じる"""
+        if self.stream is None:
+            return
+        self.emit('finish', status=status, **self.throughput(), **fields)
+        self.stream.close()
+        self.stream = None
+
+    def emit(self, event, **fields):
+        """1レコードを書き出す"""
+        now = time.monotonic()
+        self.last_emit = now
+        if self.stream is None:
+            return
+        record = {
+            'time': round(time.time(), 3),
+            'event': event,
+            'phase': self.phase,
+            'elapsed': round(now - self.started, 3),
+            'source': self.source,
+            'lines': self.lines,
+            'entries': self.entries,
+            'commits': self.commits,
+            'parse_seconds': round(self.parse_seconds, 3),
+            'insert_seconds': round(self.insert_seconds, 3),
+            'commit_seconds': round(self.commit_seconds, 3),
+            'commit_interval': self.commit_interval,
+            'rss_bytes': current_rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+        record.update(fields)
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class CommitController:
+    """コミット間隔（1トランザクションのエントリ数）を自動調整する"""
+
+    def __init__(self, conn, interval=COMMIT_INTERVAL, fixed=False, wal_budget=WAL_BUDGET_BYTES,
+                 schema='main'):
+        self.conn = conn
+        self.interval = interval
+        self.fixed = fixed
+        # 書き込み先のデータベース（ATTACHしたデータベースに書き込む場合はそのスキーマ名）
+        self.schema = schema
+        self.page_size = conn.execute(f'PRAGMA {schema}.page_size').fetchone()[0]
+        cache_size = conn.execute(f'PRAGMA {schema}.cache_size').fetchone()[0]
+        # 正の値はページ数、負の値はKiB単位
+        cache_bytes = cache_size * self.page_size if cache_size > 0 else -cache_size * 1024
+        self.budget = min(wal_budget, cache_bytes)
+        self.maximum = None
+        self.page_count = self._page_count()
+        self.settled = False
+        # 直前に試した間隔とそのエントリあたりの処理時間
+        self.previous = None
+        self.reference_cost = None
+        self.trial_rows = 0
+        self.trial_seconds = 0.0
+
+    def _page_count(self):
+        return self.conn.execute(f'PRAGMA {self.schema}.page_count').fetchone()[0]
+
+    def should_commit(self, uncommitted):
+        return uncommitted >= self.interval
+
+    def observe(self, rows, seconds):
+        """1トランザクション分の結果を記録し、間隔を変えた場合は (変更前, 変更後, エントリあたり秒) を返す"""
+        page_count = self._page_count()
+        grown_bytes = (page_count - self.page_count) * self.page_size
+        self.page_count = page_count
+        if self.fixed or rows == 0:
+            return None
+
+        if grown_bytes > 0:
+            self.maximum = max(int(self.budget / (grown_bytes / rows)), MIN_COMMIT_INTERVAL)
+            if self.interval > self.maximum:
+                return self._set_interval(self.maximum, seconds / rows)
+
+        self.trial_rows += rows
+        self.trial_seconds += seconds
+        if self.trial_rows < max(COMMIT_TUNING_ROWS, self.interval):
+            return None
+        cost = self.trial_seconds / self.trial_rows
+        self.trial_rows = 0
+        self.trial_seconds = 0.0
+
+        if self.settled:
+            if cost <= self.reference_cost * (1 + COMMIT_RETUNING_THRESHOLD):
+                return None
+            self.settled = False
+            self.previous = None
+            self.reference_cost = cost
+            return self._set_interval(self.interval // 2, cost)
+
+        if self.previous is None or cost < self.reference_cost * (1 - COMMIT_TUNING_TOLERANCE):
+            # 初回または速くなった: さらに間隔を広げる
+            self.previous = self.interval
+            self.reference_cost = cost
+            decision = self._set_interval(self.interval * 2, cost)
+            if decision is None:
+                self.settled = True
+            return decision
+
+        self.settled = True
+        if cost > self.reference_cost * (1 + COMMIT_TUNING_TOLERANCE):
+            # 遅くなった: 前の間隔に戻して確定
+            return self._set_interval(self.previous, cost)
+        self.reference_cost = cost
+        return None
+
+    def _set_interval(self, interval, cost):
+        interval = max(interval, MIN_COMMIT_INTERVAL)
+        if self.maximum is not None:
+            interval = min(interval, self.maximum)
+        if interval == self.interval:
+            return None
+        previous, self.interval = self.interval, interval
+        return previous, interval, cost
+
+
+def report_commit_tuning(decision, telemetry):
+    """CommitController.observe() がコミット間隔を変えた場合に表示・記録する"""
+    if decision is None:
+        return
+    previous, interval, cost = decision
+    print(f'🎛️  コミット間隔: {previous:,} → {interval:,} エントリ'
+          f'（{cost * 1e6:.2f} µs/エントリ）')
+    telemetry.record_tuning(previous, interval, cost)
+
+
+def import_dictionary_entries(conn, dictionary_files, table='user_dictionary', checkpoint=False,
+                              resume_state=None, telemetry=None, commit_rows=None, interruptible=False,
+                              **read_options):
     """辞書エントリをインポート"""
-    print(f'📖 辞書ファイルを読み込み中: {dictionary_file}')
+    global _checkpoint_active
+    print(f'📖 辞書ファイルを読み込み中: {", ".join(dictionary_files)}')
 
-    if not os.path.exists(dictionary_file):
-        print(f'❌ 辞書ファイルが見つかりません: {dictionary_file}')
+    if find_missing_files(dictionary_files):
         return 0
 
-    count = 0
-    batch_data = []
-    batch_size = 10000
-    commit_interval = 50000
+    resume_state = resume_state or {}
+    telemetry = telemetry or ImportTelemetry()
+    count = sum(progress['entries'] for progress in resume_state.values())
+    uncommitted = 0
+    transaction_seconds = 0.0
+    lines_read = 0
+    schema = table.split('.')[0] if '.' in table else 'main'
+    controller = CommitController(
+        conn, commit_rows or COMMIT_INTERVAL, fixed=commit_rows is not None, schema=schema
+    )
+    telemetry.commit_interval = controller.interval
+    next_line_report = 100000
+    insert_sql = INSERT_SQL.format(table=table)
+    stats = {}
 
-    try:
-        with open(dictionary_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
+    # 辞書ファイルごとの進捗 [フィンガープリント, 読み込み位置, 行数, エントリ数]
+    positions = {}
+    if checkpoint:
+        for dictionary_file in dictionary_files:
+            progress = resume_state.get(dictionary_file)
+            positions[dictionary_file] = [
+                source_fingerprint(dictionary_file),
+                progress['byte_offset'] if progress else 0,
+                progress['line_number'] if progress else 0,
+                progress['entries'] if progress else 0,
+            ]
+
+    def record_progress(current_file):
+        for dictionary_file, (fingerprint, offset, line_number, entries) in positions.items():
+            # 読み込み中のファイルより前のファイルは読み込み完了
+            completed = dictionary_files.index(dictionary_file) < dictionary_files.index(current_file)
+            save_progress(conn, dictionary_file, fingerprint, offset, line_number, entries, completed)
 
-                parts = line.split('\t')
-                if len(parts) >= 4:
-                    key, value, pos = parts[0], parts[1], parts[3]
-                    if key and value:
-                        batch_data.append((key, value, pos, 'UT辞書エントリ'))
-                        count += 1
-
-                        # バッチ処理
-                        if len(batch_data) >= batch_size:
-                            conn.executemany(
-                                'INSERT INTO user_dictionary (key, value, pos, comment) VALUES (?, ?, ?, ?)',
-                                batch_data
-                            )
-                            batch_data = []
-
-                            # 定期的にコミット
-                            if count % commit_interval == 0:
-                                conn.commit()
-                                print(f'📊 処理済み: {count:,} エントリ')
-
-                # 進捗表示（読み込み中）
-                if line_num % 100000 == 0:
-                    print(f'📄 読み込み中: {line_num:,} 行')
-
-        # 残りのデータを処理
-        if batch_data:
-            conn.executemany(
-                'INSERT INTO user_dictionary (key, value, pos, comment) VALUES (?, ?, ?, ?)',
-                batch_data
+    seen = None
+    if resume_state and read_options.get('dedupe'):
+        # 再開時はコミット済みのエントリを重複判定の対象に含める
+        seen = {
+            dedupe_digest(key, value, pos)
+            for key, value, pos in conn.execute(
+                f'SELECT key, value, pos FROM {table} WHERE comment LIKE ?', (UT_COMMENT_PATTERN,)
             )
+        }
+
+    current_file = dictionary_files[0]
+    _checkpoint_active = checkpoint or interruptible
+    try:
+        parse_started = time.perf_counter()
+        for current_file, entries, line_count, offset in iter_source_chunks(
+                dictionary_files, stats=stats, resume_state=resume_state, seen=seen, **read_options):
+            insert_started = time.perf_counter()
+            if entries:
+                conn.executemany(insert_sql, entries)
+                count += len(entries)
+                uncommitted += len(entries)
+
+            if checkpoint:
+                position = positions[current_file]
+                position[1] = offset
+                position[2] += line_count
+                position[3] += len(entries)
+
+            # 定期的にコミット
+            if controller.should_commit(uncommitted) or _interrupt_requested:
+                if checkpoint:
+                    record_progress(current_file)
+                commit_started = time.perf_counter()
+                conn.commit()
+                commit_finished = time.perf_counter()
+                telemetry.record_commit(commit_finished - commit_started)
+                transaction_seconds += commit_finished - insert_started
+                print(f'📊 処理済み: {count:,} エントリ')
+
+                report_commit_tuning(controller.observe(uncommitted, transaction_seconds), telemetry)
+                uncommitted = 0
+                transaction_seconds = 0.0
+            else:
+                transaction_seconds += time.perf_counter() - insert_started
+
+            telemetry.record_chunk(current_file, line_count, len(entries), offset,
+                                   insert_started - parse_started, time.perf_counter() - insert_started)
+
+            if _interrupt_requested:
+                raise ImportInterrupted(count)
+
+            # 進捗表示（読み込み中）
+            lines_read += line_count
+            if lines_read >= next_line_report:
+                print(f'📄 読み込み中: {lines_read:,} 行')
+                next_line_report = (lines_read // 100000 + 1) * 100000
+            parse_started = time.perf_counter()
 
+        if checkpoint:
+            # 全ファイルの読み込みが完了したため再開用の進捗は不要
+            conn.execute(f'DELETE FROM {PROGRESS_TABLE}')
         conn.commit()
+        print_source_stats(stats)
         print(f'✅ {count:,} エントリがインポートされました')
         return count
 
+    except ImportInterrupted:
+        raise
     except Exception as e:
         print(f'❌ エラー: {e}')
         conn.rollback()
         return 0
+    finally:
+        _checkpoint_active = False
+
+
+def swap_staging_table(conn):
+    """UT辞書以外のエントリをステージングテーブルに移し、1トランザクションで入れ替える"""
+    print('🚀 構築した辞書を反映中...')
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(
+            f'''INSERT INTO {STAGING_TABLE} (key, value, pos, comment)
+               SELECT key, value, pos, comment FROM user_dictionary
+               WHERE comment IS NULL OR comment NOT LIKE ? ORDER BY id''',
+            (UT_COMMENT_PATTERN,)
+        )
+        conn.execute('DROP TABLE user_dictionary')
+        conn.execute(f'ALTER TABLE {STAGING_TABLE} RENAME TO user_dictionary')
+        # 行IDが変わるためフィンガープリントは次回の差分インポート時に作り直す
+        conn.execute(f'DELETE FROM {FINGERPRINT_TABLE}')
+        conn.execute(f'DELETE FROM {PROGRESS_TABLE}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def bulk_import(conn, dictionary_files, telemetry=None, **read_options):
+    """インデックスなしのステージングテーブルに読み込み、インデックスを作成してから入れ替える"""
+    telemetry = telemetry or ImportTelemetry()
+    # 前回中断時に残ったステージングテーブルは破棄する
+    conn.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+    conn.execute(f'''
+        CREATE TABLE {STAGING_TABLE} (
+            id INTEGER PRIMARY KEY,
+            key TEXT,
+            value TEXT,
+            pos TEXT,
+            comment TEXT
+        )
+    ''')
+    conn.commit()
+
+    swapped = False
+    try:
+        count = import_dictionary_entries(
+            conn, dictionary_files, table=STAGING_TABLE, telemetry=telemetry,
+            interruptible=True, **read_options
+        )
+        if count > 0:
+            telemetry.set_phase('indexes')
+            live_names = user_dictionary_index_names(conn)
+            suffix = '' if f'{USER_DICTIONARY_INDEXES[0][0]}{STAGING_INDEX_SUFFIX}' in live_names \
+                else STAGING_INDEX_SUFFIX
+            create_user_dictionary_indexes(conn, STAGING_TABLE, suffix)
+            telemetry.set_phase('swap')
+            swap_staging_table(conn)
+            swapped = True
+        return count
+    finally:
+        if not swapped:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+            conn.commit()
+
+
+def sync_fingerprints(conn):
+    """フィンガープリントテーブルをUT辞書エントリと同期させる"""
+    conn.create_function('ut_digest', 3, entry_digest, deterministic=True)
+    entry_count = conn.execute(
+        'SELECT COUNT(*) FROM user_dictionary WHERE comment LIKE ?', (UT_COMMENT_PATTERN,)
+    ).fetchone()[0]
+    fingerprint_count = conn.execute(f'SELECT COUNT(*) FROM {FINGERPRINT_TABLE}').fetchone()[0]
+    if entry_count == fingerprint_count:
+        return
+
+    print(f'🔑 フィンガープリントを再作成中: {entry_count:,} エントリ')
+    conn.execute(f'DELETE FROM {FINGERPRINT_TABLE}')
+    conn.execute(
+        f'''INSERT INTO {FINGERPRINT_TABLE} (entry_id, digest)
+           SELECT id, ut_digest(key, value, pos) FROM user_dictionary WHERE comment LIKE ?''',
+        (UT_COMMENT_PATTERN,)
+    )
+    conn.commit()
+
+
+def load_fingerprints(conn):
+    """保存済みのフィンガープリントを {ハッシュ値: エントリID（重複時はIDのリスト）} で返す"""
+    existing = {}
+    for entry_id, digest in conn.execute(f'SELECT entry_id, digest FROM {FINGERPRINT_TABLE}'):
+        current = existing.get(digest)
+        if current is None:
+            existing[digest] = entry_id
+        elif isinstance(current, list):
+            current.append(entry_id)
+        else:
+            existing[digest] = [current, entry_id]
+    return existing
+
+
+def _insert_with_fingerprints(conn, entries):
+    """エントリを追加し、追加された行のフィンガープリントを記録"""
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM user_dictionary').fetchone()[0]
+    conn.executemany(INSERT_SQL.format(table='user_dictionary'), entries)
+    conn.execute(
+        f'''INSERT INTO {FINGERPRINT_TABLE} (entry_id, digest)
+           SELECT id, ut_digest(key, value, pos) FROM user_dictionary WHERE id > ?''',
+        (last_id,)
+    )
+
+
+def import_dictionary_diff(conn, dictionary_files, telemetry=None, commit_rows=None, **read_options):
+    """差分インポート（戻り値は (追加数, 削除数, 変更なしの数)、失敗時は None）"""
+    print(f'📖 辞書ファイルを差分インポート中: {", ".join(dictionary_files)}')
+
+    if find_missing_files(dictionary_files):
+        return None
+
+    telemetry = telemetry or ImportTelemetry()
+    inserted = 0
+    unchanged = 0
+    pending = []
+    controller = CommitController(conn, commit_rows or COMMIT_INTERVAL, fixed=commit_rows is not None)
+    telemetry.commit_interval = controller.interval
+    stats = {}
+
+    try:
+        sync_fingerprints(conn)
+        existing = load_fingerprints(conn)
+        print(f'🔑 既存エントリ: {sum(len(v) if isinstance(v, list) else 1 for v in existing.values()):,} 件')
+
+        parse_started = time.perf_counter()
+        for dictionary_file, entries, line_count, offset in iter_source_chunks(
+                dictionary_files, stats=stats, **read_options):
+            insert_started = time.perf_counter()
+            for entry in entries:
+                digest = entry_digest(entry[0], entry[1], entry[2])
+                current = existing.get(digest)
+                if current is None:
+                    pending.append(entry)
+                    continue
+
+                # 一致した既存エントリは残す（重複行は1件ずつ対応させる）
+                unchanged += 1
+                if isinstance(current, list):
+                    current.pop()
+                    if not current:
+                        del existing[digest]
+                else:
+                    del existing[digest]
+
+            if controller.should_commit(len(pending)):
+                transaction_started = time.perf_counter()
+                _insert_with_fingerprints(conn, pending)
+                commit_started = time.perf_counter()
+                conn.commit()
+                commit_finished = time.perf_counter()
+                telemetry.record_commit(commit_finished - commit_started)
+                inserted += len(pending)
+                print(f'📊 追加済み: {inserted:,} エントリ')
+                report_commit_tuning(
+                    controller.observe(len(pending), commit_finished - transaction_started), telemetry
+                )
+                pending = []
+
+            telemetry.record_chunk(dictionary_file, line_count, len(entries), offset,
+                                   insert_started - parse_started, time.perf_counter() - insert_started)
+            parse_started = time.perf_counter()
+
+        telemetry.set_phase('delete')
+        if pending:
+            _insert_with_fingerprints(conn, pending)
+            inserted += len(pending)
+
+        # 辞書ファイルに存在しなくなったエントリを削除
+        stale_ids = []
+        for current in existing.values():
+            if isinstance(current, list):
+                stale_ids.extend((entry_id,) for entry_id in current)
+            else:
+                stale_ids.append((current,))
+        conn.executemany('DELETE FROM user_dictionary WHERE id = ?', stale_ids)
+        conn.executemany(f'DELETE FROM {FINGERPRINT_TABLE} WHERE entry_id = ?', stale_ids)
+
+        conn.commit()
+        print_source_stats(stats)
+        print(f'✅ 追加: {inserted:,} / 削除: {len(stale_ids):,} / 変更なし: {unchanged:,} エントリ')
+        return inserted, len(stale_ids), unchanged
+
+    except Exception as e:
+        print(f'❌ エラー: {e}')
+        conn.rollback()
+        return None
+
+
+def export_compiled_dictionary(conn, export_file):
+    """ユーザー辞書全体をコンパイル済みファイル（compiled_dictionary 形式）に書き出す"""
+    print(f'📦 コンパイル済み辞書を書き出し中: {export_file}')
+    rows = conn.execute(
+        "SELECT DISTINCT key, value, pos FROM user_dictionary WHERE key IS NOT NULL AND key != '' "
+        'ORDER BY key, value, pos'
+    )
+    entry_count, key_count, size = write_compiled_dictionary(export_file, rows)
+    print(f'📦 {entry_count:,} エントリ（読み {key_count:,} 件）, {size / 1024 / 1024:.1f} MiB')
+    return entry_count
+
+
+def parse_args(argv=None):
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(
+        description='Mozc UT辞書をユーザー辞書データベースにインポートします'
+    )
+    parser.add_argument(
+        'dictionary_files', nargs='+', metavar='dictionary_file',
+        help='辞書ファイル（複数指定可。.gz/.bz2/.xz/.zst の圧縮ファイル、tar/zipアーカイブも可）'
+    )
+    parser.add_argument('database_file', help='データベースファイル')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='パースに使うワーカープロセス数（2以上で並列パース、デフォルト: 1）'
+    )
+    parser.add_argument(
+        '--reader', choices=['mmap', 'text'], default='mmap',
+        help='単一プロセス時の読み込み方式（mmap: バイト列を走査して必要な列のみデコード、text: 行単位のテキスト読み込み）'
+    )
+    parser.add_argument(
+        '--member',
+        help='アーカイブ内で読み込むファイル名（未指定時は .txt ファイルを全て読み込む）'
+    )
+    parser.add_argument(
+        '--dedupe', action='store_true',
+        help='(読み, 単語, 品詞) が同じエントリを1件にまとめる（辞書ファイルを複数指定した場合は常に有効）'
+    )
+    parser.add_argument(
+        '--commit-rows', type=int,
+        help=f'1トランザクションでコミットするエントリ数を固定（未指定時は{COMMIT_INTERVAL:,}から自動調整）'
+    )
+    parser.add_argument(
+        '--export', metavar='COMPILED_FILE',
+        help='インポート後にユーザー辞書を検索用のコンパイル済みファイルに書き出す'
+    )
+    parser.add_argument(
+        '--status-file',
+        help='進捗とスループットをJSON Lines形式で書き出すファイル（1行1レコード）'
+    )
+    parser.add_argument(
+        '--normalize', action='store_true',
+        help='読みと単語をNFKC正規化し、前後の空白と連続する空白を整理'
+    )
+    parser.add_argument(
+        '--require-hiragana', action='store_true',
+        help='読みがひらがな（長音記号・踊り字を含む）でないエントリを除外'
+    )
+    parser.add_argument(
+        '--allowed-pos', metavar='POS[,POS...]',
+        help="インポートする品詞（カンマ区切り。'mozc' でMozcのユーザー辞書の品詞一覧）"
+    )
+    parser.add_argument(
+        '--rejected-file',
+        help='正規化・検証で除外したエントリを「理由, 読み, 単語, 品詞」のタブ区切りで書き出すファイル'
+    )
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        '--incremental', action='store_true',
+        help='既存のUT辞書エントリとの差分（追加・削除）のみを反映'
+    )
+    mode_group.add_argument(
+        '--bulk', action='store_true',
+        help='インデックスなしのテーブルに一括ロードし、最後に1トランザクションで入れ替え'
+             '（インポート中もMozcから読み込める）'
+    )
+    mode_group.add_argument(
+        '--resume', action='store_true',
+        help='中断したインポートを記録された位置から再開（再開できない場合は最初からインポート）'
+    )
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error('--workers には1以上を指定してください')
+    if args.commit_rows is not None and args.commit_rows < 1:
+        parser.error('--commit-rows には1以上を指定してください')
+    return args
 
 
 def main():
     """メイン処理"""
-    if len(sys.argv) != 3:
-        print('使用法: python3 import_ut_dictionary.py <辞書ファイル> <データベースファイル>')
-        sys.exit(1)
-
-    dictionary_file = sys.argv[1]
-    database_file = sys.argv[2]
+    args = parse_args()
+    dictionary_files = args.dictionary_files
+    database_file = args.database_file
+    read_options = {
+        'workers': args.workers,
+        'reader': args.reader,
+        'member': args.member,
+        'dedupe': args.dedupe or len(dictionary_files) > 1,
+        'filters': build_entry_filters(
+            args.normalize, args.require_hiragana,
+            parse_allowed_pos(args.allowed_pos) if args.allowed_pos else None
+        ),
+        'rejects': open(args.rejected_file, 'w', encoding='utf-8') if args.rejected_file else None,
+    }
 
     setup_signal_handlers()
 
     print('🤖 Mozc UT辞書自動インポート開始')
-    print(f'📍 辞書ファイル: {dictionary_file}')
+    for dictionary_file in dictionary_files:
+        print(f'📍 辞書ファイル: {dictionary_file}')
     print(f'📍 データベースファイル: {database_file}')
+    if args.workers > 1:
+        print(f'⚙️  {args.workers} ワーカーで並列パースします')
+
+    mode = 'incremental' if args.incremental else 'bulk' if args.bulk else 'full'
+    # 一括ロードモードは最後の入れ替えまで既存テーブルを書き換えない
+    swaps_table = args.bulk
+    telemetry = ImportTelemetry(args.status_file)
 
     # データベースディレクトリの作成
     os.makedirs(os.path.dirname(database_file), exist_ok=True)
 
-    # 既存のデータベースをバックアップ
-    if os.path.exists(database_file):
-        backup_file = f'{database_file}.bak'
+    # 既存のデータベースをバックアップ（再開時は中断前のバックアップを上書きしない）
+    backup_file = f'{database_file}.bak'
+    if os.path.exists(database_file) and not (args.resume and os.path.exists(backup_file)):
         try:
-            import shutil
             shutil.copy2(database_file, backup_file)
             print(f'💾 既存データベースをバックアップ: {backup_file}')
         except Exception as e:
             print(f'⚠️  バックアップに失敗: {e}')
 
+    # 削除したまま作り直していないインデックスがあるか（中断・失敗時に作り直す）
+    indexes_dropped = False
     try:
         print('🔧 データベースに接続中...')
         conn = sqlite3.connect(database_file, timeout=60)
 
         optimize_database(conn)
-        create_user_dictionary_table(conn)
+        full_import = not (args.incremental or swaps_table)
+        create_user_dictionary_table(conn, clear_existing=False)
+
+        resume_state = {}
+        if args.resume:
+            resume_state = load_resume_state(conn, dictionary_files)
+            if resume_state:
+                print('⏯️  前回の中断位置から再開します')
+                for dictionary_file, progress in resume_state.items():
+                    print(f'   {dictionary_file}: {progress["line_number"]:,} 行目まで処理済み')
+            else:
+                print('ℹ️  再開できる進捗がないため、最初からインポートします')
+
+        if full_import:
+            if not resume_state:
+                clear_ut_entries(conn)
+            drop_user_dictionary_indexes(conn)
+            indexes_dropped = True
 
         start_time = time.time()
-        imported_count = import_dictionary_entries(conn, dictionary_file)
+        telemetry.start(dictionary_files, mode, args.workers, resume_state)
+        if args.incremental:
+            result = import_dictionary_diff(
+                conn, dictionary_files, telemetry=telemetry, commit_rows=args.commit_rows, **read_options
+            )
+        elif args.bulk:
+            imported_count = bulk_import(
+                conn, dictionary_files, telemetry=telemetry, commit_rows=args.commit_rows, **read_options
+            )
+        else:
+            imported_count = import_dictionary_entries(
+                conn, dictionary_files, checkpoint=True, resume_state=resume_state,
+                telemetry=telemetry, commit_rows=args.commit_rows, **read_options
+            )
+        if not swaps_table:
+            telemetry.set_phase('indexes')
+            create_user_dictionary_indexes(conn)
+            indexes_dropped = False
+        succeeded = result is not None if args.incremental else imported_count > 0
+        if args.export and succeeded:
+            telemetry.set_phase('export')
+            export_compiled_dictionary(conn, args.export)
         end_time = time.time()
 
         elapsed_time = end_time - start_time
         print(f'⏱️  処理時間: {elapsed_time:.2f}秒')
 
-        if imported_count > 0:
+        if args.incremental:
+            if result is not None:
+                print('✅ 辞書の差分インポートが完了しました')
+                telemetry.finish('ok', inserted=result[0], deleted=result[1], unchanged=result[2])
+            else:
+                print('❌ 辞書の差分インポートに失敗しました')
+                telemetry.finish('failed')
+                sys.exit(1)
+        elif imported_count > 0:
             print('✅ 辞書の自動インポートが完了しました')
             print(f'📊 インポート済みエントリ数: {imported_count:,}')
+            telemetry.finish('ok', imported=imported_count)
         else:
             print('❌ 辞書のインポートに失敗しました')
+            telemetry.finish('failed')
             sys.exit(1)
 
+    except ImportInterrupted as e:
+        if swaps_table:
+            print('⏸️  インポートを中断しました（既存の辞書は変更されていません）')
+        else:
+            print(f'⏸️  インポートを中断しました（{e.args[0]:,} エントリまでコミット済み）')
+            print('ℹ️  --resume を付けて実行すると中断した位置から再開できます')
+        telemetry.finish('interrupted', imported=e.args[0])
+        sys.exit(1)
     except Exception as e:
         print(f'❌ データベースエラー: {e}')
+        telemetry.finish('failed', error=str(e))
         sys.exit(1)
     finally:
         if 'conn' in locals():
+            if indexes_dropped:
+                # Mozcが読み込むテーブルをインデックスなしのまま残さない
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    create_user_dictionary_indexes(conn)
+                except sqlite3.Error as e:
+                    print(f'⚠️  インデックスを作り直せませんでした: {e}')
             conn.close()
+        if read_options['rejects'] is not None:
+            read_options['rejects'].close()
 
 
 if __name__ == '__main__':
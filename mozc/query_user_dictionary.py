@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Mozcユーザー辞書検索スクリプト
+インポート済みのユーザー辞書データベースをインデックスを使って検索し、
+各クエリの処理時間を表示します。
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from compiled_dictionary import CompiledDictionary
+from import_ut_dictionary import UT_COMMENT_PATTERN
+
+
+def _prefix_upper_bound(prefix):
+    """前方一致の範囲検索に使う上限（prefixで始まる全ての文字列より大きい最小の文字列、なければNone）"""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            # サロゲート領域はUTF-8にエンコードできないため飛ばす
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        # 末尾が最大のコードポイントの場合は1つ前の文字を繰り上げる
+        prefix = prefix[:-1]
+    return None
+
+
+def prefix_query(prefix, limit=50):
+    """読みの前方一致検索のSQLとパラメータ"""
+    upper = _prefix_upper_bound(prefix)
+    if upper is None:
+        return (
+            'SELECT key, value, pos FROM user_dictionary WHERE key >= ? ORDER BY key LIMIT ?',
+            (prefix, limit),
+        )
+    return (
+        'SELECT key, value, pos FROM user_dictionary WHERE key >= ? AND key < ? ORDER BY key LIMIT ?',
+        (prefix, upper, limit),
+    )
+
+
+def exact_query(key):
+    """読みの完全一致検索のSQLとパラメータ"""
+    return 'SELECT key, value, pos FROM user_dictionary WHERE key = ?', (key,)
+
+
+def pos_count_query(ut_only=False):
+    """品詞ごとのエントリ数を集計するSQLとパラメータ"""
+    if ut_only:
+        return (
+            'SELECT pos, COUNT(*) FROM user_dictionary WHERE comment LIKE ? '
+            'GROUP BY pos ORDER BY COUNT(*) DESC',
+            (UT_COMMENT_PATTERN,),
+        )
+    return 'SELECT pos, COUNT(*) FROM user_dictionary GROUP BY pos ORDER BY COUNT(*) DESC', ()
+
+
+def prefix_search(conn, prefix, limit=50):
+    """読みの前方一致検索"""
+    return conn.execute(*prefix_query(prefix, limit)).fetchall()
+
+
+def exact_search(conn, key):
+    """読みの完全一致検索"""
+    return conn.execute(*exact_query(key)).fetchall()
+
+
+def count_by_pos(conn, ut_only=False):
+    """品詞ごとのエントリ数"""
+    return conn.execute(*pos_count_query(ut_only)).fetchall()
+
+
+def run_timed(conn, sql, params):
+    """クエリを実行し (結果, 経過ミリ秒) を返す"""
+    start = time.perf_counter()
+    rows = conn.execute(sql, params).fetchall()
+    return rows, (time.perf_counter() - start) * 1000
+
+
+def search_compiled(compiled_file, args):
+    """コンパイル済みファイルを検索し (結果, 経過ミリ秒) を返す（ファイルを開く時間を含む）"""
+    start = time.perf_counter()
+    with CompiledDictionary(compiled_file) as dictionary:
+        if args.command == 'prefix':
+            rows = list(dictionary.prefix(args.reading, args.limit))
+        else:
+            rows = [(args.reading, value, pos) for value, pos in dictionary.exact(args.reading)]
+    return rows, (time.perf_counter() - start) * 1000
+
+
+def print_query_plan(conn, sql, params):
+    """クエリプランの表示"""
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        print(f'🔎 {row[-1]}')
+
+
+def parse_args(argv=None):
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(description='Mozcユーザー辞書データベースを検索します')
+    parser.add_argument('database_file', help='データベースファイル')
+    parser.add_argument('--explain', action='store_true', help='クエリプランを表示')
+    parser.add_argument(
+        '--compiled', action='store_true',
+        help='database_file を import_ut_dictionary.py --export で書き出したコンパイル済みファイルとして検索'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    prefix_parser = subparsers.add_parser('prefix', help='読みの前方一致検索')
+    prefix_parser.add_argument('reading', help='読み')
+    prefix_parser.add_argument('--limit', type=int, default=50, help='最大表示件数（デフォルト: 50）')
+
+    exact_parser = subparsers.add_parser('exact', help='読みの完全一致検索')
+    exact_parser.add_argument('reading', help='読み')
+
+    pos_parser = subparsers.add_parser('pos-counts', help='品詞ごとのエントリ数')
+    pos_parser.add_argument('--ut-only', action='store_true', help='UT辞書エントリのみを集計')
+
+    return parser.parse_args(argv)
+
+
+def main():
+    """メイン処理"""
+    args = parse_args()
+
+    if not os.path.exists(args.database_file):
+        print(f'❌ データベースファイルが見つかりません: {args.database_file}')
+        sys.exit(1)
+
+    if args.compiled:
+        if args.command == 'pos-counts':
+            print('❌ コンパイル済みファイルは prefix / exact のみ検索できます')
+            sys.exit(1)
+        try:
+            rows, elapsed = search_compiled(args.database_file, args)
+        except ValueError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+        for key, value, pos in rows:
+            print(f'  {key}\t{value}\t{pos}')
+        print(f'📊 {len(rows):,} 件')
+        print(f'⏱️  検索時間: {elapsed:.2f} ms')
+        return
+
+    if args.command == 'prefix':
+        sql, params = prefix_query(args.reading, args.limit)
+    elif args.command == 'exact':
+        sql, params = exact_query(args.reading)
+    else:
+        sql, params = pos_count_query(args.ut_only)
+
+    conn = sqlite3.connect(f'file:{args.database_file}?mode=ro', uri=True)
+    try:
+        if args.explain:
+            print_query_plan(conn, sql, params)
+
+        rows, elapsed = run_timed(conn, sql, params)
+        if args.command == 'pos-counts':
+            for pos, count in rows:
+                print(f'  {pos or "(なし)"}\t{count:,}')
+            print(f'📊 {len(rows):,} 品詞')
+        else:
+            for key, value, pos in rows:
+                print(f'  {key}\t{value}\t{pos}')
+            print(f'📊 {len(rows):,} 件')
+
+        print(f'⏱️  クエリ時間: {elapsed:.2f} ms')
+
+    except sqlite3.Error as e:
+        print(f'❌ データベースエラー: {e}')
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,31 @@ DICT_FILE="$1"
 DB_FILE="$2"
 DOTFILES_DIR="$3"
 LOG_FILE="${DB_FILE}.import.log"
+# 進捗とスループットの記録（check_import_status.sh が読み込む）
+STATUS_FILE="${DB_FILE}.import.status"
+# パースに使うワーカー数（未指定時はCPUコア数）
+IMPORT_WORKERS="${MOZC_IMPORT_WORKERS:-$(nproc 2>/dev/null || echo 1)}"
+IMPORT_OPTIONS=(--workers "$IMPORT_WORKERS" --status-file "$STATUS_FILE")
+# MOZC_IMPORT_STOP_SERVER=1 の場合は従来どおりMozcを停止してからインポート
+STOP_SERVER="${MOZC_IMPORT_STOP_SERVER:-0}"
+# インポートの進捗を記録するテーブル（import_ut_dictionary.py の PROGRESS_TABLE）
+PROGRESS_TABLE="ut_import_progress"
+
+# 中断したインポートの進捗がデータベースに残っているか
+has_import_progress() {
+    [ -f "$DB_FILE" ] || return 1
+    python3 - "$DB_FILE" "$PROGRESS_TABLE" <<'EOF_PY' 2>/dev/null
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1], timeout=10)
+try:
+    row = conn.execute(f"SELECT 1 FROM {sys.argv[2]} LIMIT 1").fetchone()
+except sqlite3.Error:
+    row = None
+sys.exit(0 if row else 1)
+EOF_PY
+}
 
 # ログファイルの初期化
 exec 1> >(tee -a "$LOG_FILE")
@@ -48,20 +73,53 @@ if [ ! -f "$DICT_FILE" ]; then
     exit 1
 fi
 
-# Mozcサービスの停止
-print_status "Mozcサービスを停止中..."
-pkill -f mozc_server 2>/dev/null || true
-pkill -f mozc_renderer 2>/dev/null || true
-sleep 2
+# Mozcサービスの停止（反映は1トランザクションで行われるため、通常は停止しない）
+if [ "$STOP_SERVER" = "1" ]; then
+    print_status "Mozcサービスを停止中..."
+    pkill -f mozc_server 2>/dev/null || true
+    pkill -f mozc_renderer 2>/dev/null || true
+    sleep 2
+fi
 
 # データベースディレクトリの作成
 print_status "データベースディレクトリを作成中..."
 mkdir -p "$(dirname "$DB_FILE")"
 
-# 既存のデータベースをバックアップ
-if [ -f "$DB_FILE" ]; then
+# インポート方法の選択
+RESUMING=0
+if [ "${MOZC_IMPORT_INCREMENTAL:-0}" = "1" ]; then
+    # MOZC_IMPORT_INCREMENTAL=1 の場合は既存エントリとの差分のみを反映
+    IMPORT_OPTIONS+=(--incremental)
+elif [ "$STOP_SERVER" = "1" ] || has_import_progress; then
+    # 前回のインポートが中断されていれば続きから再開（進捗がなければ最初から）
+    # 進捗が残っている場合、データベースは既に途中までインポートされた状態のため、
+    # ステージングテーブルに最初から読み込む --bulk ではなく、中断した位置から再開する
+    IMPORT_OPTIONS+=(--resume)
+    if [ "$STOP_SERVER" != "1" ]; then
+        RESUMING=1
+        print_status "前回中断したインポートの進捗があるため、続きから再開します"
+    fi
+else
+    # ステージングテーブルに読み込んでから1トランザクションで入れ替えるため、Mozcを停止しなくてよい
+    IMPORT_OPTIONS+=(--bulk)
+fi
+
+# 既存のデータベースをバックアップ（Mozcが使用中でも一貫した内容を取れるようSQLiteのバックアップを使う）
+# 再開する場合は、途中までインポートした内容で中断前のバックアップを上書きしない
+if [ -f "$DB_FILE" ] && ! { [ "$RESUMING" = "1" ] && [ -f "${DB_FILE}.bak" ]; }; then
     print_status "既存のユーザー辞書をバックアップ中..."
-    cp "$DB_FILE" "${DB_FILE}.bak"
+    if command -v sqlite3 >/dev/null 2>&1; then
+        # Mozcがデータベースをロックしている場合は最大10秒待つ
+        if ! sqlite3 "$DB_FILE" ".timeout 10000" ".backup '${DB_FILE}.bak'"; then
+            print_error "既存のユーザー辞書をバックアップできませんでした: $DB_FILE"
+            print_error "Mozcがデータベースをロックしている可能性があります。"
+            print_error "Mozcを終了するか、MOZC_IMPORT_STOP_SERVER=1 を指定して再実行してください"
+            touch "${DB_FILE}.failed"
+            exit 1
+        fi
+    else
+        cp "$DB_FILE" "${DB_FILE}.bak"
+    fi
 fi
 
 # Pythonスクリプトの存在確認
@@ -75,7 +133,7 @@ fi
 print_status "専用Pythonスクリプトを使用してインポート中..."
 print_status "処理には5-10分程度かかります。しばらくお待ちください..."
 
-if python3 "$PYTHON_SCRIPT" "$DICT_FILE" "$DB_FILE"; then
+if python3 "$PYTHON_SCRIPT" "$DICT_FILE" "$DB_FILE" "${IMPORT_OPTIONS[@]}"; then
     print_success "辞書の自動インポートが完了しました"
 
     # 成功フラグファイルの作成
@@ -0,0 +1,71 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+SETTINGS="$TMP_DIR/.gemini/shared/settings.json"
+JOURNAL="$SETTINGS.journal"
+
+run_gemini() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" -m gemini "$@")
+}
+
+run_gemini config --reset >/dev/null
+cp "$SETTINGS" "$TMP_DIR/settings.orig.json"
+
+for setting in \
+	"commands=1" \
+	'commands.test.enabled="yes"' \
+	'personas=["architect",1]' \
+	'commands.custom={"enabled":"true"}'; do
+	for mode in "" "--defer"; do
+		echo "[TEST] config --set $mode rejects $setting"
+		set +e
+		output="$(run_gemini config $mode --set "$setting" 2>&1)"
+		status=$?
+		set -e
+
+		if [ "$status" -eq 0 ]; then
+			echo "Expected non-zero exit status for $setting"
+			exit 1
+		fi
+		if ! grep -q "を指定してください" <<<"$output"; then
+			echo "Expected type error message for $setting"
+			echo "$output"
+			exit 1
+		fi
+		if ! cmp -s "$SETTINGS" "$TMP_DIR/settings.orig.json"; then
+			echo "Expected settings.json to stay unchanged after $setting"
+			exit 1
+		fi
+		if [ -e "$JOURNAL" ]; then
+			echo "Expected no journal entry after $setting"
+			exit 1
+		fi
+	done
+done
+
+echo "[TEST] commands still lists after rejected settings"
+listing="$(run_gemini commands)"
+if ! grep -q "/sg:analyze" <<<"$listing"; then
+	echo "Expected command listing to work"
+	exit 1
+fi
+
+echo "[TEST] config --set accepts values of the default type"
+run_gemini config --set commands.test.enabled=false --set language=en >/dev/null
+run_gemini config --defer --set 'commands.custom={"enabled":true,"description":"独自コマンド","category":"ツール系"}' >/dev/null
+listing="$(run_gemini commands)"
+if grep -q "/sg:test " <<<"$listing"; then
+	echo "Expected disabled command to be hidden"
+	exit 1
+fi
+if ! grep -q "/sg:custom - 独自コマンド" <<<"$listing"; then
+	echo "Expected custom command in listing"
+	exit 1
+fi
+
+echo "All gemini config --set tests passed."
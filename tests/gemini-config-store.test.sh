@@ -0,0 +1,108 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+
+run_python() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+echo "[TEST] concurrent writers do not lose each other's changes"
+run_python <<'EOF_PY'
+import json
+import os
+from multiprocessing import Process
+
+from gemini.supergemini import CONFIG_JOURNAL_PATH, CONFIG_PATH, SHARED_DIR, default_config
+from gemini.supergemini.config_store import create_config, flush_config, update_config
+
+WRITERS = 8
+CHANGES = 25
+
+
+def write(writer):
+    for i in range(CHANGES):
+        # 直接の書き込みと書き込み待ちの記録を混ぜる
+        update_config({f"stress.w{writer}.k{i}": i}, write_behind=(writer + i) % 3 == 0)
+
+
+create_config(default_config())
+processes = [Process(target=write, args=(writer,)) for writer in range(WRITERS)]
+for process in processes:
+    process.start()
+for process in processes:
+    process.join()
+    assert process.exitcode == 0, process.exitcode
+
+flush_config()
+assert not os.path.exists(CONFIG_JOURNAL_PATH)
+with open(CONFIG_PATH, encoding="utf-8") as f:
+    stress = json.load(f)["stress"]
+for writer in range(WRITERS):
+    assert stress[f"w{writer}"] == {f"k{i}": i for i in range(CHANGES)}, (writer, stress[f"w{writer}"])
+leftovers = [name for name in os.listdir(SHARED_DIR) if name.endswith(".tmp")]
+assert not leftovers, leftovers
+EOF_PY
+
+echo "[TEST] write-behind changes are replayed in order and a torn last line is ignored"
+run_python 2>"$TMP_DIR/replay.log" <<'EOF_PY' || {
+import json
+import os
+
+from gemini.supergemini import CONFIG_JOURNAL_PATH, CONFIG_PATH, default_config, get_config
+from gemini.supergemini.config_store import (
+    JOURNAL_COMPACT_ENTRIES,
+    flush_config,
+    reset_config,
+    update_config,
+)
+
+
+def on_disk():
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+reset_config(default_config())
+update_config({"language": "en"}, write_behind=True)
+update_config({"language": "fr", "commands.test.enabled": False}, write_behind=True)
+with open(CONFIG_JOURNAL_PATH, "a", encoding="utf-8") as f:
+    f.write('{"key": "language", "val')
+
+# settings.json は書き換えず、読み込み時に記録を順に反映する
+assert on_disk()["language"] != "fr"
+config = get_config()
+assert config["language"] == "fr", config["language"]
+assert config["commands"]["test"]["enabled"] is False
+
+# 直接の書き込みは書き込み待ちの変更と合わせて1回で書き込む
+update_config({"commands.analyze.enabled": False})
+assert not os.path.exists(CONFIG_JOURNAL_PATH)
+config = on_disk()
+assert config["language"] == "fr" and config["commands"]["test"]["enabled"] is False
+assert config["commands"]["analyze"]["enabled"] is False
+
+# 記録が JOURNAL_COMPACT_ENTRIES 件に達したらまとめて書き込む
+for i in range(JOURNAL_COMPACT_ENTRIES - 1):
+    update_config({"counter": i}, write_behind=True)
+assert os.path.exists(CONFIG_JOURNAL_PATH) and "counter" not in on_disk()
+update_config({"counter": JOURNAL_COMPACT_ENTRIES - 1}, write_behind=True)
+assert not os.path.exists(CONFIG_JOURNAL_PATH)
+assert on_disk()["counter"] == JOURNAL_COMPACT_ENTRIES - 1
+
+assert flush_config() is False
+EOF_PY
+	cat "$TMP_DIR/replay.log"
+	exit 1
+}
+if ! grep -q "設定の変更記録の不正な行を無視しました" "$TMP_DIR/replay.log"; then
+	echo "Expected a warning for the torn journal line"
+	cat "$TMP_DIR/replay.log"
+	exit 1
+fi
+
+echo "All config store tests passed."
@@ -0,0 +1,107 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+
+run_python() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+echo "[TEST] hook timings are recorded by default and skip hooks that never ran timed"
+run_python <<'EOF_PY'
+from gemini.supergemini.hooks import TIMING_INTERVAL, HookRegistry
+
+registry = HookRegistry()
+registry.register("event", lambda data: data + 1)
+registry.register("other", lambda data: data)
+
+# 実行表を作っただけのイベントは記録に含めない
+registry._compile("other")
+for _ in range(TIMING_INTERVAL * 2):
+    assert registry.execute("event", 0) == 1
+
+timings = registry.get_timings()
+assert [t["event"] for t in timings] == ["event"], timings
+assert timings[0]["calls"] == 2, timings
+
+untimed = HookRegistry(timing_interval=0)
+untimed.register("event", lambda data: data)
+untimed.execute("event", 0)
+assert untimed.get_timings() == [], untimed.get_timings()
+
+every = HookRegistry(timing_interval=1)
+every.register("event", lambda data: data)
+for _ in range(3):
+    every.execute("event", 0)
+assert every.get_timings()[0]["calls"] == 3
+EOF_PY
+
+echo "[TEST] hooks run by priority, then registration order, across patterns"
+run_python <<'EOF_PY'
+from gemini.supergemini.hooks import HookRegistry
+
+registry = HookRegistry()
+calls = []
+registry.register("response.before", lambda data: calls.append("late") or data, priority=10)
+registry.register("response.*", lambda data: calls.append("pattern") or data)
+registry.register("response.before", lambda data: calls.append("exact") or data)
+registry.register("response.**", lambda data: calls.append("early") or data, priority=-1)
+registry.register("request.before", lambda data: calls.append("other") or data)
+registry.execute("response.before", 0)
+assert calls == ["early", "pattern", "exact", "late"], calls
+EOF_PY
+
+echo "[TEST] parallel observers see the transformed data for any observer count and entry point"
+run_python <<'EOF_PY'
+import asyncio
+
+from gemini.supergemini.hooks import HookRegistry
+
+for count in (1, 2, 3):
+    for entry_point in ("execute", "execute_async"):
+        registry = HookRegistry()
+        seen = []
+        # 観察用のフックは変換用のフックより優先度が高くても、変換後のデータを受け取る
+        for index in range(count):
+            registry.register(
+                "event",
+                lambda data, index=index: seen.append((index, data)),
+                priority=0,
+                transform=False,
+            )
+        registry.register("event", lambda data: data * 10, priority=5)
+
+        if entry_point == "execute":
+            result = registry.execute("event", 1, parallel=True)
+        else:
+            result = asyncio.run(registry.execute_async("event", 1, parallel=True))
+        assert result == 10, (count, entry_point, result)
+        assert sorted(seen) == [(index, 10) for index in range(count)], (
+            count,
+            entry_point,
+            seen,
+        )
+
+        # parallel=False では登録した優先度の位置で実行する
+        seen.clear()
+        registry.execute("event", 1)
+        assert sorted(seen) == [(index, 1) for index in range(count)], seen
+EOF_PY
+
+echo "[TEST] a failing hook is skipped and later hooks still run"
+run_python <<'EOF_PY'
+from gemini.supergemini.hooks import HookRegistry
+
+for interval in (0, 1):
+    registry = HookRegistry(timing_interval=interval)
+    registry.register("event", lambda data: data + 1)
+    registry.register("event", lambda data: 1 / 0)
+    registry.register("event", lambda data: data * 2)
+    assert registry.execute("event", 1) == 4
+EOF_PY
+
+echo "All gemini hook tests passed."
@@ -0,0 +1,50 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+
+run_python() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+echo "[TEST] search ranks by coverage, tolerates a typo and skips half matches"
+run_python <<'EOF_PY'
+from gemini.supergemini.search import build_index, search
+
+registry = {
+    "categories": [
+        ("開発", [("test", "テストを実行する"), ("deploy", "デプロイを実行する")]),
+        ("運用", [("infra", "インフラストラクチャを構築する")]),
+    ],
+    "personas": [("qa", "QA")],
+    "persona_details": {
+        "qa": ("🧪", "品質保証", "テスト計画を立てる", ["テスト設計"]),
+        "hidden": ("🙈", "無効", "テストしない", []),
+    },
+}
+index = build_index(registry)
+
+names = [name for _kind, name, _summary, _score in search("テスト", index=index)]
+# 「すと」だけが一致するインフラストラクチャは含めない
+assert "infra" not in names, names
+# settings.json で有効にしていないペルソナは含めない
+assert "hidden" not in names, names
+assert set(names) == {"test", "qa"}, names
+
+# 1文字違いでも、n-gramの大半が一致すれば見つかる
+names = [name for _kind, name, _summary, _score in search("デプロイを実行", index=index)]
+assert names[0] == "deploy", names
+names = [name for _kind, name, _summary, _score in search("デプロイお実行", index=index)]
+assert names[0] == "deploy", names
+
+# 一致した割合が高い文書を、スコアが高い文書より先に並べる
+results = search("テスト計画", index=index)
+assert results[0][1] == "qa", results
+assert all(r[1] != "infra" for r in results), results
+EOF_PY
+
+echo "All search tests passed."
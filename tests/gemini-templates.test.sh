@@ -0,0 +1,162 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+TEMPLATES="$TMP_DIR/Commands"
+
+run_python() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+run_gemini() {
+	(cd "$ROOT_DIR" && HOME="$TMP_DIR" PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" -m gemini "$@")
+}
+
+# settings.json のディレクトリ（render() ではレジストリの読み込み時に作成される）
+mkdir -p "$TEMPLATES" "$TMP_DIR/.gemini/shared"
+cat >"$TEMPLATES/report.md" <<'EOF_MD'
+# {{command.prefix}}{{command.name}}
+{{>_header}}
+{{^arguments}}
+引数なし
+{{/arguments}}
+{{#items}}
+- {{name}}{{#tags}} [{{.}}]{{/tags}}
+{{/items}}
+EOF_MD
+cat >"$TEMPLATES/_header.md" <<'EOF_MD'
+{{#persona}}
+{{emoji}} {{title}}
+{{>_specialties}}
+{{/persona}}
+EOF_MD
+cat >"$TEMPLATES/_specialties.md" <<'EOF_MD'
+{{#specialties}}
+* {{.}}
+{{/specialties}}
+EOF_MD
+
+echo "[TEST] nested partials, sections and standalone tag lines render as expected"
+run_python "$TEMPLATES" <<'EOF_PY'
+import sys
+
+from gemini.supergemini import templates
+
+templates.TEMPLATES_DIR = sys.argv[1]
+loaded = templates.load_templates()
+assert templates.list_templates() == ["report"], templates.list_templates()
+
+context = {
+    "command": {"name": "report", "prefix": "/sg:"},
+    "persona": {"emoji": "🏗️", "title": "設計", "specialties": ["分散", "API"]},
+    "arguments": "",
+    "items": [{"name": "a", "tags": ["x", "y"]}, {"name": "b", "tags": []}],
+}
+output = "".join(templates._render_nodes(loaded["report"], [context], loaded))
+expected = "# /sg:report\n🏗️ 設計\n* 分散\n* API\n引数なし\n- a [x] [y]\n- b\n"
+assert output == expected, repr(output)
+
+context["persona"] = None
+context["arguments"] = "src"
+output = "".join(templates._render_nodes(loaded["report"], [context], loaded))
+assert output == "# /sg:report\n- a [x] [y]\n- b\n", repr(output)
+EOF_PY
+
+echo "[TEST] a new process renders from the snapshot without parsing the templates"
+run_python "$TEMPLATES" <<'EOF_PY'
+import os
+import sys
+
+from gemini.supergemini import templates
+
+
+def fail(*args):
+    raise AssertionError("templates were parsed again")
+
+
+assert os.path.exists(templates.TEMPLATES_PATH)
+templates.TEMPLATES_DIR = sys.argv[1]
+templates.compile_template = fail
+assert sorted(templates.load_templates()) == ["_header", "_specialties", "report"]
+EOF_PY
+
+echo "[TEST] changing a partial invalidates the snapshot"
+printf '{{#specialties}}\n+ {{.}}\n{{/specialties}}\n' >"$TEMPLATES/_specialties.md"
+run_python "$TEMPLATES" <<'EOF_PY'
+import sys
+
+from gemini.supergemini import templates
+
+templates.TEMPLATES_DIR = sys.argv[1]
+loaded = templates.load_templates()
+context = {"persona": {"emoji": "", "title": "t", "specialties": ["s"]}}
+output = "".join(templates._render_nodes(loaded["_header"], [context], loaded))
+assert output == " t\n+ s\n", repr(output)
+EOF_PY
+
+echo "[TEST] broken sections, missing partials and partial cycles are rejected"
+run_python <<'EOF_PY'
+from gemini.supergemini.templates import _check_partials, compile_template
+
+for source, message in [
+    ("{{#a}}x", "{{#a}} が閉じられていません"),
+    ("{{#a}}x{{/b}}", "{{/b}} に対応するセクションがありません"),
+]:
+    try:
+        compile_template(source, "broken")
+    except ValueError as e:
+        assert message in str(e), e
+    else:
+        raise AssertionError(f"expected ValueError for {source!r}")
+
+for templates, message in [
+    ({"a": compile_template("{{>_missing}}")}, "部品 '_missing' が見つかりません"),
+    (
+        {
+            "a": compile_template("{{>_b}}"),
+            "_b": compile_template("{{#x}}{{>_c}}{{/x}}"),
+            "_c": compile_template("{{>_b}}"),
+        },
+        "_b → _c → _b",
+    ),
+]:
+    try:
+        _check_partials(templates)
+    except ValueError as e:
+        assert message in str(e), e
+    else:
+        raise AssertionError(f"expected ValueError for {templates!r}")
+EOF_PY
+
+echo "[TEST] render embeds the persona and arguments into a shipped command"
+output="$(run_gemini render --persona architect --no-project analyze src/app.py)"
+for expected in "# /sg:analyze コマンド" "@architect（" "## 対象" "src/app.py"; do
+	if ! grep -qF "$expected" <<<"$output"; then
+		echo "Expected rendered analyze to contain $expected"
+		echo "$output"
+		exit 1
+	fi
+done
+if grep -q "{{\|## プロジェクト" <<<"$output"; then
+	echo "Expected no template tags or project section in the output"
+	exit 1
+fi
+
+echo "[TEST] render rejects partials and unknown commands"
+for command in _context missing; do
+	if run_gemini render "$command" >"$TMP_DIR/render.log" 2>&1; then
+		echo "Expected render $command to fail"
+		exit 1
+	fi
+	if ! grep -q "テンプレートが見つかりません" "$TMP_DIR/render.log"; then
+		echo "Expected a missing template message for $command"
+		cat "$TMP_DIR/render.log"
+		exit 1
+	fi
+done
+
+echo "All template tests passed."
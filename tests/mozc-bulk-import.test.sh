@@ -0,0 +1,147 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+DB_FILE="$TMP_DIR/user_dictionary.db"
+
+# INTERRUPT_AFTER_COMMITS 回目のコミットの後に自分自身へ SIGINT を送ってインポートする
+INTERRUPTING_IMPORT="$TMP_DIR/interrupting_import.py"
+cat >"$INTERRUPTING_IMPORT" <<'EOF_PY'
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.environ['MOZC_DIR'])
+import import_ut_dictionary
+
+limit = int(os.environ['INTERRUPT_AFTER_COMMITS'])
+record_commit = import_ut_dictionary.ImportTelemetry.record_commit
+
+
+def record_commit_and_interrupt(self, seconds):
+    record_commit(self, seconds)
+    if self.commits == limit:
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+import_ut_dictionary.ImportTelemetry.record_commit = record_commit_and_interrupt
+sys.argv[0] = 'import_ut_dictionary.py'
+import_ut_dictionary.main()
+EOF_PY
+
+run_import() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$@" >"$TMP_DIR/import.log" 2>&1 || {
+		echo "Expected import to succeed: $*"
+		cat "$TMP_DIR/import.log"
+		exit 1
+	}
+}
+
+sql() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" "$1" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+for row in conn.execute(sys.argv[2]).fetchall():
+    print('\t'.join('' if column is None else str(column) for column in row))
+conn.commit()
+EOF_PY
+}
+
+dump() {
+	sql 'SELECT key, value, pos, comment FROM user_dictionary ORDER BY id'
+}
+
+index_names() {
+	sql "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name = 'user_dictionary' ORDER BY name" |
+		tr '\n' ' '
+}
+
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$TMP_DIR" <<'EOF_PY'
+import os
+import sys
+
+with open(os.path.join(sys.argv[1], 'v1.txt'), 'w', encoding='utf-8') as f:
+    for i in range(20000):
+        f.write(f'よみ{i}\t単語{i}\t0\t名詞\n')
+with open(os.path.join(sys.argv[1], 'v2.txt'), 'w', encoding='utf-8') as f:
+    for i in range(10000, 50000):
+        f.write(f'よみ{i}\t単語{i}\t0\t名詞\n')
+EOF_PY
+
+run_import "$TMP_DIR/v1.txt" "$DB_FILE"
+sql "INSERT INTO user_dictionary (key, value, pos, comment) VALUES ('わたし', '私', '名詞', NULL)"
+sql "INSERT INTO user_dictionary (key, value, pos, comment) VALUES ('めも', 'メモ', '名詞', '自分で登録')"
+
+echo "[TEST] --bulk replaces UT entries and keeps the user's own entries"
+run_import "$TMP_DIR/v2.txt" "$DB_FILE" --bulk
+if [ "$(sql "SELECT COUNT(*) FROM user_dictionary WHERE comment LIKE 'UT辞書%'")" -ne 40000 ] ||
+	[ "$(sql "SELECT COUNT(*) FROM user_dictionary WHERE key = 'よみ0'")" -ne 0 ]; then
+	echo "Expected only the entries of the new dictionary file"
+	exit 1
+fi
+if [ "$(sql "SELECT group_concat(key) FROM user_dictionary WHERE comment IS NULL OR comment NOT LIKE 'UT辞書%'")" != "わたし,めも" ]; then
+	echo "Expected the user's own entries to survive the swap"
+	dump | grep -v 'UT辞書' || true
+	exit 1
+fi
+if [ "$(sql "SELECT COUNT(*) FROM sqlite_master WHERE name = 'user_dictionary_staging'")" -ne 0 ]; then
+	echo "Expected the staging table to be renamed away"
+	exit 1
+fi
+names="$(index_names)"
+if [ "$names" != "idx_user_dictionary_comment_next idx_user_dictionary_key_next idx_user_dictionary_pos_next " ]; then
+	echo "Expected the staging indexes to replace the live ones, got: $names"
+	exit 1
+fi
+
+echo "[TEST] the next --bulk swaps the index names back"
+run_import "$TMP_DIR/v2.txt" "$DB_FILE" --bulk
+names="$(index_names)"
+if [ "$names" != "idx_user_dictionary_comment idx_user_dictionary_key idx_user_dictionary_pos " ]; then
+	echo "Expected the original index names, got: $names"
+	exit 1
+fi
+
+echo "[TEST] an interrupted --bulk leaves the live table untouched"
+dump >"$TMP_DIR/before.tsv"
+if MOZC_DIR="$ROOT_DIR/mozc" INTERRUPT_AFTER_COMMITS=2 PYTHONDONTWRITEBYTECODE=1 \
+	"$PYTHON_BIN" "$INTERRUPTING_IMPORT" "$TMP_DIR/v1.txt" "$DB_FILE" --bulk --commit-rows 2000 \
+	>"$TMP_DIR/import.log" 2>&1; then
+	echo "Expected the interrupted import to exit with an error"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+if ! grep -q "既存の辞書は変更されていません" "$TMP_DIR/import.log"; then
+	echo "Expected the interrupted --bulk to report the live table as unchanged"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+if ! cmp -s "$TMP_DIR/before.tsv" <(dump); then
+	echo "Expected the live table to be unchanged after the interrupt"
+	exit 1
+fi
+if [ "$(sql "SELECT COUNT(*) FROM sqlite_master WHERE name = 'user_dictionary_staging'")" -ne 0 ]; then
+	echo "Expected the staging table to be dropped after the interrupt"
+	exit 1
+fi
+if [ "$(index_names)" != "$names" ]; then
+	echo "Expected the live indexes to be unchanged after the interrupt"
+	exit 1
+fi
+
+echo "[TEST] --incremental after --bulk rebuilds fingerprints for the new row ids"
+run_import "$TMP_DIR/v1.txt" "$DB_FILE" --incremental
+if ! grep -q "追加: 10,000 / 削除: 30,000 / 変更なし: 10,000" "$TMP_DIR/import.log"; then
+	echo "Expected the differential import to compare against the swapped table"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+
+echo "All Mozc bulk import tests passed."
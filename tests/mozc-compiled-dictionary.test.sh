@@ -0,0 +1,96 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+QUERY_SCRIPT="$ROOT_DIR/mozc/query_user_dictionary.py"
+DICT_FILE="$TMP_DIR/dict.txt"
+DB_FILE="$TMP_DIR/user_dictionary.db"
+COMPILED_FILE="$TMP_DIR/user_dictionary.dic"
+
+run_python() {
+	(cd "$ROOT_DIR/mozc" && PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+query() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$QUERY_SCRIPT" "$@" | grep -v '検索時間\|クエリ時間'
+}
+
+echo "[TEST] exact and prefix lookups match a full scan across block boundaries"
+run_python "$TMP_DIR" <<'EOF_PY'
+import os
+import random
+import sys
+
+from compiled_dictionary import BLOCK_KEYS, CompiledDictionary, write_compiled_dictionary
+
+random.seed(12)
+alphabet = ['あ', 'い', 'ん', 'a', '퟿', '', '\U0010ffff']
+rows = set()
+for i in range(5000):
+    key = ''.join(random.choice(alphabet) for _ in range(random.randint(1, 5)))
+    # 長い単語は単語リストの長さが複数バイトのvarintになる
+    value = f'単語{i}' * random.choice([1, 1, 1, 50])
+    rows.add((key, value, random.choice(['名詞', '動詞', '', None])))
+rows = sorted(rows, key=lambda row: (row[0].encode('utf-8'), row[1], row[2] or ''))
+
+path = os.path.join(sys.argv[1], 'random.dic')
+entry_count, key_count, size = write_compiled_dictionary(path, rows)
+assert entry_count == len(rows) and key_count == len({row[0] for row in rows})
+assert key_count > BLOCK_KEYS * 10, key_count
+assert not os.path.exists(f'{path}.tmp')
+
+expected = [(key, value, pos or '') for key, value, pos in rows]
+with CompiledDictionary(path) as dictionary:
+    assert len(dictionary) == len(rows)
+    keys = sorted({row[0] for row in rows}, key=lambda key: key.encode('utf-8'))
+    for key in keys + ['ああああああ', '\U0010ffff' * 6, '']:
+        assert dictionary.exact(key) == [(v, p) for k, v, p in expected if k == key], key
+    for prefix in keys[::7] + ['', 'a', '\U0010ffff', 'いいいいいい']:
+        assert list(dictionary.prefix(prefix)) == [row for row in expected if row[0].startswith(prefix)], prefix
+    assert list(dictionary.prefix('', limit=3)) == expected[:3]
+
+empty = os.path.join(sys.argv[1], 'empty.dic')
+assert write_compiled_dictionary(empty, [])[:2] == (0, 0)
+with CompiledDictionary(empty) as dictionary:
+    assert dictionary.exact('あ') == [] and list(dictionary.prefix('')) == []
+
+broken = os.path.join(sys.argv[1], 'broken.dic')
+with open(broken, 'wb') as f:
+    f.write(b'not a dictionary' * 8)
+try:
+    CompiledDictionary(broken)
+except ValueError:
+    pass
+else:
+    raise AssertionError('expected ValueError for a file with the wrong magic')
+EOF_PY
+
+echo "[TEST] --export writes a file that answers like the database"
+for i in $(seq 1 500); do
+	printf 'よみ%s\t単語%s\t0\t名詞\n' "$i" "$i"
+	printf 'よみ%s\t別の単語%s\t0\t固有名詞\n' "$i" "$i"
+done >"$DICT_FILE"
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$DICT_FILE" "$DB_FILE" --export "$COMPILED_FILE" \
+	>"$TMP_DIR/import.log" 2>&1 || {
+	echo "Expected import with --export to succeed"
+	cat "$TMP_DIR/import.log"
+	exit 1
+}
+for args in "prefix よみ12 --limit 20" "exact よみ42" "exact ない"; do
+	# shellcheck disable=SC2086
+	expected="$(query "$DB_FILE" $args | sort)"
+	# shellcheck disable=SC2086
+	actual="$(query "$COMPILED_FILE" --compiled $args | sort)"
+	if [ "$expected" != "$actual" ]; then
+		echo "Expected the compiled file to answer '$args' like the database"
+		diff <(echo "$expected") <(echo "$actual") || true
+		exit 1
+	fi
+done
+
+echo "All Mozc compiled dictionary tests passed."
@@ -0,0 +1,136 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+DICT_FILE="$TMP_DIR/dict.txt"
+
+run_import() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$@" >"$TMP_DIR/import.log" 2>&1 || {
+		echo "Expected import to succeed: $*"
+		cat "$TMP_DIR/import.log"
+		exit 1
+	}
+}
+
+# ユーザー辞書の行を id 順にタブ区切りで書き出す
+dump() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$1" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+for row in conn.execute('SELECT key, value, pos, comment FROM user_dictionary ORDER BY id'):
+    print('\t'.join('' if column is None else column for column in row))
+EOF_PY
+}
+
+# 並列パースのチャンク（8MB）を複数またぐ大きさにし、パースの境界になりやすい行を混ぜる
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DICT_FILE" <<'EOF_PY'
+import sys
+
+special = [
+    '# コメント\tこめんと\t0\t名詞',
+    '',
+    '   ',
+    '  まえ\t前\t0\t名詞  ',
+    'みじかい\t短い\t0',
+    '\t空の読み\t0\t名詞',
+    'からのたんご\t\t0\t名詞',
+    'よぶん\t余分\t0\t名詞\t余分な列',
+    'かいぎょう\t改行\t0\t名詞\r',
+    'ひんしなし\t品詞なし\t0\t',
+    '\tはじまり\tタブ\t0\t名詞',
+]
+with open(sys.argv[1], 'w', encoding='utf-8', newline='') as f:
+    for i in range(300000):
+        f.write(f'よみ{i}\t単語{i}\t{i % 7}\t名詞\n')
+        if i % 997 == 0:
+            f.write(special[i % len(special)] + '\n')
+    # 改行で終わらない最後の行
+    f.write('さいご\t最後\t0\t名詞')
+EOF_PY
+
+echo "[TEST] mmap, text and multi-process parsers import the same rows"
+run_import "$DICT_FILE" "$TMP_DIR/text.db" --reader text
+dump "$TMP_DIR/text.db" >"$TMP_DIR/text.tsv"
+for options in "--reader mmap" "--workers 3"; do
+	db_file="$TMP_DIR/${options// /_}.db"
+	# shellcheck disable=SC2086
+	run_import "$DICT_FILE" "$db_file" $options
+	if ! cmp -s "$TMP_DIR/text.tsv" <(dump "$db_file"); then
+		echo "Expected $options to import the same rows as --reader text"
+		diff "$TMP_DIR/text.tsv" <(dump "$db_file") | head -20
+		exit 1
+	fi
+done
+if [ "$(wc -l <"$TMP_DIR/text.tsv")" -lt 300000 ]; then
+	echo "Expected at least 300000 rows"
+	exit 1
+fi
+if ! grep -q $'^はじまり\tタブ\t名詞\t' "$TMP_DIR/text.tsv" || grep -q 'こめんと\|品詞なし' "$TMP_DIR/text.tsv"; then
+	echo "Expected lines to be parsed like parse_line"
+	exit 1
+fi
+
+echo "[TEST] --incremental adds and removes only the changed entries"
+DB_FILE="$TMP_DIR/diff.db"
+printf '%s\t%s\t0\t%s\n' \
+	"あ" "亜" "名詞" \
+	"い" "井" "名詞" \
+	"う" "宇" "名詞" \
+	"え" "絵" "名詞" \
+	"え" "絵" "名詞" \
+	>"$TMP_DIR/v1.txt"
+printf '%s\t%s\t0\t%s\n' \
+	"い" "井" "名詞" \
+	"う" "宇" "名詞" \
+	"え" "絵" "名詞" \
+	"お" "尾" "名詞" \
+	>"$TMP_DIR/v2.txt"
+run_import "$TMP_DIR/v1.txt" "$DB_FILE"
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+conn.execute("INSERT INTO user_dictionary (key, value, pos, comment) VALUES ('わたし', '私', '名詞', NULL)")
+conn.commit()
+EOF_PY
+before="$(PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+print(conn.execute("SELECT group_concat(id) FROM user_dictionary WHERE key IN ('い', 'う')").fetchone()[0])
+EOF_PY
+)"
+run_import "$TMP_DIR/v2.txt" "$DB_FILE" --incremental
+if ! grep -q "追加: 1 / 削除: 2 / 変更なし: 3" "$TMP_DIR/import.log"; then
+	echo "Expected one insert, two deletes and three unchanged entries"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+rows="$(dump "$DB_FILE" | cut -f1,4 | sort | tr '\t\n' ':,')"
+if [ "$rows" != "い:UT辞書エントリ,う:UT辞書エントリ,え:UT辞書エントリ,お:UT辞書エントリ,わたし:," ]; then
+	echo "Unexpected rows after --incremental: $rows"
+	exit 1
+fi
+after="$(PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+print(conn.execute("SELECT group_concat(id) FROM user_dictionary WHERE key IN ('い', 'う')").fetchone()[0])
+EOF_PY
+)"
+if [ "$before" != "$after" ]; then
+	echo "Expected unchanged entries to keep their ids ($before -> $after)"
+	exit 1
+fi
+
+echo "All Mozc import tests passed."
@@ -0,0 +1,73 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+DICT_FILE="$TMP_DIR/dict.txt"
+DB_FILE="$TMP_DIR/user_dictionary.db"
+REJECTED_FILE="$TMP_DIR/rejected.tsv"
+
+# 読みに単独の濁点・半濁点（U+309B/U+309C）を含むエントリ
+printf '%s\t%s\t0\t%s\n' \
+	"う゛ぃーな" "ヴィーナ" "名詞" \
+	"は゜ん" "パン" "名詞" \
+	"あ゛" "あ゛" "感動詞" \
+	"ｶﾞｸ" "学" "名詞" \
+	"あ゛あ" "ア゙" "名詞" \
+	>"$DICT_FILE"
+
+query() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" "$1" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+print(conn.execute('SELECT count(*) FROM user_dictionary WHERE key = ?', (sys.argv[2],)).fetchone()[0])
+EOF_PY
+}
+
+echo "[TEST] --normalize --require-hiragana keeps readings with standalone dakuten/handakuten"
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$DICT_FILE" "$DB_FILE" \
+	--normalize --require-hiragana --rejected-file "$REJECTED_FILE" >"$TMP_DIR/import.log" 2>&1 || {
+	echo "Expected import to succeed"
+	cat "$TMP_DIR/import.log"
+	exit 1
+}
+
+for reading in "ゔぃーな" "ぱん" "あ゛"; do
+	if [ "$(query "$reading")" != "1" ]; then
+		echo "Expected entry with reading $reading"
+		exit 1
+	fi
+done
+
+echo "[TEST] uncomposed combining marks in words are not turned into spacing marks"
+value="$(PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+print(ascii(conn.execute("SELECT value FROM user_dictionary WHERE key = 'あ゛あ'").fetchone()[0]))
+EOF_PY
+)"
+if [ "$value" != "'\u30a2\u3099'" ]; then
+	echo "Expected the word to keep its combining mark, got $value"
+	exit 1
+fi
+
+echo "[TEST] --require-hiragana still rejects katakana readings"
+if [ "$(query "ガク")" != "0" ]; then
+	echo "Expected katakana reading to be rejected"
+	exit 1
+fi
+if [ "$(wc -l <"$REJECTED_FILE")" -ne 1 ] || ! grep -q "ガク" "$REJECTED_FILE"; then
+	echo "Expected only the katakana reading in the rejected file"
+	cat "$REJECTED_FILE"
+	exit 1
+fi
+
+echo "All Mozc reading normalization tests passed."
@@ -0,0 +1,86 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+QUERY_SCRIPT="$ROOT_DIR/mozc/query_user_dictionary.py"
+DICT_FILE="$TMP_DIR/dict.txt"
+DB_FILE="$TMP_DIR/user_dictionary.db"
+
+run_python() {
+	(cd "$ROOT_DIR/mozc" && PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$@")
+}
+
+run_import() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$@" >"$TMP_DIR/import.log" 2>&1 || {
+		echo "Expected import to succeed: $*"
+		cat "$TMP_DIR/import.log"
+		exit 1
+	}
+}
+
+expect_plan() {
+	local expected="$1"
+	shift
+	local output
+	output="$(PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$QUERY_SCRIPT" "$DB_FILE" --explain "$@")"
+	if ! grep -q "$expected" <<<"$output"; then
+		echo "Expected '$*' to use $expected"
+		echo "$output"
+		exit 1
+	fi
+}
+
+for i in $(seq 1 2000); do
+	printf 'よみ%s\t単語%s\t0\t%s\n' "$i" "$i" "$([ $((i % 3)) -eq 0 ] && echo 動詞 || echo 名詞)"
+done >"$DICT_FILE"
+
+echo "[TEST] prefix, exact and pos-count queries use the user_dictionary indexes"
+run_import "$DICT_FILE" "$DB_FILE"
+expect_plan "COVERING INDEX idx_user_dictionary_key (key>? AND key<?)" prefix よみ12
+expect_plan "COVERING INDEX idx_user_dictionary_key (key=?)" exact よみ12
+expect_plan "COVERING INDEX idx_user_dictionary_comment" pos-counts --ut-only
+
+echo "[TEST] queries keep using the indexes after --bulk renames them"
+run_import "$DICT_FILE" "$DB_FILE" --bulk
+expect_plan "COVERING INDEX idx_user_dictionary_key_next (key>? AND key<?)" prefix よみ12
+expect_plan "COVERING INDEX idx_user_dictionary_comment_next" pos-counts --ut-only
+
+echo "[TEST] prefix and exact searches match a full scan, including code point edges"
+run_python <<'EOF_PY'
+import random
+import sqlite3
+
+from query_user_dictionary import count_by_pos, exact_search, prefix_search
+
+random.seed(4)
+alphabet = ['あ', 'い', 'ん', '퟿', '', '\U0010ffff', 'a']
+conn = sqlite3.connect(':memory:')
+conn.execute('CREATE TABLE user_dictionary (id INTEGER PRIMARY KEY, key TEXT, value TEXT, pos TEXT, comment TEXT)')
+rows = []
+for i in range(3000):
+    key = ''.join(random.choice(alphabet) for _ in range(random.randint(1, 4)))
+    rows.append((key, f'単語{i}', random.choice(['名詞', '動詞']), 'UT辞書エントリ' if i % 2 else None))
+conn.executemany('INSERT INTO user_dictionary (key, value, pos, comment) VALUES (?, ?, ?, ?)', rows)
+conn.execute('CREATE INDEX idx_user_dictionary_key ON user_dictionary (key, value, pos)')
+
+keys = sorted({key for key, _, _, _ in rows})
+for prefix in keys[:200] + ['\U0010ffff', '퟿', 'あ\U0010ffff']:
+    expected = sorted((k, v, p) for k, v, p, _ in rows if k.startswith(prefix))
+    assert sorted(prefix_search(conn, prefix, limit=len(rows))) == expected, prefix
+    assert sorted(exact_search(conn, prefix)) == sorted(r for r in expected if r[0] == prefix), prefix
+
+limited = prefix_search(conn, 'あ', limit=5)
+assert len(limited) == 5 and [r[0] for r in limited] == sorted(r[0] for r in limited), limited
+
+assert dict(count_by_pos(conn)) == {
+    pos: sum(1 for row in rows if row[2] == pos) for pos in ('名詞', '動詞')
+}
+assert sum(count for _, count in count_by_pos(conn, ut_only=True)) == 1500
+EOF_PY
+
+echo "All Mozc user dictionary query tests passed."
@@ -0,0 +1,138 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+TMP_DIR="$(mktemp -d)"
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+PYTHON_BIN="$(command -v python3)"
+IMPORT_SCRIPT="$ROOT_DIR/mozc/import_ut_dictionary.py"
+DB_FILE="$TMP_DIR/user_dictionary.db"
+
+# INTERRUPT_AFTER_COMMITS 回目のコミットの後に自分自身へ SIGINT を送ってインポートする
+INTERRUPTING_IMPORT="$TMP_DIR/interrupting_import.py"
+cat >"$INTERRUPTING_IMPORT" <<'EOF_PY'
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.environ['MOZC_DIR'])
+import import_ut_dictionary
+
+limit = int(os.environ['INTERRUPT_AFTER_COMMITS'])
+record_commit = import_ut_dictionary.ImportTelemetry.record_commit
+
+
+def record_commit_and_interrupt(self, seconds):
+    record_commit(self, seconds)
+    if self.commits == limit:
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+import_ut_dictionary.ImportTelemetry.record_commit = record_commit_and_interrupt
+sys.argv[0] = 'import_ut_dictionary.py'
+import_ut_dictionary.main()
+EOF_PY
+
+run_import() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" "$IMPORT_SCRIPT" "$@" >"$TMP_DIR/import.log" 2>&1 || {
+		echo "Expected import to succeed: $*"
+		cat "$TMP_DIR/import.log"
+		exit 1
+	}
+}
+
+run_interrupted_import() {
+	if MOZC_DIR="$ROOT_DIR/mozc" INTERRUPT_AFTER_COMMITS="$1" PYTHONDONTWRITEBYTECODE=1 \
+		"$PYTHON_BIN" "$INTERRUPTING_IMPORT" "${@:2}" >"$TMP_DIR/import.log" 2>&1; then
+		echo "Expected the interrupted import to exit with an error"
+		cat "$TMP_DIR/import.log"
+		exit 1
+	fi
+}
+
+sql() {
+	PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$DB_FILE" "$1" <<'EOF_PY'
+import sqlite3
+import sys
+
+conn = sqlite3.connect(sys.argv[1])
+for row in conn.execute(sys.argv[2]):
+    print('\t'.join('' if column is None else str(column) for column in row))
+EOF_PY
+}
+
+# 2つ目のファイルは1つ目と一部が重複する（再開時もファイルをまたいだ重複を除外する）
+PYTHONDONTWRITEBYTECODE=1 "$PYTHON_BIN" - "$TMP_DIR" <<'EOF_PY'
+import os
+import sys
+
+with open(os.path.join(sys.argv[1], 'a.txt'), 'w', encoding='utf-8') as f:
+    for i in range(40000):
+        f.write(f'よみ{i}\t単語{i}\t0\t名詞\n')
+with open(os.path.join(sys.argv[1], 'b.txt'), 'w', encoding='utf-8') as f:
+    for i in range(30000, 70000):
+        f.write(f'よみ{i}\t単語{i}\t0\t名詞\n')
+EOF_PY
+SOURCES=("$TMP_DIR/a.txt" "$TMP_DIR/b.txt")
+
+run_import "${SOURCES[@]}" "$TMP_DIR/expected.db" --commit-rows 2000
+DB_FILE="$TMP_DIR/expected.db" sql 'SELECT key, value, pos, comment FROM user_dictionary ORDER BY id' \
+	>"$TMP_DIR/expected.tsv"
+
+echo "[TEST] SIGINT commits the current transaction, records progress and restores indexes"
+run_interrupted_import 3 "${SOURCES[@]}" "$DB_FILE" --commit-rows 2000
+if ! grep -q -- "--resume" "$TMP_DIR/import.log"; then
+	echo "Expected the interrupted import to suggest --resume"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+imported="$(sql 'SELECT COUNT(*) FROM user_dictionary')"
+if [ "$imported" -eq 0 ] || [ "$imported" -ge 70000 ]; then
+	echo "Expected a partial import, got $imported rows"
+	exit 1
+fi
+if [ "$(sql 'SELECT COUNT(*) FROM ut_import_progress')" -eq 0 ]; then
+	echo "Expected the progress table to record the interrupted position"
+	exit 1
+fi
+indexes="$(sql "SELECT group_concat(name) FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name = 'user_dictionary'")"
+for index in idx_user_dictionary_key idx_user_dictionary_pos idx_user_dictionary_comment; do
+	if ! grep -q "$index" <<<"$indexes"; then
+		echo "Expected $index to be recreated after the interrupt, got: $indexes"
+		exit 1
+	fi
+done
+
+echo "[TEST] --resume continues from the recorded position and matches an uninterrupted import"
+run_import "${SOURCES[@]}" "$DB_FILE" --commit-rows 2000 --resume
+if ! grep -q "前回の中断位置から再開します" "$TMP_DIR/import.log"; then
+	echo "Expected --resume to continue from the recorded position"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+if ! cmp -s "$TMP_DIR/expected.tsv" <(sql 'SELECT key, value, pos, comment FROM user_dictionary ORDER BY id'); then
+	echo "Expected the resumed import to match an uninterrupted import"
+	diff "$TMP_DIR/expected.tsv" <(sql 'SELECT key, value, pos, comment FROM user_dictionary ORDER BY id') | head -20
+	exit 1
+fi
+if [ "$(sql 'SELECT COUNT(*) FROM ut_import_progress')" -ne 0 ]; then
+	echo "Expected the progress table to be cleared after the import completed"
+	exit 1
+fi
+
+echo "[TEST] --resume starts over when a source file changed since the interrupt"
+run_interrupted_import 3 "${SOURCES[@]}" "$DB_FILE" --commit-rows 2000
+printf '%s\t%s\t0\t%s\n' "ついか" "追加" "名詞" >>"$TMP_DIR/a.txt"
+run_import "${SOURCES[@]}" "$DB_FILE" --commit-rows 2000 --resume
+if ! grep -q "再開できる進捗がないため" "$TMP_DIR/import.log"; then
+	echo "Expected --resume to start over after the source changed"
+	cat "$TMP_DIR/import.log"
+	exit 1
+fi
+if [ "$(sql 'SELECT COUNT(*) FROM user_dictionary')" -ne 70001 ]; then
+	echo "Expected every entry of the changed sources to be imported once"
+	exit 1
+fi
+
+echo "All Mozc resume tests passed."